@@ -1,20 +1,39 @@
-from pyramid.config import Configurator
 import os
 
 
 def main(global_config, **settings):
     """ This function returns a Pyramid WSGI application.
     """
+    # Imported here so CLIs importing setara_backend.scripts stay light
+    from pyramid.config import Configurator
+    from .utils.startup import is_test_module, startup_phase
+
     with Configurator(settings=settings) as config:
-        config.include('.middleware')
+        registry = config.registry
+
+        with startup_phase(registry, 'include.middleware'):
+            config.include('.middleware')
+
+        with startup_phase(registry, 'include.openapi'):
+            config.pyramid_openapi3_spec_directory(
+                os.path.join(
+                    os.path.dirname(__file__), "api_docs/openapi.yaml"
+                ),
+                route='/api/spec'
+            )
+            config.pyramid_openapi3_add_explorer()
+
+        with startup_phase(registry, 'include.services'):
+            config.include('.services')
+
+        with startup_phase(registry, 'include.routes'):
+            config.include('.routes')
 
-        config.pyramid_openapi3_spec_directory(
-            os.path.join(os.path.dirname(__file__), "api_docs/openapi.yaml"),
-            route='/api/spec'
-        )
-        config.pyramid_openapi3_add_explorer()
+        # Only the views carry decorators, and workers must not import tests
+        with startup_phase(registry, 'scan'):
+            config.scan('.views', ignore=is_test_module)
 
-        config.include('.services')
-        config.include('.routes')
-        config.scan()
+        # Runs the deferred actions, loading the OpenAPI spec among them
+        with startup_phase(registry, 'commit'):
+            config.commit()
     return config.make_wsgi_app()
@@ -1,9 +1,16 @@
 """Pyramid bootstrap environment. """
 from alembic import context
+from alembic.migration import MigrationContext
 from pyramid.paster import get_appsettings, setup_logging
 from sqlalchemy import engine_from_config
 
 from setara_backend.models.meta import Base
+from setara_backend.utils.online_migrations import (
+    DRY_RUN_CONNECTION,
+    apply_timeouts,
+    is_dry_run,
+    make_read_only
+)
 
 config = context.config
 
@@ -37,21 +44,64 @@ def run_migrations_online():
     and associate a connection with the context.
 
     """
-    engine = engine_from_config(settings, prefix='sqlalchemy.')
+    engine = engine_from_config(
+        {
+            key: value for key, value in settings.items()
+            if not key.startswith('sqlalchemy.replica.')
+        },
+        prefix='sqlalchemy.'
+    )
 
     connection = engine.connect()
-    context.configure(
-        connection=connection,
-        target_metadata=target_metadata
-    )
+    apply_timeouts(connection, context.get_x_argument(as_dictionary=True))
 
     try:
+        if is_dry_run():
+            run_migrations_dry_run(connection)
+            return
+
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # Online operations commit midway through their migration
+            transaction_per_migration=True
+        )
         with context.begin_transaction():
             context.run_migrations()
     finally:
         connection.close()
 
 
+def run_migrations_dry_run(connection):
+    """Print the SQL of the pending migrations without running it.
+
+    The migrations run in offline mode from the database's current
+    revision, so every operation is rendered, never executed. The online
+    operations read their row estimates through ``connection``, which is
+    made read-only first.
+
+    """
+    make_read_only(connection)
+    migration_context = MigrationContext.configure(connection)
+    starting_rev = migration_context.get_current_revision()
+
+    context.configure(
+        dialect_name=connection.dialect.name,
+        as_sql=True,
+        starting_rev=starting_rev,
+        literal_binds=True,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+        **{DRY_RUN_CONNECTION: connection}
+    )
+    try:
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        connection.rollback()
+    print("-- Dry run: nothing was changed.")
+
+
 if context.is_offline_mode():
     run_migrations_offline()
 else:
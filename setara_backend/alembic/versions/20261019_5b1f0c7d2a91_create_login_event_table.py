@@ -0,0 +1,103 @@
+"""create login event table
+
+Revision ID: 5b1f0c7d2a91
+Revises: e3cf8bcbb80d
+Create Date: 2026-10-19 09:12:44.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f0c7d2a91'
+down_revision = 'e3cf8bcbb80d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'tblLoginEvent',
+        sa.Column(
+            'login_event_id',
+            sa.BigInteger().with_variant(sa.Integer(), 'sqlite'),
+            autoincrement=True,
+            nullable=False
+        ),
+        sa.Column(
+            'login_event_method',
+            sa.Text(),
+            nullable=False
+        ),
+        sa.Column(
+            'login_event_identifier',
+            sa.Text(),
+            nullable=False
+        ),
+        sa.Column(
+            'login_event_outcome',
+            sa.Enum(
+                'success',
+                'locked',
+                'not_found',
+                'inactive',
+                'wrong_password',
+                'other_device',
+                name='loginoutcomeenum'
+            ),
+            nullable=False
+        ),
+        sa.Column(
+            'login_event_ip',
+            sa.Text(),
+            nullable=True
+        ),
+        sa.Column(
+            'login_event_device',
+            sa.Text(),
+            nullable=True
+        ),
+        sa.Column(
+            'login_event_city',
+            sa.Text(),
+            nullable=True
+        ),
+        sa.Column(
+            'login_event_loc',
+            sa.Text(),
+            nullable=True
+        ),
+        sa.Column(
+            'login_event_created_at',
+            sa.DateTime(),
+            nullable=False
+        ),
+        sa.Column(
+            'login_event_user_id',
+            sa.String(length=255),
+            nullable=True
+        ),
+        sa.ForeignKeyConstraint(
+            ['login_event_user_id'],
+            ['tblUser.user_id'],
+            name=op.f('fk_tblLoginEvent_login_event_user_id_tblUser'),
+            ondelete='SET NULL'
+        ),
+        sa.PrimaryKeyConstraint(
+            'login_event_id',
+            name=op.f('pk_tblLoginEvent')
+        )
+    )
+
+    op.create_index(
+        'ix_tblLoginEvent_user_id_created_at',
+        'tblLoginEvent',
+        ['login_event_user_id', 'login_event_created_at'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_table('tblLoginEvent')
+    sa.Enum(name='loginoutcomeenum').drop(op.get_bind(), checkfirst=True)
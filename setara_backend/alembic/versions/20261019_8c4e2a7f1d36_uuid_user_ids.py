@@ -0,0 +1,87 @@
+"""uuid user ids
+
+Revision ID: 8c4e2a7f1d36
+Revises: 5b1f0c7d2a91
+Create Date: 2026-10-19 14:02:51.730114
+
+Stores tblUser.user_id and the columns referencing it as native UUID on
+PostgreSQL instead of VARCHAR(255). Existing uuid4 text converts as is.
+
+The column type change rewrites tblUser and tblLoginEvent under an ACCESS
+EXCLUSIVE lock; run it in a quiet period with --lock-timeout so it gives up
+rather than queue traffic behind it, and check the size with --dry-run.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from setara_backend.utils.online_migrations import report_rows
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2a7f1d36'
+down_revision = '5b1f0c7d2a91'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    ('tblUser', 'user_id'),
+    ('tblUser', 'user_created_by'),
+    ('tblUser', 'user_approved_by'),
+    ('tblLoginEvent', 'login_event_user_id'),
+)
+
+FOREIGN_KEYS = (
+    ('fk_tblUser_user_created_by_tblUser',
+     'tblUser', 'user_created_by', 'CASCADE'),
+    ('fk_tblUser_user_approved_by_tblUser',
+     'tblUser', 'user_approved_by', 'CASCADE'),
+    ('fk_tblLoginEvent_login_event_user_id_tblUser',
+     'tblLoginEvent', 'login_event_user_id', 'SET NULL'),
+)
+
+
+def _convert(type_, using: str):
+    for table, column in COLUMNS:
+        report_rows(f"convert {table}.{column}", table)
+
+    for name, table, _, _ in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=type_,
+            postgresql_using=using.format(column=f'"{column}"')
+        )
+
+    for name, table, column, ondelete in FOREIGN_KEYS:
+        op.create_foreign_key(
+            name, table, 'tblUser', [column], ['user_id'], ondelete=ondelete
+        )
+
+
+def upgrade():
+    if op.get_context().dialect.name == 'postgresql':
+        _convert(postgresql.UUID(as_uuid=False), '{column}::uuid')
+        return
+
+    # Elsewhere UUIDs are kept as 32 hex digits, without dashes
+    for table, column in COLUMNS:
+        op.execute(
+            f'UPDATE "{table}" SET {column} = replace({column}, \'-\', \'\')'
+        )
+
+
+def downgrade():
+    if op.get_context().dialect.name == 'postgresql':
+        _convert(sa.String(length=255), '{column}::text')
+        return
+
+    for table, column in COLUMNS:
+        op.execute(
+            f'UPDATE "{table}" SET {column} = lower('
+            f"substr({column}, 1, 8) || '-' || substr({column}, 9, 4) || '-' || "
+            f"substr({column}, 13, 4) || '-' || substr({column}, 17, 4) || '-' || "
+            f"substr({column}, 21)) WHERE length({column}) = 32"
+        )
@@ -0,0 +1,115 @@
+"""partial identifier indexes
+
+Revision ID: d7a91e3b5c28
+Revises: 8c4e2a7f1d36
+Create Date: 2026-10-19 16:40:07.284519
+
+Replaces the table-wide unique constraints on user_phone and
+user_username with unique indexes over users that are not deleted, and
+adds one on user_email. The indexes are built concurrently on
+PostgreSQL, before the old constraints are dropped, so uniqueness is
+enforced throughout.
+
+user_email was never unique: the upgrade stops before building anything
+while users that are not deleted share an email, and --dry-run lists them.
+"""
+from alembic import op
+import sqlalchemy as sa
+from setara_backend.utils.online_migrations import (
+    create_index_concurrently,
+    drop_index_concurrently,
+    is_dry_run,
+    live_table,
+    query_connection
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a91e3b5c28'
+down_revision = '8c4e2a7f1d36'
+branch_labels = None
+depends_on = None
+
+NOT_DELETED = "user_status <> 'deleted'"
+
+COLUMNS = ('user_phone', 'user_username', 'user_email')
+
+# Constraints of the create user table revision
+UNIQUE_CONSTRAINTS = (
+    ('uq_tblUser_user_phone', 'user_phone'),
+    ('uq_tblUser_user_username', 'user_username'),
+)
+
+
+def _check_unique_emails():
+    connection = query_connection()
+    if connection is None:
+        # Rendering SQL only, there is no data to check
+        return
+    duplicates = connection.execute(sa.text(
+        f'SELECT user_email, count(*) FROM "tblUser" WHERE {NOT_DELETED} '
+        'AND user_email IS NOT NULL GROUP BY user_email '
+        'HAVING count(*) > 1 ORDER BY user_email'
+    )).all()
+    if not duplicates:
+        return
+
+    listing = ', '.join(
+        f"{email} ({count} users)" for email, count in duplicates
+    )
+    if is_dry_run():
+        print(
+            "-- [dry run] duplicate user_email, the upgrade will stop: "
+            f"{listing}"
+        )
+        return
+    raise RuntimeError(
+        f"{len(duplicates)} email(s) are shared by users that are not "
+        f"deleted: {listing}. Change or delete those users, then upgrade "
+        "again; no index was built."
+    )
+
+
+def _drop_unique_constraints():
+    # SQLite rebuilds the table for this
+    with op.batch_alter_table(
+        'tblUser', copy_from=live_table('tblUser')
+    ) as batch_op:
+        for name, _ in UNIQUE_CONSTRAINTS:
+            batch_op.drop_constraint(name, type_='unique')
+
+
+def _create_unique_constraints():
+    with op.batch_alter_table(
+        'tblUser', copy_from=live_table('tblUser')
+    ) as batch_op:
+        for name, column in UNIQUE_CONSTRAINTS:
+            batch_op.create_unique_constraint(name, [column])
+
+
+def upgrade():
+    _check_unique_emails()
+
+    postgresql = op.get_context().dialect.name == 'postgresql'
+    if not postgresql:
+        _drop_unique_constraints()
+
+    for column in COLUMNS:
+        create_index_concurrently(
+            f"ix_tblUser_{column}_not_deleted",
+            'tblUser',
+            [column],
+            unique=True,
+            where=NOT_DELETED
+        )
+
+    if postgresql:
+        _drop_unique_constraints()
+
+
+def downgrade():
+    # Fails while a deleted user shares an identifier with another user
+    _create_unique_constraints()
+
+    for column in COLUMNS:
+        drop_index_concurrently(f"ix_tblUser_{column}_not_deleted", 'tblUser')
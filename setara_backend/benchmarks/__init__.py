@@ -0,0 +1,9 @@
+# In-process benchmarks of the HTTP endpoints, run with run_benchmarks
+from .harness import (
+    BenchmarkApp,
+    compare_to_baseline,
+    load_baseline,
+    measure,
+    save_baseline
+)
+from .scenarios import SCENARIOS
@@ -0,0 +1,191 @@
+import json
+import platform
+import statistics
+import time
+from datetime import datetime
+from unittest import mock
+import bcrypt
+import fakeredis
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from webtest import TestApp
+from setara_backend import main
+from setara_backend.models import TblUser, UserStatusEnum
+from setara_backend.models.meta import Base
+from setara_backend.utils.metrics import percentile
+
+BENCHMARK_PASSWORD = 'Bench12345!'
+
+
+class BenchmarkApp:
+    """
+    The application built like the test suite's ``testapp`` fixture:
+    main() with SQLite (in memory by default) and fakeredis, wrapped in
+    WebTest, plus ``users`` active users to log in with.
+
+    IP geolocation is answered locally, so the numbers measure this
+    application instead of ipinfo.io.
+    """
+
+    def __init__(
+        self,
+        bcrypt_rounds: int = 4,
+        settings: dict = None,
+        database_url: str = 'sqlite:///:memory:',
+        users: int = 1
+    ):
+        self.engine = create_engine(
+            database_url,
+            # Served from waitress threads by the load test
+            connect_args={'check_same_thread': False, 'timeout': 30}
+        )
+        Base.metadata.create_all(self.engine)
+        self.redis = fakeredis.FakeStrictRedis()
+
+        app_settings = {
+            'testing': True,
+            'pyramid.includes': 'pyramid_openapi3',
+            'auth.secret': 'benchmark-secret',
+            'auth.algorithm': 'HS256',
+            'auth.expiration_seconds': '60',
+            'auth.bcrypt_rounds': str(bcrypt_rounds),
+            'db.engine': self.engine,
+            'redis.instance': self.redis,
+        }
+        app_settings.update(settings or {})
+        self.wsgi_app = main({}, **app_settings)
+        self.app = TestApp(self.wsgi_app)
+
+        # Every user shares the password, hashing it once keeps setup fast
+        password_hash = bcrypt.hashpw(
+            BENCHMARK_PASSWORD.encode('utf-8'),
+            bcrypt.gensalt(rounds=bcrypt_rounds)
+        ).decode('utf-8')
+        with sessionmaker(bind=self.engine)() as session, session.begin():
+            seeded = [
+                TblUser(
+                    user_phone=self.phone(index),
+                    user_username=f'benchmark{index}',
+                    user_email=f'benchmark{index}@example.com',
+                    user_name=f'Benchmark User {index}',
+                    user_password=password_hash,
+                    user_is_verified=True,
+                    user_is_login=False,
+                    user_role='admin_super',
+                    user_approved_at=datetime.now(),
+                    user_status=UserStatusEnum.active
+                )
+                for index in range(users)
+            ]
+            session.add_all(seeded)
+            session.flush()
+            self.user_ids = [user.user_id for user in seeded]
+        self.user_id = self.user_ids[0]
+
+        self._geolocation = mock.patch(
+            'setara_backend.handlers.auth.get_location_from_ip',
+            side_effect=lambda ip_address: {'city': None, 'loc': None}
+        )
+        self._geolocation.start()
+
+    def close(self) -> None:
+        self._geolocation.stop()
+        self.engine.dispose()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def phone(index: int) -> str:
+        """Phone number the index-th benchmark user logs in with."""
+        return f"+628{index + 1:010d}"
+
+    @staticmethod
+    def client_environ(iteration: int) -> dict:
+        """
+        A distinct client address per request, so the per-IP rate limiter
+        does not turn a tight benchmark loop into 429 responses.
+        """
+        return {
+            'REMOTE_ADDR': '10.{}.{}.{}'.format(
+                (iteration >> 16) & 255,
+                (iteration >> 8) & 255,
+                iteration & 255
+            )
+        }
+
+
+def measure(scenario, bench: BenchmarkApp, iterations: int, warmup: int = 10) -> dict:
+    """
+    Runs a scenario ``warmup`` + ``iterations`` times and returns its
+    throughput and latency percentiles. Only ``scenario.run`` is timed, its
+    ``prepare`` step (e.g. logging in before a logout) is not.
+    """
+    timings = []
+    for iteration in range(warmup + iterations):
+        state = scenario.prepare(bench, iteration)
+        started = time.perf_counter()
+        scenario.run(bench, iteration, state)
+        elapsed = time.perf_counter() - started
+        if iteration >= warmup:
+            timings.append(elapsed)
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        'iterations': len(timings),
+        'ops_per_second': len(timings) / total if total else 0.0,
+        'mean_ms': statistics.fmean(timings) * 1000 if timings else 0.0,
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'max_ms': timings[-1] * 1000 if timings else 0.0,
+    }
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Returns a message per benchmark that got slower than its baseline by
+    more than ``threshold`` (0.15 = 15%), in throughput or p95 latency.
+    Benchmarks missing from the baseline are not compared.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous:
+            continue
+
+        if result['ops_per_second'] < previous['ops_per_second'] * (1 - threshold):
+            regressions.append(
+                f"{name}: {result['ops_per_second']:.1f} ops/s, baseline "
+                f"{previous['ops_per_second']:.1f} ops/s"
+            )
+        if result['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.2f} ms, baseline "
+                f"{previous['p95_ms']:.2f} ms"
+            )
+    return regressions
+
+
+def load_baseline(path: str) -> dict:
+    """Returns the benchmarks stored at path, {} when there is no baseline."""
+    try:
+        with open(path) as f:
+            return json.load(f)['benchmarks']
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path: str, results: dict) -> None:
+    with open(path, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'benchmarks': results,
+        }, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,129 @@
+import json
+import re
+import subprocess
+import sys
+
+# Modules a worker must never import while booting
+FORBIDDEN_AT_STARTUP = ('fakeredis', 'webtest', 'pytest')
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+
+class ImportNode:
+    """One module in an ``-X importtime`` report, times in milliseconds."""
+
+    def __init__(self, name: str, self_ms: float, cumulative_ms: float):
+        self.name = name
+        self.self_ms = self_ms
+        self.cumulative_ms = cumulative_ms
+        self.children = []
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+def parse_importtime(output: str) -> list:
+    """
+    Parses the stderr of ``python -X importtime`` into the tree of
+    top-level imports. Python prints a module after the modules it
+    imported, two more spaces deep, which is what the pending stacks rely on.
+    """
+    pending = {}
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        node = ImportNode(name, int(self_us) / 1000, int(cumulative_us) / 1000)
+        node.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def measure_imports(code: str) -> list:
+    """Runs code in a fresh interpreter and returns its import tree."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def format_tree(roots: list, min_ms: float = 5.0, max_depth: int = 3) -> list:
+    """The tree as lines, slowest first, hiding imports under min_ms."""
+    lines = []
+
+    def add(node, depth):
+        if node.cumulative_ms < min_ms or depth > max_depth:
+            return
+        lines.append(
+            f"{node.cumulative_ms:>9.1f} ms {node.self_ms:>8.1f} ms  "
+            f"{'  ' * depth}{node.name}"
+        )
+        for child in sorted(node.children, key=lambda n: -n.cumulative_ms):
+            add(child, depth + 1)
+
+    for root in sorted(roots, key=lambda n: -n.cumulative_ms):
+        add(root, 0)
+    return lines
+
+
+def summarize_imports(roots: list) -> dict:
+    """Total and per top-level package cumulative import times."""
+    packages = {}
+    for root in roots:
+        package = root.name.split('.')[0]
+        packages[package] = packages.get(package, 0.0) + root.cumulative_ms
+    return {
+        'total_ms': sum(root.cumulative_ms for root in roots),
+        'modules': len([node for root in roots for node in root.walk()]),
+        'packages': packages,
+    }
+
+
+def forbidden_imports(roots: list, forbidden=FORBIDDEN_AT_STARTUP) -> list:
+    """Names of forbidden packages that were imported."""
+    imported = {
+        node.name.split('.')[0] for root in roots for node in root.walk()
+    }
+    return sorted(imported & set(forbidden))
+
+
+def compare_imports(summary: dict, baseline: dict, threshold: float, min_ms: float = 10.0) -> list:
+    """
+    Returns a message for the total and for every package whose import
+    time grew by more than ``threshold`` (0.25 = 25%) and ``min_ms``.
+    """
+    regressions = []
+
+    def check(name, current, previous):
+        if current > previous * (1 + threshold) and current - previous > min_ms:
+            regressions.append(
+                f"{name}: {current:.1f} ms, baseline {previous:.1f} ms"
+            )
+
+    if baseline:
+        check('total', summary['total_ms'], baseline['total_ms'])
+        for package, current in sorted(summary['packages'].items()):
+            check(package, current, baseline['packages'].get(package, 0.0))
+    return regressions
+
+
+def load_import_baseline(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_import_baseline(path: str, summary: dict) -> None:
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+        f.write('\n')
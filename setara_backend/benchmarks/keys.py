@@ -0,0 +1,114 @@
+import random
+import time
+import uuid
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    MetaData,
+    String,
+    Table,
+    Text,
+    Uuid,
+    text,
+)
+from sqlalchemy.exc import DBAPIError
+from setara_backend.models.ids import uuid7
+
+# Primary key storage and generator of each variant. text_uuid4 is how
+# tblUser.user_id used to be stored.
+KEY_VARIANTS = {
+    'text_uuid4': (lambda: String(255), lambda: str(uuid.uuid4())),
+    'uuid4': (lambda: Uuid(as_uuid=False), lambda: str(uuid.uuid4())),
+    'uuid7': (lambda: Uuid(as_uuid=False), lambda: str(uuid7())),
+}
+
+
+def key_table(variant: str) -> Table:
+    """A throwaway table keyed like tblUser, with both self references indexed."""
+    key_type = KEY_VARIANTS[variant][0]
+    name = f"bench_keys_{variant}"
+    return Table(
+        name,
+        MetaData(),
+        Column('id', key_type(), primary_key=True),
+        Column('created_by', key_type(), ForeignKey(f"{name}.id")),
+        Column('approved_by', key_type(), ForeignKey(f"{name}.id")),
+        Column('payload', Text),
+        Index(f"ix_{name}_created_by", 'created_by'),
+        Index(f"ix_{name}_approved_by", 'approved_by'),
+    )
+
+
+def index_bytes(connection, table: str):
+    """
+    Size of every index of ``table``, primary key included, or None when
+    the database cannot tell (SQLite built without dbstat).
+    """
+    if connection.dialect.name == 'postgresql':
+        return connection.execute(
+            text('SELECT pg_indexes_size(CAST(:table AS regclass))'),
+            {'table': table}
+        ).scalar()
+
+    try:
+        return connection.execute(text(
+            "SELECT coalesce(sum(pgsize), 0) FROM dbstat WHERE name IN ("
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = :table)"
+        ), {'table': table}).scalar()
+    except DBAPIError:
+        return None
+
+
+def benchmark_keys(
+    engine,
+    variant: str,
+    rows: int = 100_000,
+    batch_size: int = 1000,
+    seed: int = 0
+) -> dict:
+    """
+    Inserts ``rows`` rows keyed by ``variant`` in batches, each row pointing
+    at earlier rows like created_by/approved_by do, and reports the insert
+    throughput and index size. The table is dropped afterwards.
+    """
+    new_key = KEY_VARIANTS[variant][1]
+    table = key_table(variant)
+    rng = random.Random(seed)
+
+    batches, keys = [], []
+    for start in range(0, rows, batch_size):
+        batch = []
+        for _ in range(min(batch_size, rows - start)):
+            creator = rng.choice(keys) if keys else None
+            batch.append({
+                'id': new_key(),
+                'created_by': creator,
+                'approved_by': creator,
+                'payload': 'x' * 32,
+            })
+        keys.extend(row['id'] for row in batch)
+        batches.append(batch)
+
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+    try:
+        started = time.perf_counter()
+        for batch in batches:
+            with engine.begin() as connection:
+                connection.execute(table.insert(), batch)
+        elapsed = time.perf_counter() - started
+
+        with engine.connect() as connection:
+            size = index_bytes(connection, table.name)
+    finally:
+        table.drop(engine)
+
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+        'index_bytes': size,
+        'index_bytes_per_row': size / rows if size is not None and rows else None,
+    }
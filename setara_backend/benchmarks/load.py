@@ -0,0 +1,214 @@
+import random
+import threading
+import time
+from collections import defaultdict
+import requests
+from webtest.http import StopableWSGIServer
+from .harness import BENCHMARK_PASSWORD, percentile
+
+DEFAULT_MIX = {'login': 3, 'authenticated': 3, 'home': 3, 'rate_limited': 1}
+
+# The single client address the rate_limited traffic is sent from
+HOT_CLIENT_IP = '203.0.113.10'
+
+
+def parse_mix(value: str) -> dict:
+    """Parses 'login=3,home=1' into weights, keeping only known kinds."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"unknown traffic kind: {name}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError('the traffic mix has no weight')
+    return mix
+
+
+class LoadServer:
+    """
+    Serves a BenchmarkApp's WSGI app on waitress, on a free localhost port
+    in a background thread (WebTest's StopableWSGIServer).
+
+    Waitress trusts X-Forwarded-For from localhost, so load clients can
+    appear as many client addresses to the per-IP rate limiter.
+    """
+
+    def __init__(self, bench, threads: int = 8):
+        self.bench = bench
+        self.threads = threads
+        self.server = None
+        self.url = None
+
+    def __enter__(self):
+        self.server = StopableWSGIServer.create(
+            self.bench.wsgi_app,
+            host='127.0.0.1',
+            threads=self.threads,
+            trusted_proxy='127.0.0.1',
+            trusted_proxy_count=1,
+            trusted_proxy_headers={'x-forwarded-for'},
+            clear_untrusted_proxy_headers=True,
+        )
+        self.server.wait()
+        self.url = self.server.application_url.rstrip('/')
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.runner.join(timeout=5)
+
+
+class LoadClient(threading.Thread):
+    """
+    One simulated client, logged in as its own benchmark user.
+
+    Picks a traffic kind from the mix for every request until ``deadline``:
+    login (logging out first when it holds a token), authenticated (logout
+    with its token, logging in first when it holds none), home (GET / from
+    a fresh address) and rate_limited (GET / from HOT_CLIENT_IP).
+    """
+
+    def __init__(self, index: int, url: str, phone: str, mix: dict, deadline: float, seed: int = None):
+        super().__init__(name=f'load-client-{index}', daemon=True)
+        self.index = index
+        self.url = url
+        self.phone = phone
+        self.kinds = list(mix)
+        self.weights = list(mix.values())
+        self.deadline = deadline
+        self.random = random.Random(seed if seed is not None else index)
+        self.session = requests.Session()
+        self.token = None
+        self.requests_sent = 0
+        # (route, status or None on a connection error, seconds)
+        self.samples = []
+
+    def _client_ip(self) -> str:
+        self.requests_sent += 1
+        return '10.{}.{}.{}'.format(
+            self.index & 255,
+            (self.requests_sent >> 8) & 255,
+            self.requests_sent & 255
+        )
+
+    def _send(self, route: str, method: str, path: str, client_ip: str, **kwargs):
+        headers = kwargs.pop('headers', {})
+        headers['X-Forwarded-For'] = client_ip
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, self.url + path, headers=headers, timeout=30, **kwargs
+            )
+        except requests.RequestException:
+            self.samples.append((route, None, time.perf_counter() - started))
+            return None
+        self.samples.append(
+            (route, response.status_code, time.perf_counter() - started)
+        )
+        return response
+
+    def login(self) -> None:
+        if self.token:
+            self.logout()
+        response = self._send(
+            'POST /auth/login', 'POST', '/auth/login', self._client_ip(),
+            files={
+                'login_method': (None, 'phone'),
+                'user_identifier': (None, self.phone),
+                'user_password': (None, BENCHMARK_PASSWORD),
+                'user_notification_token': (None, f'load-{self.index}'),
+            }
+        )
+        if response is not None and response.status_code == 201:
+            self.token = response.json()['access_token']
+
+    def logout(self) -> None:
+        if not self.token:
+            self.login()
+        self._send(
+            'GET /auth/logout', 'GET', '/auth/logout', self._client_ip(),
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.token = None
+
+    def home(self) -> None:
+        self._send('GET /', 'GET', '/', self._client_ip())
+
+    def rate_limited(self) -> None:
+        self._send('GET / (rate limited)', 'GET', '/', HOT_CLIENT_IP)
+
+    def run(self) -> None:
+        actions = {
+            'login': self.login,
+            'authenticated': self.logout,
+            'home': self.home,
+            'rate_limited': self.rate_limited,
+        }
+        try:
+            while time.monotonic() < self.deadline:
+                kind = self.random.choices(self.kinds, self.weights)[0]
+                actions[kind]()
+        finally:
+            self.session.close()
+
+
+def summarize(samples, elapsed: float) -> dict:
+    """Per-route throughput, latency percentiles, error and 429 rates."""
+    by_route = defaultdict(list)
+    for route, status, seconds in samples:
+        by_route[route].append((status, seconds))
+
+    report = {}
+    for route, route_samples in sorted(by_route.items()):
+        timings = sorted(seconds for _, seconds in route_samples)
+        statuses = [status for status, _ in route_samples]
+        count = len(route_samples)
+        throttled = statuses.count(429)
+        errors = sum(
+            1 for status in statuses
+            if status is None or (status >= 400 and status != 429)
+        )
+        report[route] = {
+            'requests': count,
+            'requests_per_second': count / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(timings, 0.50) * 1000,
+            'p95_ms': percentile(timings, 0.95) * 1000,
+            'p99_ms': percentile(timings, 0.99) * 1000,
+            'error_rate': errors / count,
+            'throttled_rate': throttled / count,
+        }
+    return report
+
+
+def run_load(bench, duration: float, clients: int, mix: dict, threads: int = 8) -> dict:
+    """
+    Drives ``clients`` LoadClient threads against the app on waitress for
+    ``duration`` seconds and returns the per-route summary. The bench needs
+    at least ``clients`` users.
+    """
+    if len(bench.user_ids) < clients:
+        raise ValueError(
+            f"{clients} clients need {clients} benchmark users, "
+            f"the app has {len(bench.user_ids)}"
+        )
+
+    with LoadServer(bench, threads=threads) as server:
+        started = time.monotonic()
+        load_clients = [
+            LoadClient(
+                index, server.url, bench.phone(index), mix,
+                deadline=started + duration
+            )
+            for index in range(clients)
+        ]
+        for client in load_clients:
+            client.start()
+        for client in load_clients:
+            client.join()
+        elapsed = time.monotonic() - started
+
+    return summarize(
+        [sample for client in load_clients for sample in client.samples],
+        elapsed
+    )
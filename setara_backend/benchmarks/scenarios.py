@@ -0,0 +1,65 @@
+from .harness import BENCHMARK_PASSWORD
+
+
+def _login(bench, iteration: int, status: int = 201):
+    return bench.app.post(
+        '/auth/login',
+        params={
+            'login_method': 'phone',
+            'user_identifier': bench.phone(0),
+            'user_password': BENCHMARK_PASSWORD,
+            'user_notification_token': 'benchmark-notification-token',
+        },
+        content_type='multipart/form-data',
+        extra_environ=bench.client_environ(iteration),
+        status=status
+    )
+
+
+class HomeScenario:
+    """GET / - the cheapest request through every tween."""
+    name = 'home'
+
+    def prepare(self, bench, iteration: int):
+        return None
+
+    def run(self, bench, iteration: int, state) -> None:
+        bench.app.get(
+            '/', extra_environ=bench.client_environ(iteration), status=200
+        )
+
+
+class LoginScenario:
+    """POST /auth/login with a correct password, starting logged out."""
+    name = 'login'
+
+    def prepare(self, bench, iteration: int):
+        # The single device check rejects a login while a token exists
+        bench.redis.delete(f"auth_token:{bench.user_id}")
+        return None
+
+    def run(self, bench, iteration: int, state) -> None:
+        _login(bench, iteration)
+
+
+class LogoutScenario:
+    """GET /auth/logout of a session logged in beforehand."""
+    name = 'logout'
+
+    def prepare(self, bench, iteration: int):
+        bench.redis.delete(f"auth_token:{bench.user_id}")
+        return _login(bench, iteration).json['access_token']
+
+    def run(self, bench, iteration: int, access_token: str) -> None:
+        bench.app.get(
+            '/auth/logout',
+            headers={'Authorization': f'Bearer {access_token}'},
+            extra_environ=bench.client_environ(iteration),
+            status=200
+        )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (HomeScenario(), LoginScenario(), LogoutScenario())
+}
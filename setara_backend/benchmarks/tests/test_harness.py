@@ -0,0 +1,102 @@
+import pytest
+from setara_backend.benchmarks import (
+    SCENARIOS,
+    BenchmarkApp,
+    compare_to_baseline,
+    load_baseline,
+    measure,
+    save_baseline
+)
+from setara_backend.benchmarks.harness import percentile
+
+
+def result(ops_per_second, p95_ms):
+    return {'ops_per_second': ops_per_second, 'p95_ms': p95_ms}
+
+
+@pytest.fixture(scope='module')
+def bench():
+    with BenchmarkApp() as bench:
+        yield bench
+
+
+class TestPercentile:
+    def test_nearest_rank(self):
+        """Tests the nearest-rank percentile of a sorted list."""
+        # Setup
+        values = list(range(1, 101))
+
+        # Action & Assert
+        assert percentile(values, 0.50) == 50
+        assert percentile(values, 0.95) == 95
+        assert percentile(values, 1.0) == 100
+        assert percentile([], 0.5) == 0.0
+
+
+class TestCompareToBaseline:
+    def test_within_threshold_passes(self):
+        """Tests that a small slowdown is not reported."""
+        # Setup
+        baseline = {'login': result(100, 10)}
+
+        # Action
+        regressions = compare_to_baseline(
+            {'login': result(90, 11)}, baseline, threshold=0.15
+        )
+
+        # Assert
+        assert regressions == []
+
+    def test_throughput_and_latency_regressions_are_reported(self):
+        """Tests that both a throughput drop and a p95 rise are reported."""
+        # Setup
+        baseline = {'login': result(100, 10), 'home': result(1000, 1)}
+
+        # Action
+        regressions = compare_to_baseline(
+            {'login': result(80, 10), 'home': result(1000, 2)},
+            baseline, threshold=0.15
+        )
+
+        # Assert
+        assert len(regressions) == 2
+        assert regressions[0].startswith('home: p95')
+        assert regressions[1].startswith('login: 80.0 ops/s')
+
+    def test_new_benchmarks_are_not_compared(self):
+        """Tests that benchmarks missing from the baseline pass."""
+        # Action
+        regressions = compare_to_baseline(
+            {'logout': result(1, 1000)}, {}, threshold=0.15
+        )
+
+        # Assert
+        assert regressions == []
+
+
+class TestBaselineFile:
+    def test_round_trip(self, tmp_path):
+        """Tests that saved results load back as the baseline."""
+        # Setup
+        path = str(tmp_path / 'benchmarks.json')
+        results = {'home': result(1000, 1)}
+
+        # Action
+        save_baseline(path, results)
+
+        # Assert
+        assert load_baseline(path) == results
+        assert load_baseline(str(tmp_path / 'missing.json')) == {}
+
+
+class TestScenarios:
+    @pytest.mark.parametrize('name', sorted(SCENARIOS))
+    def test_scenario_runs(self, bench, name):
+        """Tests that every scenario completes against the real app."""
+        # Action
+        stats = measure(SCENARIOS[name], bench, iterations=5, warmup=1)
+
+        # Assert
+        assert stats['iterations'] == 5
+        assert stats['ops_per_second'] > 0
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['max_ms']
@@ -0,0 +1,79 @@
+from setara_backend.benchmarks.importtime import (
+    compare_imports,
+    forbidden_imports,
+    format_tree,
+    parse_importtime,
+    summarize_imports
+)
+
+REPORT = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     redis.utils
+import time:      2000 |       2100 |   redis.client
+import time:       500 |       2600 | redis
+import time:      9000 |       9000 | fakeredis
+import time:       300 |        300 | json
+"""
+
+
+class TestParseImporttime:
+    def test_tree(self):
+        """Tests that nested imports become children of their importer."""
+        # Action
+        roots = parse_importtime(REPORT)
+
+        # Assert
+        assert [root.name for root in roots] == ['redis', 'fakeredis', 'json']
+        assert roots[0].cumulative_ms == 2.6
+        assert roots[0].children[0].name == 'redis.client'
+        assert roots[0].children[0].children[0].name == 'redis.utils'
+
+    def test_format_hides_cheap_imports(self):
+        """Tests that the tree is sorted and filtered by cumulative time."""
+        # Action
+        lines = format_tree(parse_importtime(REPORT), min_ms=2)
+
+        # Assert
+        assert [line.split()[-1] for line in lines] == [
+            'fakeredis', 'redis', 'redis.client'
+        ]
+
+
+class TestImportChecks:
+    def test_summary_and_forbidden(self):
+        """Tests the package totals and the forbidden import check."""
+        # Setup
+        roots = parse_importtime(REPORT)
+
+        # Action
+        summary = summarize_imports(roots)
+
+        # Assert
+        assert summary['total_ms'] == 11.9
+        assert summary['modules'] == 5
+        assert summary['packages'] == {
+            'redis': 2.6, 'fakeredis': 9.0, 'json': 0.3
+        }
+        assert forbidden_imports(roots) == ['fakeredis']
+
+    def test_regressions(self):
+        """Tests that only large, relative and absolute, growth is reported."""
+        # Setup
+        baseline = {
+            'total_ms': 100.0,
+            'packages': {'redis': 50.0, 'json': 1.0},
+        }
+        summary = {
+            'total_ms': 160.0,
+            'packages': {'redis': 55.0, 'json': 5.0, 'requests': 40.0},
+        }
+
+        # Action
+        regressions = compare_imports(summary, baseline, threshold=0.25)
+
+        # Assert
+        assert regressions == [
+            'total: 160.0 ms, baseline 100.0 ms',
+            'requests: 40.0 ms, baseline 0.0 ms',
+        ]
+        assert compare_imports(summary, {}, threshold=0.25) == []
@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+from setara_backend.benchmarks.keys import KEY_VARIANTS, benchmark_keys
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'keys.db'}")
+    yield engine
+    engine.dispose()
+
+
+class TestBenchmarkKeys:
+    @pytest.mark.parametrize('variant', list(KEY_VARIANTS))
+    def test_reports_throughput_and_index_size(self, engine, variant):
+        """Tests that every key type is inserted, measured and cleaned up."""
+        # Action
+        result = benchmark_keys(engine, variant, rows=250, batch_size=100)
+
+        # Assert
+        assert result['rows'] == 250
+        assert result['rows_per_second'] > 0
+        assert result['index_bytes'] > 0
+        assert inspect(engine).get_table_names() == []
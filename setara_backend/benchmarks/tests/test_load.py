@@ -0,0 +1,68 @@
+import pytest
+from setara_backend.benchmarks import BenchmarkApp
+from setara_backend.benchmarks.load import (
+    DEFAULT_MIX,
+    parse_mix,
+    run_load,
+    summarize
+)
+
+
+class TestParseMix:
+    def test_weights(self):
+        """Tests that a mix parses into weights per traffic kind."""
+        # Action & Assert
+        assert parse_mix('login=2, home=0.5,rate_limited') == {
+            'login': 2.0, 'home': 0.5, 'rate_limited': 1.0
+        }
+
+    def test_unknown_kind(self):
+        """Tests that an unknown traffic kind is rejected."""
+        # Action & Assert
+        with pytest.raises(ValueError):
+            parse_mix('login=1,signup=1')
+
+
+class TestSummarize:
+    def test_error_and_throttled_rates(self):
+        """Tests that 429s are counted apart from errors."""
+        # Setup
+        samples = [
+            ('GET /', 200, 0.001),
+            ('GET /', 429, 0.001),
+            ('GET /', 500, 0.002),
+            ('GET /', None, 0.004),
+        ]
+
+        # Action
+        report = summarize(samples, elapsed=2.0)
+
+        # Assert
+        assert report['GET /']['requests'] == 4
+        assert report['GET /']['requests_per_second'] == 2.0
+        assert report['GET /']['throttled_rate'] == 0.25
+        assert report['GET /']['error_rate'] == 0.5
+
+
+class TestRunLoad:
+    def test_mixed_traffic_on_waitress(self, tmp_path):
+        """Tests a short run of the default mix against waitress."""
+        # Setup
+        database_url = f"sqlite:///{tmp_path / 'load.db'}"
+
+        # Action
+        with BenchmarkApp(database_url=database_url, users=3) as bench:
+            report = run_load(bench, duration=1, clients=3, mix=DEFAULT_MIX)
+
+        # Assert
+        assert {'POST /auth/login', 'GET /auth/logout', 'GET /'} <= set(report)
+        for route in ('POST /auth/login', 'GET /auth/logout', 'GET /'):
+            assert report[route]['error_rate'] == 0
+
+    def test_too_few_users(self):
+        """Tests that each client needs its own user."""
+        # Setup
+        with BenchmarkApp(users=1) as bench:
+            # Action & Assert
+            with pytest.raises(ValueError):
+                run_load(bench, duration=1, clients=2, mix=DEFAULT_MIX)
@@ -1,29 +1,53 @@
+import contextlib
 import pytest
 import fakeredis
-from sqlalchemy import create_engine
+import redis
+from unittest import mock
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
 from webtest import TestApp
 from setara_backend import main
 from setara_backend.models.meta import Base
 from sqlalchemy.orm import sessionmaker
-import transaction
 
 
 @pytest.fixture(scope='session')
 def test_redis_instance():
     """
     Creates and returns a single, session-scoped fakeredis instance.
-    This ensures that all tests in the session use the same redis server instance,
-    which is efficient.
+
+    Its FakeServer belongs to this process, so each pytest-xdist worker
+    gets its own Redis keyspace.
     """
-    fake_redis_server = fakeredis.FakeStrictRedis()
+    fake_redis_server = fakeredis.FakeStrictRedis(
+        server=fakeredis.FakeServer()
+    )
     return fake_redis_server
 
 
 @pytest.fixture(scope='session')
 def test_db_engine():
-    """Create a new in-memory SQLite database engine for the test session."""
-    # Using a fast, in-memory SQLite database for tests
-    engine = create_engine('sqlite:///:memory:')
+    """
+    Creates the in-memory SQLite database of this process, shared by every
+    test of the session through a single connection. Each pytest-xdist
+    worker is a process of its own, with its own database.
+    """
+    engine = create_engine(
+        'sqlite://',
+        poolclass=StaticPool,
+        connect_args={'check_same_thread': False}
+    )
+
+    # pysqlite's own transaction handling breaks SAVEPOINTs, let SQLAlchemy
+    # emit BEGIN instead
+    @event.listens_for(engine, 'connect')
+    def disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def emit_begin(connection):
+        connection.exec_driver_sql('BEGIN')
+
     # Create all tables defined in models
     Base.metadata.create_all(engine)
     return engine
@@ -31,12 +55,15 @@ def test_db_engine():
 
 @pytest.fixture(scope='session')
 def TestSessionFactory(test_db_engine):
-    """Returns a session factory bound to the test database engine."""
+    """
+    Returns the session factory of the tests and of the app, bound to each
+    test's transaction by the db_connection fixture.
+    """
     return sessionmaker(bind=test_db_engine)
 
 
 @pytest.fixture(scope='session')
-def testapp(test_redis_instance, test_db_engine):
+def testapp(test_redis_instance, test_db_engine, TestSessionFactory):
     """
     This fixture calls your main() function to create a testable
     instance of your Pyramid application.
@@ -47,7 +74,10 @@ def testapp(test_redis_instance, test_db_engine):
         'auth.secret': 'secret',
         'auth.algorithm': 'HS256',
         'auth.expiration_seconds': '60',
+        'auth.bcrypt_rounds': '4',
+        'internal.token': 'internal-secret',
         'db.engine': test_db_engine,
+        'db.session_factory': TestSessionFactory,
         'redis.instance': test_redis_instance,
     }
 
@@ -59,30 +89,49 @@ def testapp(test_redis_instance, test_db_engine):
 
 # DB session
 
-@pytest.fixture
-def dbsession(TestSessionFactory, test_db_engine):
+@pytest.fixture(autouse=True)
+def db_connection(test_db_engine, TestSessionFactory):
     """
-    Provides a database session for a test and guarantees a clean slate
-    by DELETING all data from all tables after the test completes.
+    Runs every test inside one transaction that is rolled back afterwards,
+    so no test sees another's data and there are no tables to clean.
 
-    This method provides absolute test isolation.
+    Sessions join it through SAVEPOINTs: their commits and rollbacks,
+    including those of pyramid_tm in the app, stay inside the test.
     """
-    session = TestSessionFactory()
+    connection = test_db_engine.connect()
+    transaction = connection.begin()
+    TestSessionFactory.configure(
+        bind=connection, join_transaction_mode='create_savepoint'
+    )
 
-    # Yield the session to the test
-    yield session
+    yield connection
 
-    # --- Teardown Phase (after the test is done) ---
-    with test_db_engine.connect() as connection:
-        # We need a transaction to wrap our deletions
-        trans = connection.begin()
+    TestSessionFactory.configure(
+        bind=test_db_engine, join_transaction_mode='conservative_savepoint'
+    )
+    # Tests may end it themselves to look past it
+    if transaction.is_active:
+        transaction.rollback()
+    connection.close()
 
-        # Go through all tables in reverse dependency order and delete from them
-        for table in reversed(Base.metadata.sorted_tables):
-            connection.execute(table.delete())
 
-        # Commit the deletions
-        trans.commit()
+@pytest.fixture
+def dbsession(TestSessionFactory):
+    """Provides a database session joined to the test's transaction."""
+    session = TestSessionFactory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def session_factory(db_connection):
+    """
+    A fresh session factory joined to the test's transaction, for code
+    under test that opens its own sessions or listens on the factory.
+    """
+    return sessionmaker(
+        bind=db_connection, join_transaction_mode='create_savepoint'
+    )
 
 
 # Redis client
@@ -100,3 +149,106 @@ def redis_client(test_redis_instance):
 
     # Teardown: After the test is finished, clear all keys in the database.
     test_redis_instance.flushdb()
+
+
+# Round-trip budgets
+
+class RoundTripCounter:
+    """
+    Counts the Redis round trips and SQL statements made while measuring.
+
+    A plain command is one Redis round trip, a pipeline is one round trip
+    however many commands it carries. Transaction control statements
+    (BEGIN, SAVEPOINT, ...) are not counted as SQL.
+    """
+
+    IGNORED_SQL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+    def __init__(self):
+        self.redis = []
+        self.sql = []
+        self.active = False
+
+    def _record_command(self, original):
+        counter = self
+
+        def execute_command(client, *args, **options):
+            if counter.active:
+                counter.redis.append(str(args[0]).upper())
+            return original(client, *args, **options)
+        return execute_command
+
+    def _record_pipeline(self, original):
+        counter = self
+
+        def execute(pipeline, *args, **kwargs):
+            if counter.active and pipeline.command_stack:
+                counter.redis.append('PIPELINE(' + ' '.join(
+                    str(command_args[0]).upper()
+                    for command_args, _ in pipeline.command_stack
+                ) + ')')
+            return original(pipeline, *args, **kwargs)
+        return execute
+
+    def _record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active and not statement.lstrip().upper().startswith(
+            self.IGNORED_SQL
+        ):
+            self.sql.append(statement)
+
+    @contextlib.contextmanager
+    def install(self, engine):
+        with mock.patch.object(
+            redis.Redis, 'execute_command',
+            self._record_command(redis.Redis.execute_command)
+        ), mock.patch.object(
+            redis.client.Pipeline, 'execute',
+            self._record_pipeline(redis.client.Pipeline.execute)
+        ):
+            event.listen(
+                engine, 'before_cursor_execute', self._record_statement
+            )
+            try:
+                yield self
+            finally:
+                event.remove(
+                    engine, 'before_cursor_execute', self._record_statement
+                )
+
+    @contextlib.contextmanager
+    def budget(self, sql: int, redis: int):
+        """
+        Fails the test when the block makes more than ``sql`` statements or
+        ``redis`` round trips, listing what was made.
+        """
+        self.redis, self.sql = [], []
+        self.active = True
+        try:
+            yield self
+        finally:
+            self.active = False
+
+        problems = []
+        if len(self.sql) > sql:
+            problems.append(
+                f"{len(self.sql)} SQL statements, budget {sql}:\n  " +
+                '\n  '.join(
+                    ' '.join(statement.split()) for statement in self.sql
+                )
+            )
+        if len(self.redis) > redis:
+            problems.append(
+                f"{len(self.redis)} Redis round trips, budget {redis}:\n  " +
+                '\n  '.join(self.redis)
+            )
+        assert not problems, '\n'.join(problems)
+
+
+@pytest.fixture
+def round_trips(test_db_engine):
+    """
+    Counts Redis round trips and SQL statements per request, use as
+    ``with round_trips.budget(sql=1, redis=2): testapp.get(...)``.
+    """
+    with RoundTripCounter().install(test_db_engine) as counter:
+        yield counter
@@ -1,16 +1,23 @@
-from sqlalchemy.orm import Session
-from setara_backend.repositories import (
-    RedisRepository,
-    UserRepository
+from functools import cached_property
+from setara_backend.models import LoginOutcomeEnum, UserStatusEnum
+from setara_backend.repositories.notification_token import (
+    device_id_from_user_agent
 )
-from setara_backend.models import UserStatusEnum
 from setara_backend.utils import get_location_from_ip
-from pyramid.httpexceptions import HTTPNotFound, HTTPUnauthorized
+from pyramid.httpexceptions import (
+    HTTPNotFound,
+    HTTPUnauthorized,
+    HTTPTooManyRequests
+)
 
 
 class AuthHandler:
-    def __init__(self, session: Session):
-        self.user_repository = UserRepository(session)
+    def __init__(self, container):
+        self.container = container
+
+    @cached_property
+    def user_repository(self):
+        return self.container.user_repository
 
     def login_handler(
         self,
@@ -18,7 +25,37 @@ class AuthHandler:
     ) -> dict:
         payload = request.validated
         auth_service = request.auth_service
-        redis_repository = RedisRepository(request.redis_conn)
+        redis_repository = self.container.redis_repository
+        login_lockout = request.login_lockout
+        # Expensive steps are computed once across pyramid_retry attempts
+        memo = request.attempt_memo
+
+        # Failed-login lockout check, done before any DB or bcrypt work
+        lock_seconds = login_lockout.get_lock_seconds(
+            request.redis_conn,
+            payload['login_method'],
+            payload['user_identifier']
+        )
+        if lock_seconds:
+            self.record_login_event(request, LoginOutcomeEnum.locked)
+            raise HTTPTooManyRequests(
+                headers={'Retry-After': str(lock_seconds)},
+                json_body={
+                    "error": True,
+                    "message": "terlalu banyak percobaan login, "
+                    f"coba lagi dalam {lock_seconds} detik"
+                }
+            )
+
+        # Identifiers missing from the Bloom filter do not exist, no DB query
+        identifier_filter = request.identifier_filter
+        if identifier_filter and not identifier_filter.might_exist(
+            request.redis_conn,
+            payload['login_method'],
+            payload['user_identifier']
+        ):
+            self.record_login_event(request, LoginOutcomeEnum.not_found)
+            raise HTTPNotFound('akun pengguna tidak ditemukan')
 
         # User availability check
         user = self.user_repository.get_user_by_identifier(
@@ -30,40 +67,72 @@ class AuthHandler:
             ]
         )
         if not user:
+            self.record_login_event(request, LoginOutcomeEnum.not_found)
             raise HTTPNotFound('akun pengguna tidak ditemukan')
         if user.user_status == UserStatusEnum.inactive:
+            self.record_login_event(request, LoginOutcomeEnum.inactive, user)
             raise HTTPUnauthorized(
                 'akun anda belum aktif, mohon hubungi kepala gudang')
 
         # Password check
-        password_check = auth_service.check_password(
+        password_check = memo.call(
+            'check_password',
+            auth_service.check_password,
             payload['user_password'], user.user_password
         )
         if not password_check:
+            login_lockout.register_failure(
+                request.redis_conn,
+                payload['login_method'],
+                payload['user_identifier']
+            )
+            self.record_login_event(
+                request, LoginOutcomeEnum.wrong_password, user
+            )
             raise HTTPUnauthorized('password anda tidak sesuai')
+        login_lockout.reset(
+            request.redis_conn,
+            payload['login_method'],
+            payload['user_identifier']
+        )
 
         # Single device check
         token = redis_repository.get(f"auth_token:{user.user_id}")
 
-        if token:
+        # A token stored by an earlier attempt of this request is our own
+        if token and token != memo.peek('access_token', user.user_id):
+            self.record_login_event(
+                request, LoginOutcomeEnum.other_device, user
+            )
             raise HTTPUnauthorized(
                 'mohon logout terlebih dahulu akun anda di device lain'
             )
 
         # Login process
-        environ = get_location_from_ip(
+        environ = memo.call(
+            'geolocation',
+            get_location_from_ip,
             request.environ.get('HTTP_X_REAL_IP')
         )
+        device_id = payload.get('user_device_id') or \
+            device_id_from_user_agent(request.environ.get('HTTP_USER_AGENT'))
         environ.update(
             {
-                "device": request.environ.get('HTTP_USER_AGENT')
+                "device": request.environ.get('HTTP_USER_AGENT'),
+                # Lets logout remove this device's notification token
+                "device_id": device_id
             }
         )
-        access_token = auth_service.generate_access_token(user, environ)
+        access_token = memo.call(
+            'access_token',
+            auth_service.generate_access_token, user, environ,
+            key=(user.user_id,)
+        )
 
-        redis_repository.set(
-            key=f"notification_token:{user.user_id}",
-            value=payload['user_notification_token'],
+        self.container.notification_token_repository.set_token(
+            user.user_id,
+            device_id,
+            payload['user_notification_token'],
             expire_seconds=request.registry.settings.get(
                 'auth.expiration_seconds'
             )
@@ -77,11 +146,25 @@ class AuthHandler:
             )
         )
 
-        self.user_repository.update_user(
-            user=user,
-            new_data={
-                'user_is_login': True
-            }
+        login_data = {
+            'user_is_login': True
+        }
+        # Re-hash with the configured work factor while the plain-text
+        # password is at hand, so stored hashes follow the tuned cost
+        if auth_service.needs_rehash(user.user_password):
+            login_data['user_password'] = auth_service.hash_password(
+                payload['user_password']
+            )
+
+        # In write-behind mode the login state is flushed in batches
+        login_state = request.login_state
+        if login_state:
+            login_state.record(user.user_id, login_data.pop('user_is_login'))
+        if login_data:
+            self.user_repository.update_user_fields(user.user_id, login_data)
+
+        self.record_login_event(
+            request, LoginOutcomeEnum.success, user, environ
         )
 
         return {
@@ -92,27 +175,62 @@ class AuthHandler:
             "access_token": access_token
         }
 
+    def record_login_event(
+        self,
+        request,
+        outcome: LoginOutcomeEnum,
+        user=None,
+        location: dict = None
+    ) -> None:
+        """
+        Buffers a row for the login event log, once per logical request
+        even when pyramid_retry replays it.
+        """
+        login_events = request.login_events
+        if not login_events:
+            return
+
+        payload = request.validated
+        location = location or {}
+        request.attempt_memo.call(
+            'login_event',
+            login_events.enqueue,
+            key=(outcome.name,),
+            login_event_method=payload['login_method'],
+            login_event_identifier=payload['user_identifier'],
+            login_event_outcome=outcome,
+            login_event_ip=(
+                request.environ.get('HTTP_X_REAL_IP')
+                or request.environ.get('REMOTE_ADDR')
+            ),
+            login_event_device=request.environ.get('HTTP_USER_AGENT'),
+            login_event_city=location.get('city'),
+            login_event_loc=location.get('loc'),
+            login_event_user_id=user.user_id if user else None,
+        )
+
     def logout_handler(
         self,
         request
     ) -> dict:
         user_id = request.user.get('user_id')
-        user = self.user_repository.get_user_by_identifier(
-            identifier_type='id',
-            user_identifier=user_id
-        )
-        redis_repository = RedisRepository(request.redis_conn)
+        redis_repository = self.container.redis_repository
 
         redis_repository.delete(f"auth_token:{user_id}")
-        redis_repository.delete(f"notification_token:{user_id}")
-
-        self.user_repository.update_user(
-            user=user,
-            new_data={
-                'user_is_login': False
-            }
+        # Tokens issued before per-device storage carry no device_id
+        self.container.notification_token_repository.remove_token(
+            user_id, request.user.get('device_id')
         )
 
+        # One UPDATE statement, the row is never loaded
+        login_state = request.login_state
+        if login_state:
+            login_state.record(user_id, False)
+        else:
+            self.user_repository.update_user_fields(
+                user_id, {'user_is_login': False}
+            )
+
         return {
             "error": False,
             "message": "Logout berhasil"
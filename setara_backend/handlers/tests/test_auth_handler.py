@@ -1,26 +1,35 @@
 import pytest
 from unittest.mock import MagicMock
 from setara_backend.handlers.auth import AuthHandler
+from setara_backend.repositories.notification_token import (
+    device_id_from_user_agent
+)
+from setara_backend.utils import AttemptMemo
 from setara_backend.models import (
+    LoginOutcomeEnum,
     TblUser,
     UserStatusEnum
 )
-from pyramid.httpexceptions import HTTPNotFound, HTTPUnauthorized
+from pyramid.httpexceptions import (
+    HTTPNotFound,
+    HTTPUnauthorized,
+    HTTPTooManyRequests
+)
 
 
 @pytest.fixture
-def mock_session():
-    """Provides a mock database session."""
+def mock_container():
+    """Provides a mock request container."""
     return MagicMock()
 
 
 @pytest.fixture
-def auth_handler(mock_session):
+def auth_handler(mock_container):
     """
     A fixture that creates an instance AuthHandler,
-    injecting the clean db session.
+    injecting the mock request container.
     """
-    return AuthHandler(mock_session)
+    return AuthHandler(mock_container)
 
 
 @pytest.fixture
@@ -34,12 +43,17 @@ def mock_request():
         'user_notification_token': 'fcm-token-123'
     }
     request.auth_service = MagicMock()
+    request.auth_service.needs_rehash.return_value = False
     request.redis_conn = MagicMock()
+    request.login_lockout = MagicMock()
+    request.login_lockout.get_lock_seconds.return_value = 0
+    request.login_state = None
     request.environ = {
         'HTTP_X_REAL_IP': '8.8.8.8',
         'HTTP_USER_AGENT': 'Test Agent/1.0'
     }
     request.registry.settings = {'auth.expiration_seconds': 3600}
+    request.attempt_memo = AttemptMemo(request.environ)
     return request
 
 
@@ -62,8 +76,7 @@ class TestLoginHandler:
         # Setup
         auth_handler.user_repository = MagicMock()
         auth_handler.user_repository.get_user_by_identifier.return_value = mock_active_user
-        mock_redis_repo = mocker.patch(
-            'setara_backend.handlers.auth.RedisRepository')
+        mock_redis_repo = auth_handler.container.redis_repository
         mocker.patch(
             'setara_backend.handlers.auth.get_location_from_ip',
             return_value={'city': 'Mountain View', 'loc': '37,-122'}
@@ -71,7 +84,7 @@ class TestLoginHandler:
 
         # Configure return values for our mocks
         mock_request.auth_service.check_password.return_value = True
-        mock_redis_repo.return_value.get.return_value = None
+        mock_redis_repo.get.return_value = None
         mock_request.auth_service.generate_access_token.return_value = 'a-new-jwt-token'
 
         # Action
@@ -86,17 +99,109 @@ class TestLoginHandler:
 
         auth_handler.user_repository.get_user_by_identifier.assert_called_once()
         mock_request.auth_service.check_password.assert_called_once()
-        mock_redis_repo.return_value.get.assert_called_with(
+        mock_redis_repo.get.assert_called_with(
             f"auth_token:{mock_active_user.user_id}")
-        assert mock_redis_repo.return_value.set.call_count == 2
-        mock_redis_repo.return_value.set.assert_any_call(
-            key=f"notification_token:{mock_active_user.user_id}",
-            value='fcm-token-123',
+        assert mock_redis_repo.set.call_count == 1
+        auth_handler.container.notification_token_repository.set_token.assert_called_once_with(
+            mock_active_user.user_id,
+            device_id_from_user_agent('Test Agent/1.0'),
+            'fcm-token-123',
             expire_seconds=3600
         )
-        auth_handler.user_repository.update_user.assert_called_with(
-            user=mock_active_user,
-            new_data={'user_is_login': True}
+        auth_handler.user_repository.update_user_fields.assert_called_once_with(
+            mock_active_user.user_id, {'user_is_login': True}
+        )
+        mock_request.login_events.enqueue.assert_called_once_with(
+            login_event_method='email',
+            login_event_identifier='test@example.com',
+            login_event_outcome=LoginOutcomeEnum.success,
+            login_event_ip='8.8.8.8',
+            login_event_device='Test Agent/1.0',
+            login_event_city='Mountain View',
+            login_event_loc='37,-122',
+            login_event_user_id=mock_active_user.user_id
+        )
+
+    def test_retried_login_reuses_earlier_attempt(self, mocker, auth_handler, mock_request, mock_active_user):
+        """
+        Tests that a retry after a transient error neither repeats the
+        expensive steps nor rejects the token stored by the failed attempt.
+        """
+        # Setup
+        auth_handler.user_repository = MagicMock()
+        auth_handler.user_repository.get_user_by_identifier.return_value = mock_active_user
+        auth_handler.user_repository.update_user_fields.side_effect = [
+            Exception("deadlock detected"), None]
+        mock_redis_repo = auth_handler.container.redis_repository
+        mock_redis_repo.get.side_effect = [None, 'a-new-jwt-token']
+        mock_location = mocker.patch(
+            'setara_backend.handlers.auth.get_location_from_ip',
+            return_value={'city': None, 'loc': None}
+        )
+        mock_request.auth_service.check_password.return_value = True
+        mock_request.auth_service.generate_access_token.return_value = 'a-new-jwt-token'
+
+        # Action
+        with pytest.raises(Exception, match="deadlock"):
+            auth_handler.login_handler(mock_request)
+        result = auth_handler.login_handler(mock_request)
+
+        # Assert
+        assert result['access_token'] == 'a-new-jwt-token'
+        mock_request.auth_service.check_password.assert_called_once()
+        mock_request.auth_service.generate_access_token.assert_called_once()
+        mock_location.assert_called_once()
+
+    def test_login_write_behind(self, mocker, auth_handler, mock_request, mock_active_user):
+        """Tests that in write-behind mode the login state is recorded, not updated."""
+        # Setup
+        auth_handler.user_repository = MagicMock()
+        auth_handler.user_repository.get_user_by_identifier.return_value = mock_active_user
+        auth_handler.container.redis_repository.get.return_value = None
+        mocker.patch(
+            'setara_backend.handlers.auth.get_location_from_ip',
+            return_value={'city': None, 'loc': None}
+        )
+        mock_request.auth_service.check_password.return_value = True
+        mock_request.login_state = MagicMock()
+
+        # Action
+        auth_handler.login_handler(mock_request)
+
+        # Assert
+        mock_request.login_state.record.assert_called_once_with(
+            mock_active_user.user_id, True)
+        auth_handler.user_repository.update_user_fields.assert_not_called()
+
+    def test_login_rehashes_password_with_outdated_cost(self, mocker, auth_handler, mock_request, mock_active_user):
+        """Tests that a successful login re-hashes a password stored with another work factor."""
+        # Setup
+        auth_handler.user_repository = MagicMock()
+        auth_handler.user_repository.get_user_by_identifier.return_value = mock_active_user
+        mock_redis_repo = auth_handler.container.redis_repository
+        mocker.patch(
+            'setara_backend.handlers.auth.get_location_from_ip',
+            return_value={'city': None, 'loc': None}
+        )
+        mock_request.auth_service.check_password.return_value = True
+        mock_request.auth_service.needs_rehash.return_value = True
+        mock_request.auth_service.hash_password.return_value = 'rehashed_password'
+        mock_redis_repo.get.return_value = None
+
+        # Action
+        auth_handler.login_handler(mock_request)
+
+        # Assert
+        mock_request.auth_service.needs_rehash.assert_called_once_with(
+            'hashed_password')
+        mock_request.auth_service.hash_password.assert_called_once_with(
+            'GoodPassword1!')
+        auth_handler.user_repository.update_user_fields.assert_called_once_with(
+            mock_active_user.user_id,
+            {
+                'user_is_login': True,
+                'user_password': 'rehashed_password'
+            }
         )
 
     def test_login_user_not_found(self, mocker, auth_handler, mock_request):
@@ -104,19 +209,31 @@ class TestLoginHandler:
         # Setup
         auth_handler.user_repository = MagicMock()
         auth_handler.user_repository.get_user_by_identifier.return_value = None
-        mocker.patch('setara_backend.handlers.auth.RedisRepository')
 
         # Action & Assert
         with pytest.raises(HTTPNotFound, match='akun pengguna tidak ditemukan'):
             auth_handler.login_handler(mock_request)
 
+    def test_login_unknown_identifier_skips_database(self, mocker, auth_handler, mock_request):
+        """Tests that an identifier missing from the Bloom filter is rejected without a DB lookup."""
+        # Setup
+        auth_handler.user_repository = MagicMock()
+        mock_request.identifier_filter.might_exist.return_value = False
+
+        # Action & Assert
+        with pytest.raises(HTTPNotFound, match='akun pengguna tidak ditemukan'):
+            auth_handler.login_handler(mock_request)
+        mock_request.identifier_filter.might_exist.assert_called_once_with(
+            mock_request.redis_conn, 'email', 'test@example.com'
+        )
+        auth_handler.user_repository.get_user_by_identifier.assert_not_called()
+
     def test_login_user_inactive(self, mocker, auth_handler, mock_request, mock_active_user):
         """Tests that HTTPUnauthorized is raised for an inactive user."""
         # Setup
         auth_handler.user_repository = MagicMock()
         mock_active_user.user_status = UserStatusEnum.inactive
         auth_handler.user_repository.get_user_by_identifier.return_value = mock_active_user
-        mocker.patch('setara_backend.handlers.auth.RedisRepository')
 
         # Action & Assert
         with pytest.raises(HTTPUnauthorized, match='akun anda belum aktif'):
@@ -127,21 +244,41 @@ class TestLoginHandler:
         # Setup
         auth_handler.user_repository = MagicMock()
         auth_handler.user_repository.get_user_by_identifier.return_value = mock_active_user
-        mocker.patch('setara_backend.handlers.auth.RedisRepository')
         mock_request.auth_service.check_password.return_value = False
 
         # Action & Assert
         with pytest.raises(HTTPUnauthorized, match='password anda tidak sesuai'):
             auth_handler.login_handler(mock_request)
+        mock_request.login_lockout.register_failure.assert_called_once_with(
+            mock_request.redis_conn, 'email', 'test@example.com'
+        )
+        event = mock_request.login_events.enqueue.call_args.kwargs
+        assert event['login_event_outcome'] == LoginOutcomeEnum.wrong_password
+        assert event['login_event_user_id'] == mock_active_user.user_id
+        assert event['login_event_city'] is None
+
+    def test_login_locked_identifier(self, mocker, auth_handler, mock_request):
+        """Tests that a locked identifier is rejected before the DB lookup and password check."""
+        # Setup
+        auth_handler.user_repository = MagicMock()
+        mock_request.login_lockout.get_lock_seconds.return_value = 120
+
+        # Action & Assert
+        with pytest.raises(HTTPTooManyRequests) as excinfo:
+            auth_handler.login_handler(mock_request)
+
+        assert excinfo.value.headers['Retry-After'] == '120'
+        assert excinfo.value.json_body['error'] is True
+        auth_handler.user_repository.get_user_by_identifier.assert_not_called()
+        mock_request.auth_service.check_password.assert_not_called()
 
     def test_login_already_logged_in(self, mocker, auth_handler, mock_request, mock_active_user):
         """Tests that HTTPUnauthorized is raised if a token already exists in Redis."""
         # Setup
         auth_handler.user_repository = MagicMock()
         auth_handler.user_repository.get_user_by_identifier.return_value = mock_active_user
-        mock_redis_repo = mocker.patch(
-            'setara_backend.handlers.auth.RedisRepository')
-        mock_redis_repo.return_value.get.return_value = 'an-existing-token'
+        mock_redis_repo = auth_handler.container.redis_repository
+        mock_redis_repo.get.return_value = 'an-existing-token'
         mock_request.auth_service.check_password.return_value = True
 
         # Action & Assert
@@ -161,9 +298,7 @@ class TestLogoutHandler:
         mock_request.user = {'user_id': user_id}
         auth_handler.user_repository = MagicMock()
         auth_handler.user_repository.get_user_by_identifier.return_value = mock_active_user
-        mock_redis_repo_class = mocker.patch(
-            'setara_backend.handlers.auth.RedisRepository')
-        mock_redis_instance = mock_redis_repo_class.return_value
+        mock_redis_instance = auth_handler.container.redis_repository
 
         # Action
         result = auth_handler.logout_handler(mock_request)
@@ -174,12 +309,38 @@ class TestLogoutHandler:
             "message": "Logout berhasil"
         }
 
-        mock_redis_repo_class.assert_called_once_with(mock_request.redis_conn)
-        assert mock_redis_instance.delete.call_count == 2
-        mock_redis_instance.delete.assert_any_call(f"auth_token:{user_id}")
-        mock_redis_instance.delete.assert_any_call(
-            f"notification_token:{user_id}")
-        auth_handler.user_repository.update_user.assert_called_with(
-            user=mock_active_user,
-            new_data={'user_is_login': False}
+        mock_redis_instance.delete.assert_called_once_with(
+            f"auth_token:{user_id}")
+        auth_handler.container.notification_token_repository.remove_token.assert_called_once_with(
+            user_id, None)
+        auth_handler.user_repository.get_user_by_identifier.assert_not_called()
+        auth_handler.user_repository.update_user_fields.assert_called_once_with(
+            user_id, {'user_is_login': False}
         )
+
+    def test_logout_write_behind(self, auth_handler, mock_request):
+        """Tests that in write-behind mode logout does not touch the database."""
+        # Setup
+        mock_request.user = {'user_id': 123}
+        auth_handler.user_repository = MagicMock()
+        mock_request.login_state = MagicMock()
+
+        # Action
+        auth_handler.logout_handler(mock_request)
+
+        # Assert
+        mock_request.login_state.record.assert_called_once_with(123, False)
+        auth_handler.user_repository.update_user_fields.assert_not_called()
+
+    def test_logout_removes_only_this_device(self, auth_handler, mock_request):
+        """Tests that logout keeps the notification tokens of the user's other devices."""
+        # Setup
+        mock_request.user = {'user_id': 123, 'device_id': 'tablet-1'}
+        auth_handler.user_repository = MagicMock()
+
+        # Action
+        auth_handler.logout_handler(mock_request)
+
+        # Assert
+        auth_handler.container.notification_token_repository.remove_token.assert_called_once_with(
+            123, 'tablet-1')
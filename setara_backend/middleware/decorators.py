@@ -1,15 +1,21 @@
+import hmac
 from functools import wraps
 from pyramid.httpexceptions import HTTPUnauthorized, HTTPForbidden, HTTPBadRequest, HTTPUnsupportedMediaType
 from marshmallow import ValidationError
+from pyramid.settings import aslist
 
 
 def secure_view(type='private', roles=None):
     """
     A decorator to handle view security for authentication and authorization.
 
-    :param type: 'private' (default) or 'public'.
+    :param type: 'private' (default), 'public' or 'internal'.
                 - 'private': Requires a valid JWT.
                 - 'public': No authentication needed.
+                - 'internal': Requires the 'internal.token' setting in the
+                  X-Internal-Token header, and when 'internal.allowed_ips'
+                  is set, a client address listed there. Closed while no
+                  token is configured.
     :param roles: A list of roles that are allowed to access this view.
                 If None or empty, any authenticated user is allowed.
                 e.g., ['admin', 'manager']
@@ -26,6 +32,19 @@ def secure_view(type='private', roles=None):
             # 1. Handle public routes
             if type == 'public':
                 pass
+            elif type == 'internal':
+                settings = request.registry.settings
+                # Behind a local proxy every client appears as loopback, so
+                # the address alone never grants access
+                token = settings.get('internal.token')
+                if not token or not hmac.compare_digest(
+                    request.headers.get('X-Internal-Token', '').encode(),
+                    token.encode()
+                ):
+                    raise HTTPForbidden()
+                allowed_ips = aslist(settings.get('internal.allowed_ips', ''))
+                if allowed_ips and request.remote_addr not in allowed_ips:
+                    raise HTTPForbidden()
             else:
                 # 2. Handle private routes: Check for authentication
                 # request.identity is set by our JWTAuthenticationPolicy if the token is valid
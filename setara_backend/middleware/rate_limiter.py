@@ -1,5 +1,6 @@
-from pyramid.httpexceptions import HTTPTooManyRequests
-from ..repositories import RedisRepository
+from pyramid.httpexceptions import HTTPTooManyRequests, HTTPServiceUnavailable
+from ..services.circuit_breaker import CircuitOpenError
+from ..services.redis import REDIS_FAILURES, fails_open
 
 
 def rate_limiter_tween_factory(handler, registry):
@@ -9,6 +10,10 @@ def rate_limiter_tween_factory(handler, registry):
     requests_per_second = 10
     window_seconds = 1
 
+    # Without Redis the limiter lets traffic through unless configured not to
+    settings = getattr(registry, 'settings', None) or {}
+    redis_fail_open = fails_open(settings, 'rate_limiter', default=True)
+
     def rate_limiter_tween(request):
         """
         This tween checks if a client has exceeded the request limit.
@@ -21,13 +26,23 @@ def rate_limiter_tween_factory(handler, registry):
         ip = request.environ.get('REMOTE_ADDR') or '127.0.0.1'
         key = f"rate_limit:{ip}"
 
-        redis_repo = RedisRepository(request.redis_conn)
+        redis_repo = request.container.guarded_redis_repository
 
         # Use a pipeline for atomic operations
-        pipeline = redis_repo.redis.pipeline()
+        pipeline = redis_repo.client_for(key).pipeline()
         pipeline.incr(key)
         pipeline.expire(key, window_seconds)
-        request_count, _ = pipeline.execute()
+        try:
+            request_count, _ = redis_repo.call(pipeline.execute)
+        except REDIS_FAILURES + (CircuitOpenError,):
+            if redis_fail_open:
+                return handler(request)
+            raise HTTPServiceUnavailable(
+                json_body={
+                    "error": True,
+                    "message": "Service temporarily unavailable"
+                }
+            )
 
         if request_count > requests_per_second:
             raise HTTPTooManyRequests(
@@ -3,6 +3,8 @@ from pyramid.authentication import CallbackAuthenticationPolicy
 from pyramid.interfaces import IAuthenticationPolicy
 from zope.interface import implementer
 from setara_backend.repositories import RedisRepository
+from setara_backend.services.circuit_breaker import CircuitOpenError
+from setara_backend.services.redis import REDIS_FAILURES, fails_open
 
 
 def get_token_from_request(request):
@@ -19,10 +21,13 @@ class JWTAuthenticationPolicy(CallbackAuthenticationPolicy):
     Its only job is to identify the user and their principals (roles).
     """
 
-    def __init__(self, secret, algorithms, token_expirations):
+    def __init__(self, secret, algorithms, token_expirations, redis_fail_open=False):
         self.secret = secret
         self.algorithms = algorithms
         self.expiration = token_expirations
+        # When Redis is down: trust the token signature alone (open) or
+        # treat the request as unauthenticated (closed)
+        self.redis_fail_open = redis_fail_open
 
     def unauthenticated_userid(self, request):
         token = get_token_from_request(request)
@@ -34,25 +39,39 @@ class JWTAuthenticationPolicy(CallbackAuthenticationPolicy):
             auth_service = request.auth_service
             claims = auth_service.get_user_from_access_token(token)
             user_id = claims.get('user_id')
+        except jwt.PyJWTError:
+            request.user = None
+            return None
 
+        try:
             # Check if token is still valid in Redis (not logged out)
-            redis_repo = RedisRepository(request.redis_conn)
+            redis_repo = request.container.guarded_redis_repository
             key = f"auth_token:{user_id}"
-            stored_token = redis_repo.get(key)
-
+            stored_token = None
+            read_conn = getattr(request, 'redis_read_conn', None)
+            if read_conn is not None and read_conn is not request.redis_conn:
+                # A replica error or lag only costs the primary lookup below
+                stored_token = RedisRepository(read_conn).get(key)
             if stored_token != token:
+                # The replica may not have seen the login yet
+                stored_token = redis_repo.get(key)
+
+            # Reset token expiration time on the primary. EXPIRE, unlike SET,
+            # cannot bring back a token a lagging replica still has after
+            # logout deleted it
+            if stored_token != token or \
+                    not redis_repo.expire(key, self.expiration):
+                request.user = None
+                return None
+        except REDIS_FAILURES + (CircuitOpenError,):
+            if not self.redis_fail_open:
                 request.user = None
                 return None
 
-            # Reset token expiration time
-            redis_repo.set(key, stored_token, expire_seconds=self.expiration)
-
-            # Add decoded token to request
-            request.user = claims
+        # Add decoded token to request
+        request.user = claims
 
-            return user_id
-        except jwt.PyJWTError:
-            return None
+        return user_id
 
     def remember(self, request, userid, **kw):  # pragma: no cover
         """
@@ -76,5 +95,7 @@ def includeme(config):
     token_expirations = settings['auth.expiration_seconds']
 
     security_policy = JWTAuthenticationPolicy(
-        auth_secret, auth_algorithms, token_expirations)
+        auth_secret, auth_algorithms, token_expirations,
+        redis_fail_open=fails_open(settings, 'auth', default=False)
+    )
     config.set_security_policy(security_policy)
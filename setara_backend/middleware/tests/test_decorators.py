@@ -127,6 +127,35 @@ class TestSecurityDecorator:
             decorated_view(dummy_request)
         assert call_info["called"] is False
 
+    def test_secure_view_internal_closed_without_token_setting(self, dummy_request, mock_view):
+        # Setup
+        view_func, call_info = mock_view
+        dummy_request.remote_addr = '127.0.0.1'
+        decorated_view = secure_view(type='internal')(view_func)
+
+        # Action & Assert
+        with pytest.raises(HTTPForbidden):
+            decorated_view(dummy_request)
+        assert call_info["called"] is False
+
+    def test_secure_view_internal_checks_allowed_ips(self, pyramid_config, dummy_request, mock_view):
+        # Setup
+        view_func, call_info = mock_view
+        pyramid_config.registry.settings.update({
+            'internal.token': 'internal-secret',
+            'internal.allowed_ips': '10.0.0.5',
+        })
+        dummy_request.headers['X-Internal-Token'] = 'internal-secret'
+        dummy_request.remote_addr = '10.0.0.6'
+        decorated_view = secure_view(type='internal')(view_func)
+
+        # Action & Assert
+        with pytest.raises(HTTPForbidden):
+            decorated_view(dummy_request)
+        dummy_request.remote_addr = '10.0.0.5'
+        decorated_view(dummy_request)
+        assert call_info["called"] is True
+
 
 class SampleFormSchema(Schema):
     name = fields.Str(required=True)
@@ -1,8 +1,10 @@
 import pytest
 from pyramid.response import Response
 from pyramid import testing
+from setara_backend.services.container import RequestContainer
 from setara_backend.middleware.rate_limiter import rate_limiter_tween_factory
-from pyramid.httpexceptions import HTTPTooManyRequests
+import redis
+from pyramid.httpexceptions import HTTPTooManyRequests, HTTPServiceUnavailable
 from unittest.mock import MagicMock, patch
 
 
@@ -20,7 +22,9 @@ def mock_handler():
 @pytest.fixture
 def dummy_request():
     """A fixture for a basic Pyramid DummyRequest."""
-    return testing.DummyRequest()
+    request = testing.DummyRequest()
+    request.container = RequestContainer(request)
+    return request
 
 
 class TestRateLimiter:
@@ -59,7 +63,7 @@ class TestRateLimiter:
         mock_redis_conn.pipeline.return_value = mock_pipeline
 
         # Attach the mock redis connection to the request
-        dummy_request.redis_conn = mock_redis_conn
+        dummy_request.redis_shards = mock_redis_conn
 
         # Action
         tween(dummy_request)
@@ -88,7 +92,7 @@ class TestRateLimiter:
 
         mock_redis_conn = MagicMock()
         mock_redis_conn.pipeline.return_value = mock_pipeline
-        dummy_request.redis_conn = mock_redis_conn
+        dummy_request.redis_shards = mock_redis_conn
 
         # Action & Assert
         with pytest.raises(HTTPTooManyRequests) as excinfo:
@@ -111,7 +115,7 @@ class TestRateLimiter:
 
         mock_redis_conn = MagicMock()
         mock_redis_conn.pipeline.return_value = mock_pipeline
-        dummy_request.redis_conn = mock_redis_conn
+        dummy_request.redis_shards = mock_redis_conn
 
         # Action
         tween(dummy_request)
@@ -119,3 +123,46 @@ class TestRateLimiter:
         # Assert
         assert call_info["called"] is True
         mock_pipeline.incr.assert_called_with('rate_limit:127.0.0.1')
+
+    def test_rate_limiter_fails_open_when_redis_is_down(self, dummy_request, mock_handler):
+        """
+        Tests that the default policy lets requests through when Redis fails.
+        """
+        # Setup
+        handler_func, call_info = mock_handler
+        tween = rate_limiter_tween_factory(handler_func, None)
+        dummy_request.method = 'GET'
+
+        mock_pipeline = MagicMock()
+        mock_pipeline.execute.side_effect = redis.TimeoutError("Timeout")
+        mock_redis_conn = MagicMock()
+        mock_redis_conn.pipeline.return_value = mock_pipeline
+        dummy_request.redis_shards = mock_redis_conn
+
+        # Action
+        tween(dummy_request)
+
+        # Assert
+        assert call_info["called"] is True
+
+    def test_rate_limiter_fails_closed_when_configured(self, dummy_request, mock_handler):
+        """
+        Tests that a fail-closed policy rejects requests when Redis fails.
+        """
+        # Setup
+        handler_func, call_info = mock_handler
+        registry = MagicMock()
+        registry.settings = {'redis.breaker.rate_limiter': 'closed'}
+        tween = rate_limiter_tween_factory(handler_func, registry)
+        dummy_request.method = 'GET'
+
+        mock_pipeline = MagicMock()
+        mock_pipeline.execute.side_effect = redis.ConnectionError("Refused")
+        mock_redis_conn = MagicMock()
+        mock_redis_conn.pipeline.return_value = mock_pipeline
+        dummy_request.redis_shards = mock_redis_conn
+
+        # Action & Assert
+        with pytest.raises(HTTPServiceUnavailable):
+            tween(dummy_request)
+        assert call_info["called"] is False
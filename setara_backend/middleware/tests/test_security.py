@@ -1,7 +1,10 @@
 import pytest
 import jwt
+import redis
+import fakeredis
 from setara_backend.middleware.security import JWTAuthenticationPolicy
 from pyramid import testing
+from setara_backend.services.container import RequestContainer
 from pyramid.interfaces import IAuthenticationPolicy
 from zope.interface.verify import verifyObject
 from unittest.mock import MagicMock
@@ -16,7 +19,9 @@ def auth_policy():
 @pytest.fixture
 def dummy_request():
     """A fixture for a Pyramid DummyRequest."""
-    return testing.DummyRequest()
+    request = testing.DummyRequest()
+    request.container = RequestContainer(request)
+    return request
 
 
 class TestJWTSecurity:
@@ -36,6 +41,7 @@ class TestJWTSecurity:
         dummy_request.auth_service = mock_auth_service
 
         assert auth_policy.unauthenticated_userid(dummy_request) is None
+        assert dummy_request.user is None
 
     def test_unauthenticated_userid_token_not_in_redis(self, auth_policy, dummy_request):
         """Tests when the token is valid but doesn't match the one in Redis."""
@@ -51,7 +57,7 @@ class TestJWTSecurity:
         # Mock Redis to return a different token (or None)
         mock_redis_conn = MagicMock()
         mock_redis_conn.get.return_value = 'some-other-token'
-        dummy_request.redis_conn = mock_redis_conn
+        dummy_request.redis_shards = mock_redis_conn
 
         # Action
         result = auth_policy.unauthenticated_userid(dummy_request)
@@ -73,10 +79,10 @@ class TestJWTSecurity:
         dummy_request.auth_service = mock_auth_service
 
         # Mock Redis to return the *same* token
-        dummy_request.redis_conn = MagicMock()
+        dummy_request.redis_shards = MagicMock()
         mock_redis_repo = MagicMock()
         mock_redis_repo.get.return_value = token
-        mocker.patch('setara_backend.middleware.security.RedisRepository',
+        mocker.patch('setara_backend.services.container.RedisRepository',
                      return_value=mock_redis_repo)
 
         # Action
@@ -87,5 +93,107 @@ class TestJWTSecurity:
         assert dummy_request.user == claims
         mock_redis_repo.get.assert_called_with('auth_token:user123')
         # Check that the expiration was reset
-        mock_redis_repo.set.assert_called_with(
-            'auth_token:user123', token, expire_seconds=3600)
+        mock_redis_repo.expire.assert_called_with('auth_token:user123', 3600)
+
+    @pytest.mark.parametrize("fail_open, expected_user_id", [
+        (False, None),
+        (True, 'user123'),
+    ])
+    def test_unauthenticated_userid_redis_down(self, dummy_request, fail_open, expected_user_id):
+        """Tests the fail-closed (default) and fail-open policies when Redis is down."""
+        auth_policy = JWTAuthenticationPolicy(
+            'secret', ['HS256'], 3600, redis_fail_open=fail_open)
+        claims = {'user_id': 'user123', 'user_role': 'user'}
+        dummy_request.headers['Authorization'] = 'Bearer the-token'
+
+        mock_auth_service = MagicMock()
+        mock_auth_service.get_user_from_access_token.return_value = claims
+        dummy_request.auth_service = mock_auth_service
+
+        mock_redis_conn = MagicMock()
+        mock_redis_conn.get.side_effect = redis.TimeoutError("Timeout")
+        dummy_request.redis_shards = mock_redis_conn
+        dummy_request.registry['redis.breaker'] = MagicMock(
+            call=lambda func, *args, **kwargs: func(*args, **kwargs))
+
+        try:
+            # Action
+            result = auth_policy.unauthenticated_userid(dummy_request)
+        finally:
+            del dummy_request.registry['redis.breaker']
+
+        # Assert
+        assert result == expected_user_id
+        assert dummy_request.user == (claims if fail_open else None)
+
+    def test_replica_miss_is_confirmed_on_primary(self, auth_policy, dummy_request):
+        """Tests that a token the replica has not seen yet is read from the primary."""
+        # Setup
+        token = 'fresh-token'
+        dummy_request.headers['Authorization'] = f'Bearer {token}'
+        mock_auth_service = MagicMock()
+        mock_auth_service.get_user_from_access_token.return_value = {
+            'user_id': 'user123'}
+        dummy_request.auth_service = mock_auth_service
+        dummy_request.redis_conn = MagicMock()
+        dummy_request.redis_conn.get.return_value = token.encode()
+        dummy_request.redis_shards = dummy_request.redis_conn
+        dummy_request.redis_read_conn = MagicMock()
+        dummy_request.redis_read_conn.get.return_value = None
+
+        # Action
+        result = auth_policy.unauthenticated_userid(dummy_request)
+
+        # Assert
+        assert result == 'user123'
+        dummy_request.redis_read_conn.get.assert_called_once_with(
+            'auth_token:user123')
+        dummy_request.redis_conn.get.assert_called_once_with(
+            'auth_token:user123')
+
+    def test_replica_hit_skips_primary_read(self, auth_policy, dummy_request):
+        """Tests that a token found on the replica is not read again."""
+        # Setup
+        token = 'the-token'
+        dummy_request.headers['Authorization'] = f'Bearer {token}'
+        mock_auth_service = MagicMock()
+        mock_auth_service.get_user_from_access_token.return_value = {
+            'user_id': 'user123'}
+        dummy_request.auth_service = mock_auth_service
+        dummy_request.redis_conn = MagicMock()
+        dummy_request.redis_shards = dummy_request.redis_conn
+        dummy_request.redis_read_conn = MagicMock()
+        dummy_request.redis_read_conn.get.return_value = token.encode()
+
+        # Action
+        result = auth_policy.unauthenticated_userid(dummy_request)
+
+        # Assert
+        assert result == 'user123'
+        dummy_request.redis_conn.get.assert_not_called()
+        dummy_request.redis_conn.expire.assert_called_once_with(
+            'auth_token:user123', 3600)
+
+    def test_replica_hit_after_logout_is_rejected(self, auth_policy, dummy_request):
+        """Tests that a token deleted on the primary is not revived from a lagging replica."""
+        # Setup
+        token = 'logged-out-token'
+        dummy_request.headers['Authorization'] = f'Bearer {token}'
+        mock_auth_service = MagicMock()
+        mock_auth_service.get_user_from_access_token.return_value = {
+            'user_id': 'user123'}
+        dummy_request.auth_service = mock_auth_service
+        primary = fakeredis.FakeStrictRedis(server=fakeredis.FakeServer())
+        replica = fakeredis.FakeStrictRedis(server=fakeredis.FakeServer())
+        replica.set('auth_token:user123', token)
+        dummy_request.redis_conn = primary
+        dummy_request.redis_shards = primary
+        dummy_request.redis_read_conn = replica
+
+        # Action
+        result = auth_policy.unauthenticated_userid(dummy_request)
+
+        # Assert
+        assert result is None
+        assert dummy_request.user is None
+        assert primary.exists('auth_token:user123') == 0
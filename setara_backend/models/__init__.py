@@ -1 +1,2 @@
 from .user import TblUser, UserStatusEnum
+from .login_event import TblLoginEvent, LoginOutcomeEnum
@@ -0,0 +1,79 @@
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    Text,
+    Uuid,
+)
+import enum
+from .meta import Base
+
+
+class LoginOutcomeEnum(enum.Enum):
+    success = 'success'
+    locked = 'locked'
+    not_found = 'not_found'
+    inactive = 'inactive'
+    wrong_password = 'wrong_password'
+    other_device = 'other_device'
+
+
+class TblLoginEvent(Base):
+    __tablename__ = 'tblLoginEvent'
+    login_event_id = Column(
+        # SQLite only autoincrements INTEGER primary keys
+        BigInteger().with_variant(Integer, 'sqlite'),
+        primary_key=True,
+        autoincrement=True
+    )
+    login_event_method = Column(
+        Text,
+        nullable=False
+    )
+    login_event_identifier = Column(
+        Text,
+        nullable=False
+    )
+    login_event_outcome = Column(
+        Enum(LoginOutcomeEnum),
+        nullable=False
+    )
+    login_event_ip = Column(
+        Text,
+        nullable=True
+    )
+    login_event_device = Column(
+        Text,
+        nullable=True
+    )
+    login_event_city = Column(
+        Text,
+        nullable=True
+    )
+    login_event_loc = Column(
+        Text,
+        nullable=True
+    )
+    login_event_created_at = Column(
+        DateTime,
+        nullable=False
+    )
+
+    # Foreign Keys
+    login_event_user_id = Column(
+        Uuid(as_uuid=False),
+        ForeignKey('tblUser.user_id', ondelete='SET NULL'),
+        nullable=True
+    )
+
+    __table_args__ = (
+        Index(
+            'ix_tblLoginEvent_user_id_created_at',
+            'login_event_user_id',
+            'login_event_created_at'
+        ),
+    )
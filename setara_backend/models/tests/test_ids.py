@@ -0,0 +1,69 @@
+import uuid
+import pytest
+from setara_backend.models import TblUser, UserStatusEnum
+from setara_backend.models.ids import UUIDv7Generator, uuid7_time
+from setara_backend.models.user import new_user_id, set_user_id_version
+
+
+class TestUUIDv7Generator:
+    def test_version_and_timestamp(self):
+        """Tests that ids are RFC 9562 version 7 carrying the clock's time."""
+        # Setup
+        generate = UUIDv7Generator(clock=lambda: 1_760_000_000_123_456_789)
+
+        # Action
+        value = generate()
+
+        # Assert
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+        assert uuid7_time(str(value)) == 1_760_000_000.123
+
+    def test_ordered_within_a_millisecond(self):
+        """Tests that ids of the same millisecond still sort in creation order."""
+        # Setup
+        generate = UUIDv7Generator(clock=lambda: 1_760_000_000_000_000_000)
+
+        # Action
+        values = [generate() for _ in range(5000)]
+
+        # Assert
+        assert values == sorted(values)
+        assert len(set(values)) == 5000
+        # The counter ran out and borrowed the next milliseconds
+        assert uuid7_time(values[-1]) > 1_760_000_000.0
+
+
+class TestUserId:
+    def test_new_users_get_uuid7(self, dbsession):
+        """Tests that user ids default to version 7 UUIDs, read back as str."""
+        # Setup
+        user = TblUser(user_role='user', user_status=UserStatusEnum.active)
+
+        # Action
+        dbsession.add(user)
+        dbsession.flush()
+        dbsession.expire(user)
+
+        # Assert
+        assert isinstance(user.user_id, str)
+        assert uuid.UUID(user.user_id).version == 7
+
+    def test_version_is_configurable(self):
+        """Tests that db.user_id_version can switch new ids to uuid4."""
+        # Action
+        set_user_id_version('uuid4')
+        try:
+            value = new_user_id()
+        finally:
+            set_user_id_version('uuid7')
+
+        # Assert
+        assert uuid.UUID(value).version == 4
+        assert uuid.UUID(new_user_id()).version == 7
+
+    def test_unknown_version_is_refused(self):
+        """Tests that a misspelt version fails at startup."""
+        # Action / Assert
+        with pytest.raises(ValueError):
+            set_user_id_version('uuid1')
@@ -6,9 +6,12 @@ from sqlalchemy import (
     ForeignKey,
     Boolean,
     Text,
+    Uuid,
+    Index,
+    text,
 )
 import enum
-import uuid
+from .ids import ID_GENERATORS
 from .meta import Base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -20,21 +23,43 @@ class UserStatusEnum(enum.Enum):
     inactive = 'inactive'
 
 
+# Predicate of the identifier indexes, matched by UserRepository lookups
+NOT_DELETED = "user_status <> 'deleted'"
+
+
+# uuid7 is time-ordered, so new users are appended to the primary key index
+_user_id_generator = ID_GENERATORS['uuid7']
+
+
+def set_user_id_version(version: str) -> None:
+    """Selects the UUID version of new user ids, of ID_GENERATORS."""
+    global _user_id_generator
+    if version not in ID_GENERATORS:
+        raise ValueError(
+            f"unknown user id version {version!r}, "
+            f"expected one of {', '.join(ID_GENERATORS)}"
+        )
+    _user_id_generator = ID_GENERATORS[version]
+
+
+def new_user_id() -> str:
+    return str(_user_id_generator())
+
+
 class TblUser(Base):
     __tablename__ = 'tblUser'
+    # Native UUID on PostgreSQL, CHAR(32) elsewhere; read and written as str
     user_id = Column(
-        String(255),
+        Uuid(as_uuid=False),
         primary_key=True,
-        default=lambda: str(uuid.uuid4())
+        default=new_user_id
     )
     user_phone = Column(
         String(17),
-        unique=True,
         nullable=True
     )
     user_username = Column(
         Text,
-        unique=True,
         nullable=True
     )
     user_email = Column(
@@ -87,12 +112,12 @@ class TblUser(Base):
 
     # Foreign Keys
     user_created_by = Column(
-        String(255),
+        Uuid(as_uuid=False),
         ForeignKey('tblUser.user_id', ondelete='CASCADE'),
         nullable=True
     )
     user_approved_by = Column(
-        String(255),
+        Uuid(as_uuid=False),
         ForeignKey('tblUser.user_id', ondelete='CASCADE'),
         nullable=True
     )
@@ -110,3 +135,29 @@ class TblUser(Base):
         foreign_keys=[user_approved_by],
         uselist=False
     )
+
+    # Identifiers are unique among users that are not deleted; deleted
+    # accounts are left out of the indexes and free their identifiers
+    __table_args__ = (
+        Index(
+            'ix_tblUser_user_phone_not_deleted',
+            'user_phone',
+            unique=True,
+            postgresql_where=text(NOT_DELETED),
+            sqlite_where=text(NOT_DELETED)
+        ),
+        Index(
+            'ix_tblUser_user_username_not_deleted',
+            'user_username',
+            unique=True,
+            postgresql_where=text(NOT_DELETED),
+            sqlite_where=text(NOT_DELETED)
+        ),
+        Index(
+            'ix_tblUser_user_email_not_deleted',
+            'user_email',
+            unique=True,
+            postgresql_where=text(NOT_DELETED),
+            sqlite_where=text(NOT_DELETED)
+        ),
+    )
@@ -1,8 +1,11 @@
+from functools import partial
 from . import models
+from .utils import shell
 
 
 def setup(env):  # pragma: no cover
     request = env['request']
+    registry = env['registry']
 
     # start a transaction
     request.tm.begin()
@@ -11,3 +14,10 @@ def setup(env):  # pragma: no cover
     env['tm'] = request.tm
     env['dbsession'] = request.dbsession
     env['models'] = models
+
+    # Performance helpers, see setara_backend.utils.shell
+    env['explain'] = partial(shell.explain, request.dbsession)
+    env['pool_stats'] = partial(shell.pool_stats, registry)
+    env['timeit'] = shell.timeit
+    env['sample_keys'] = partial(shell.sample_keys, registry['redis.ring'])
+    env['profile_request'] = partial(shell.profile_request, env['app'])
@@ -1,2 +1,3 @@
-from .redis import RedisRepository
+from .notification_token import NotificationTokenRepository
+from .redis import HashRing, RedisRepository
 from .user import UserRepository
@@ -0,0 +1,153 @@
+import hashlib
+from typing import Iterator, Optional
+import redis
+from .redis import RedisRepository
+
+# Field holding a token stored before tokens were kept per device
+LEGACY_DEVICE = 'legacy'
+
+
+def device_id_from_user_agent(user_agent: Optional[str]) -> str:
+    """Derives a stable, short device id for clients that do not send one."""
+    digest = hashlib.blake2b(
+        (user_agent or '').encode('utf-8'), digest_size=8
+    ).hexdigest()
+    return f"ua:{digest}"
+
+
+def _is_wrong_type(error) -> bool:
+    return isinstance(error, redis.ResponseError) and \
+        str(error).startswith('WRONGTYPE')
+
+
+def _decode(value) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+class NotificationTokenRepository(RedisRepository):
+    """
+    Notification tokens kept in one Redis hash per user,
+    notification_token:<user_id> -> {device_id: token}, so every device a
+    user is logged in on receives pushes.
+
+    Keys written as a plain string by older releases are read as a single
+    'legacy' device and converted on the next write.
+
+    Like RedisRepository, writes swallow Redis errors unless a circuit
+    breaker is given; bulk reads always raise them.
+    """
+
+    @staticmethod
+    def key(user_id) -> str:
+        return f"notification_token:{user_id}"
+
+    def set_token(
+        self,
+        user_id,
+        device_id: str,
+        token: str,
+        expire_seconds: Optional[int] = None
+    ) -> bool:
+        key = self.key(user_id)
+        client = self.client_for(key)
+        try:
+            try:
+                self.call(client.hset, key, device_id, token)
+            except redis.ResponseError as e:
+                if not _is_wrong_type(e):
+                    raise
+                legacy_token = self.call(client.get, key)
+                pipeline = client.pipeline()
+                pipeline.delete(key)
+                if legacy_token is not None:
+                    pipeline.hset(key, LEGACY_DEVICE, legacy_token)
+                pipeline.hset(key, device_id, token)
+                self.call(pipeline.execute)
+
+            if expire_seconds:
+                self.call(client.expire, key, int(expire_seconds))
+            return True
+        except Exception as e:
+            if self.breaker:
+                raise
+            return False
+
+    def remove_token(self, user_id, device_id: Optional[str] = None) -> bool:
+        """Removes one device's token, or all of the user's tokens."""
+        key = self.key(user_id)
+        client = self.client_for(key)
+        try:
+            if device_id is None:
+                self.call(client.delete, key)
+                return True
+
+            try:
+                self.call(client.hdel, key, device_id)
+            except redis.ResponseError as e:
+                if not _is_wrong_type(e):
+                    raise
+                # A legacy token cannot be told apart from this device's
+                self.call(client.delete, key)
+            return True
+        except Exception as e:
+            if self.breaker:
+                raise
+            return False
+
+    def get_tokens(self, user_id) -> dict:
+        """Returns the user's tokens as {device_id: token}."""
+        for _, tokens in self.iter_tokens([user_id]):
+            return tokens
+        return {}
+
+    def iter_tokens(
+        self,
+        user_ids,
+        batch_size: int = 500
+    ) -> Iterator[tuple]:
+        """
+        Yields (user_id, {device_id: token}) for every user with tokens.
+
+        Users are read ``batch_size`` at a time with one pipelined round trip
+        per shard, so memory stays flat however many user ids are streamed.
+        """
+        batch = []
+        for user_id in user_ids:
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                yield from self._read_batch(batch)
+                batch = []
+        if batch:
+            yield from self._read_batch(batch)
+
+    def _read_batch(self, user_ids) -> Iterator[tuple]:
+        by_client = {}
+        for user_id in user_ids:
+            client = self.client_for(self.key(user_id))
+            by_client.setdefault(id(client), (client, []))[1].append(user_id)
+
+        for client, shard_user_ids in by_client.values():
+            pipeline = client.pipeline(transaction=False)
+            for user_id in shard_user_ids:
+                pipeline.hgetall(self.key(user_id))
+            results = self.call(pipeline.execute, raise_on_error=False)
+
+            legacy = []
+            for user_id, result in zip(shard_user_ids, results):
+                if _is_wrong_type(result):
+                    legacy.append(user_id)
+                elif isinstance(result, Exception):
+                    raise result
+                elif result:
+                    yield user_id, {
+                        _decode(device): _decode(token)
+                        for device, token in result.items()
+                    }
+
+            if legacy:
+                values = self.call(
+                    client.mget, [self.key(user_id) for user_id in legacy]
+                )
+                for user_id, token in zip(legacy, values):
+                    if token is not None:
+                        yield user_id, {LEGACY_DEVICE: _decode(token)}
@@ -1,15 +1,116 @@
+import bisect
+import hashlib
 import json
 from typing import Any, Optional
 
 
+def routing_key(key: str) -> str:
+    """
+    Returns the part of a key that decides its shard.
+
+    A non-empty ``{tag}`` wins, as in Redis Cluster. Otherwise our
+    ``<keyspace>:<id>`` keys route on the id, so every keyspace of one user
+    (auth_token:7, notification_token:7) lands on the same shard and can be
+    used together in a pipeline or transaction.
+    """
+    start = key.find('{')
+    if start != -1:
+        end = key.find('}', start + 1)
+        if end > start + 1:
+            return key[start + 1:end]
+    _, separator, rest = key.partition(':')
+    return rest if separator else key
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big'
+    )
+
+
+def _node_name(client, index: int) -> str:
+    try:
+        kwargs = client.connection_pool.connection_kwargs
+        return f"{kwargs['host']}:{kwargs['port']}/{kwargs.get('db', 0)}"
+    except (AttributeError, KeyError):
+        return f"node-{index}"
+
+
+class HashRing:
+    """
+    A consistent-hash ring of Redis clients.
+
+    Each node is placed at ``vnodes`` points of the ring, named after the node,
+    so a key's shard only depends on the nodes themselves: adding an N-th node
+    moves about 1/N of the keys, all of them to the new node.
+    """
+
+    def __init__(self, nodes, vnodes: int = 160):
+        if not isinstance(nodes, dict):
+            named = {}
+            for index, client in enumerate(nodes):
+                name = _node_name(client, index)
+                named[name if name not in named else f"{name}#{index}"] = client
+            nodes = named
+        if not nodes:
+            raise ValueError("a hash ring needs at least one node")
+
+        self.nodes = nodes
+        self.vnodes = vnodes
+        points = sorted(
+            (_hash(f"{name}#{replica}"), name)
+            for name in nodes
+            for replica in range(vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    def node_name_for(self, key: str) -> str:
+        if len(self.nodes) == 1:
+            return next(iter(self.nodes))
+        index = bisect.bisect(self._hashes, _hash(routing_key(key)))
+        return self._names[index % len(self._names)]
+
+    def get_node(self, key: str):
+        return self.nodes[self.node_name_for(key)]
+
+
 class RedisRepository:
     """
     A repository for interacting with Redis, providing common key-value operations.
     It automatically handles JSON serialization for complex data types.
+
+    The connection may be a single client, a list of clients or a HashRing;
+    with several nodes every key is routed to its shard, see routing_key.
+
+    Without a circuit breaker, Redis errors are swallowed and reported as a
+    failed or empty result. With one, every call goes through the breaker and
+    errors are raised, so the caller can apply its own fail-open or
+    fail-closed policy.
     """
 
-    def __init__(self, redis_connection):
-        self.redis = redis_connection
+    def __init__(self, redis_connection, breaker=None):
+        if isinstance(redis_connection, (list, tuple)):
+            redis_connection = HashRing(redis_connection)
+        if isinstance(redis_connection, HashRing):
+            self.ring = redis_connection
+            self.redis = None
+        else:
+            self.ring = None
+            self.redis = redis_connection
+        self.breaker = breaker
+
+    def client_for(self, key: str):
+        """Returns the client of the shard holding the key."""
+        if self.ring is None:
+            return self.redis
+        return self.ring.get_node(key)
+
+    def call(self, func, *args, **kwargs):
+        """Runs a Redis call, through the circuit breaker when there is one."""
+        if self.breaker is None:
+            return func(*args, **kwargs)
+        return self.breaker.call(func, *args, **kwargs)
 
     def set(self, key: str, value: Any, expire_seconds: Optional[int] = None) -> bool:
         try:
@@ -19,19 +120,25 @@ class RedisRepository:
                 value_to_store = value
 
             if expire_seconds:
-                self.redis.setex(
+                self.call(
+                    self.client_for(key).setex,
                     name=key, time=expire_seconds,
                     value=value_to_store
                 )
             else:
-                self.redis.set(name=key, value=value_to_store)
+                self.call(
+                    self.client_for(key).set,
+                    name=key, value=value_to_store
+                )
             return True
         except Exception as e:
+            if self.breaker:
+                raise
             return False
 
     def get(self, key: str) -> Any:
         try:
-            value = self.redis.get(key)
+            value = self.call(self.client_for(key).get, key)
             if value is None:
                 return None
 
@@ -40,10 +147,25 @@ class RedisRepository:
             except (json.JSONDecodeError, TypeError):
                 return value.decode('utf-8')
         except Exception as e:
+            if self.breaker:
+                raise
             return None
 
+    def expire(self, key: str, expire_seconds: int) -> bool:
+        """Resets the key's TTL; False when the key does not exist."""
+        try:
+            return bool(self.call(
+                self.client_for(key).expire, key, int(expire_seconds)
+            ))
+        except Exception as e:
+            if self.breaker:
+                raise
+            return False
+
     def delete(self, key: str) -> int:
         try:
-            return self.redis.delete(key)
+            return self.call(self.client_for(key).delete, key)
         except Exception as e:
+            if self.breaker:
+                raise
             return 0
@@ -0,0 +1,98 @@
+import fakeredis
+import pytest
+from setara_backend.repositories import NotificationTokenRepository
+from setara_backend.repositories.notification_token import LEGACY_DEVICE
+
+
+@pytest.fixture
+def token_repo(redis_client) -> NotificationTokenRepository:
+    """Provides a repository on the clean redis_client."""
+    return NotificationTokenRepository(redis_client)
+
+
+class TestNotificationTokenRepository:
+    def test_tokens_are_kept_per_device(self, token_repo):
+        """Tests that a login on a second device keeps the first device's token."""
+        # Action
+        token_repo.set_token('user1', 'phone', 'token-a', expire_seconds=60)
+        token_repo.set_token('user1', 'tablet', 'token-b', expire_seconds=60)
+
+        # Assert
+        assert token_repo.get_tokens('user1') == {
+            'phone': 'token-a', 'tablet': 'token-b'}
+        assert 0 < token_repo.redis.ttl('notification_token:user1') <= 60
+
+    def test_remove_one_device(self, token_repo):
+        """Tests that removing a device keeps the others."""
+        # Setup
+        token_repo.set_token('user1', 'phone', 'token-a')
+        token_repo.set_token('user1', 'tablet', 'token-b')
+
+        # Action
+        token_repo.remove_token('user1', 'phone')
+
+        # Assert
+        assert token_repo.get_tokens('user1') == {'tablet': 'token-b'}
+
+    def test_legacy_string_is_read_and_converted(self, token_repo, redis_client):
+        """Tests that tokens stored as a plain string keep working."""
+        # Setup
+        redis_client.set('notification_token:user1', 'old-token')
+
+        # Action & Assert
+        assert token_repo.get_tokens('user1') == {LEGACY_DEVICE: 'old-token'}
+
+        token_repo.set_token('user1', 'phone', 'token-a')
+        assert token_repo.get_tokens('user1') == {
+            LEGACY_DEVICE: 'old-token', 'phone': 'token-a'}
+
+    def test_remove_from_legacy_string(self, token_repo, redis_client):
+        """Tests that logging out a device removes a legacy string token."""
+        redis_client.set('notification_token:user1', 'old-token')
+
+        token_repo.remove_token('user1', 'phone')
+
+        assert token_repo.get_tokens('user1') == {}
+
+    def test_iter_tokens_streams_batches(self, token_repo, redis_client, mocker):
+        """Tests bulk reads: one pipeline per batch, users without tokens skipped."""
+        # Setup
+        for i in range(0, 10, 2):
+            token_repo.set_token(f'user{i}', 'phone', f'token-{i}')
+        redis_client.set('notification_token:user9', 'old-token')
+        pipeline = mocker.spy(redis_client, 'pipeline')
+
+        # Action
+        tokens = token_repo.iter_tokens(
+            (f'user{i}' for i in range(10)), batch_size=4)
+
+        # Assert
+        assert not hasattr(tokens, '__len__')
+        assert dict(tokens) == {
+            'user0': {'phone': 'token-0'},
+            'user2': {'phone': 'token-2'},
+            'user4': {'phone': 'token-4'},
+            'user6': {'phone': 'token-6'},
+            'user8': {'phone': 'token-8'},
+            'user9': {LEGACY_DEVICE: 'old-token'},
+        }
+        assert pipeline.call_count == 3
+
+    def test_iter_tokens_across_shards(self):
+        """Tests that bulk reads gather tokens from every shard."""
+        # Setup
+        nodes = [
+            fakeredis.FakeStrictRedis(server=fakeredis.FakeServer())
+            for _ in range(3)
+        ]
+        token_repo = NotificationTokenRepository(nodes)
+        for i in range(50):
+            token_repo.set_token(i, 'phone', f'token-{i}')
+
+        # Action
+        tokens = dict(token_repo.iter_tokens(range(50), batch_size=20))
+
+        # Assert
+        assert len(tokens) == 50
+        assert tokens[7] == {'phone': 'token-7'}
+        assert all(node.dbsize() > 0 for node in nodes)
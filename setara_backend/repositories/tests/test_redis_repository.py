@@ -1,5 +1,15 @@
+import fakeredis
 import pytest
-from setara_backend.repositories.redis import RedisRepository
+import redis
+from setara_backend.services.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError
+)
+from setara_backend.repositories.redis import (
+    HashRing,
+    RedisRepository,
+    routing_key
+)
 
 
 @pytest.fixture
@@ -89,6 +99,23 @@ class TestRedisRepository:
         assert ttl > 0
         assert ttl <= expire_seconds
 
+    def test_expire_only_existing_key(self, redis_repo: RedisRepository, redis_client):
+        """
+        Tests that expire resets the TTL of a key and never creates one.
+        """
+        # Setup
+        redis_repo.set("test:expire", "value", expire_seconds=5)
+
+        # Action
+        refreshed = redis_repo.expire("test:expire", 60)
+        missing = redis_repo.expire("test:missing", 60)
+
+        # Assert
+        assert refreshed is True
+        assert redis_client.ttl("test:expire") > 5
+        assert missing is False
+        assert redis_client.exists("test:missing") == 0
+
     def test_delete_existing_key(self, redis_repo: RedisRepository):
         """
         Tests that deleting an existing key works as expected.
@@ -166,3 +193,90 @@ class TestRedisRepository:
 
         # Assert
         assert delete_result == 0
+
+    def test_errors_raise_with_breaker(self, redis_client, mocker):
+        """
+        Tests that, given a circuit breaker, errors reach the caller and
+        an open circuit stops calling Redis.
+        """
+        # Setup
+        breaker = CircuitBreaker(
+            'redis', failure_threshold=1,
+            failure_exceptions=(redis.ConnectionError,)
+        )
+        redis_repo = RedisRepository(redis_client, breaker)
+        mock_get = mocker.patch.object(
+            redis_client, 'get',
+            side_effect=redis.ConnectionError("Connection failed")
+        )
+
+        # Action & Assert
+        with pytest.raises(redis.ConnectionError):
+            redis_repo.get("any:key")
+        with pytest.raises(CircuitOpenError):
+            redis_repo.get("any:key")
+        assert mock_get.call_count == 1
+
+
+def make_nodes(count):
+    return {
+        f"10.0.0.{i}:6379": fakeredis.FakeStrictRedis(server=fakeredis.FakeServer())
+        for i in range(count)
+    }
+
+
+class TestHashRing:
+    @pytest.mark.parametrize("key, expected", [
+        ("auth_token:42", "42"),
+        ("notification_token:42", "42"),
+        ("login_failures:email:a@b.c", "email:a@b.c"),
+        ("session:{user42}:cart", "user42"),
+        ("weird:{}:key", "{}:key"),
+        ("plain", "plain"),
+    ])
+    def test_routing_key(self, key, expected):
+        """Tests that hash tags win and keyspace prefixes are ignored."""
+        assert routing_key(key) == expected
+
+    def test_user_keyspaces_share_a_shard(self):
+        """Tests that all keys of one user are routed to the same node."""
+        ring = HashRing(make_nodes(5))
+
+        for user_id in range(100):
+            assert ring.node_name_for(f"auth_token:{user_id}") == \
+                ring.node_name_for(f"notification_token:{user_id}")
+
+    def test_adding_a_node_moves_about_one_nth(self):
+        """Tests that a fifth node takes about 1/5 of the keys, from all others."""
+        # Setup
+        nodes = make_nodes(5)
+        keys = [f"rate_limit:10.1.{i // 256}.{i % 256}" for i in range(20000)]
+        before = HashRing(dict(list(nodes.items())[:4]))
+        after = HashRing(nodes)
+
+        # Action
+        moved = [
+            key for key in keys
+            if before.node_name_for(key) != after.node_name_for(key)
+        ]
+
+        # Assert
+        assert 0.15 < len(moved) / len(keys) < 0.25
+        assert {after.node_name_for(key) for key in moved} == {"10.0.0.4:6379"}
+
+    def test_repository_routes_to_shards(self):
+        """Tests that the repository stores each key on its own shard only."""
+        # Setup
+        nodes = make_nodes(3)
+        repo = RedisRepository(list(nodes.values()))
+
+        # Action
+        for user_id in range(30):
+            repo.set(f"auth_token:{user_id}", f"token-{user_id}")
+
+        # Assert
+        assert sum(client.dbsize() for client in nodes.values()) == 30
+        assert all(client.dbsize() > 0 for client in nodes.values())
+        assert repo.get("auth_token:7") == "token-7"
+        client = repo.client_for("auth_token:7")
+        assert client.get("auth_token:7") == b"token-7"
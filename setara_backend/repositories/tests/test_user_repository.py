@@ -1,7 +1,9 @@
-from setara_backend.repositories.user import UserRepository
+from setara_backend.repositories.user import UserRepository, status_filter
 from setara_backend.models.user import TblUser, UserStatusEnum
 from datetime import datetime
 import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 
 
 @pytest.fixture
@@ -49,6 +51,33 @@ class TestGetUser:
         # Assert
         assert invalid_user is None
 
+    def test_get_user_matches_identifier(self, dbsession, user_repo: UserRepository, test_user: TblUser):
+        """Tests that the lookup returns the user owning the identifier, not any user."""
+        # Setup
+        other_user = TblUser(
+            user_phone='+6281211115555',
+            user_username='jane',
+            user_email='jane@example.com',
+            user_role='admin_super',
+            user_status=UserStatusEnum.active
+        )
+        dbsession.add(other_user)
+        dbsession.flush()
+
+        # Action
+        found_user = user_repo.get_user_by_identifier(
+            identifier_type='username',
+            user_identifier='jane'
+        )
+        missing_user = user_repo.get_user_by_identifier(
+            identifier_type='email',
+            user_identifier='nobody@example.com'
+        )
+
+        # Assert
+        assert found_user.user_id == other_user.user_id
+        assert missing_user is None
+
     def test_get_user_by_phone(self, user_repo: UserRepository, test_user: TblUser):
         """Tests retrieving a user by their phone number."""
         # Action
@@ -94,6 +123,121 @@ class TestGetUser:
         assert found_user.user_id == test_user.user_id
 
 
+class TestStatusFilter:
+    """Tests for the user_status condition of lookups."""
+
+    def test_every_status_is_no_condition(self):
+        """Tests that a filter covering the whole enum is dropped."""
+        # Action & Assert
+        assert status_filter(None) is None
+        assert status_filter(list(UserStatusEnum)) is None
+        assert status_filter(['active', 'inactive', 'deleted']) is None
+
+    def test_not_deleted_matches_index_predicate(self):
+        """Tests that active and inactive become user_status != 'deleted'."""
+        # Action
+        condition = status_filter(
+            [UserStatusEnum.active, UserStatusEnum.inactive]
+        )
+
+        # Assert
+        compiled = condition.compile(compile_kwargs={'literal_binds': True})
+        assert str(compiled) == "\"tblUser\".user_status != 'deleted'"
+
+    def test_single_status(self):
+        """Tests that a single status stays an IN list."""
+        # Action
+        condition = status_filter([UserStatusEnum.active])
+
+        # Assert
+        compiled = condition.compile(compile_kwargs={'literal_binds': True})
+        assert str(compiled) == "\"tblUser\".user_status IN ('active')"
+
+    def test_lookup_excludes_deleted_by_default(self, dbsession, user_repo: UserRepository, test_user: TblUser):
+        """Tests that a deleted user is only found when deleted users are asked for."""
+        # Setup
+        test_user.user_status = UserStatusEnum.deleted
+        dbsession.flush()
+
+        # Action
+        live_user = user_repo.get_user_by_identifier(
+            identifier_type='phone',
+            user_identifier=test_user.user_phone
+        )
+        any_user = user_repo.get_user_by_identifier(
+            identifier_type='phone',
+            user_identifier=test_user.user_phone,
+            user_status=None
+        )
+
+        # Assert
+        assert live_user is None
+        assert any_user.user_id == test_user.user_id
+
+    def test_lookup_prefers_the_live_user(self, dbsession, user_repo: UserRepository, test_user: TblUser):
+        """Tests that a live user wins over deleted users sharing its identifier."""
+        # Setup
+        test_user.user_status = UserStatusEnum.deleted
+        live = TblUser(
+            user_phone=test_user.user_phone,
+            user_role='user',
+            user_status=UserStatusEnum.active
+        )
+        dbsession.add(live)
+        dbsession.add(TblUser(
+            user_phone=test_user.user_phone,
+            user_role='user',
+            user_status=UserStatusEnum.deleted
+        ))
+        dbsession.flush()
+
+        # Action
+        user = user_repo.get_user_by_identifier(
+            identifier_type='phone',
+            user_identifier=test_user.user_phone,
+            user_status=list(UserStatusEnum)
+        )
+
+        # Assert
+        assert user.user_id == live.user_id
+
+
+class TestIdentifierIndexes:
+    """Tests for the partial unique indexes on identifiers."""
+
+    def test_deleted_user_frees_identifiers(self, dbsession, test_user: TblUser):
+        """Tests that a deleted user's phone, username and email can be reused."""
+        # Setup
+        test_user.user_status = UserStatusEnum.deleted
+        dbsession.flush()
+
+        # Action
+        dbsession.add(TblUser(
+            user_phone=test_user.user_phone,
+            user_username=test_user.user_username,
+            user_email=test_user.user_email,
+            user_role='admin_super',
+            user_status=UserStatusEnum.active
+        ))
+        dbsession.flush()
+
+        # Assert
+        assert dbsession.query(TblUser).count() == 2
+
+    def test_live_users_stay_unique(self, dbsession, test_user: TblUser):
+        """Tests that two users that are not deleted cannot share an email."""
+        # Setup
+        dbsession.add(TblUser(
+            user_email=test_user.user_email,
+            user_role='admin_super',
+            user_status=UserStatusEnum.inactive
+        ))
+
+        # Action & Assert
+        with pytest.raises(IntegrityError):
+            dbsession.flush()
+
+
 class TestUpdateUser:
     """Tests for updating users."""
 
@@ -129,3 +273,63 @@ class TestUpdateUser:
         assert test_user.user_name == 'Johnathan Doe'
         # Verify that fields not in the update data were NOT changed
         assert test_user.user_username == original_username
+
+
+class TestUpdateUserFields:
+    """Tests for targeted updates that do not load the user."""
+
+    def test_update_fields(self, dbsession, user_repo: UserRepository, test_user: TblUser):
+        """Tests that the row is updated with one statement and no flush."""
+        # Setup
+        user_id = test_user.user_id
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        # Action
+        event.listen(dbsession.get_bind(), 'before_cursor_execute', record)
+        try:
+            updated = user_repo.update_user_fields(
+                user_id, {'user_is_login': True})
+        finally:
+            event.remove(dbsession.get_bind(), 'before_cursor_execute', record)
+
+        # Assert
+        assert updated is True
+        assert len(statements) == 1
+        assert statements[0].startswith('UPDATE')
+        dbsession.expire_all()
+        assert dbsession.get(TblUser, user_id).user_is_login is True
+
+    def test_update_fields_returning(self, user_repo: UserRepository, test_user: TblUser):
+        """Tests that the requested columns of the updated row are returned."""
+        # Action
+        row = user_repo.update_user_fields(
+            test_user.user_id,
+            {'user_is_login': True},
+            returning=['user_id', 'user_is_login']
+        )
+
+        # Assert
+        assert row == {'user_id': test_user.user_id, 'user_is_login': True}
+
+    def test_update_fields_unknown_user(self, user_repo: UserRepository):
+        """Tests that updating a missing user reports nothing updated."""
+        assert user_repo.update_user_fields(
+            999, {'user_is_login': False}) is False
+        assert user_repo.update_user_fields(
+            999, {'user_is_login': False}, returning=['user_id']) is None
+
+    def test_update_fields_rejects_other_columns(self, user_repo: UserRepository, test_user: TblUser):
+        """Tests that columns outside the whitelist cannot be updated."""
+        with pytest.raises(ValueError, match='user_role'):
+            user_repo.update_user_fields(
+                test_user.user_id, {'user_role': 'admin_super'})
+
+    @pytest.mark.parametrize(
+        'field', ['user_phone', 'user_username', 'user_email'])
+    def test_update_fields_rejects_identifiers(self, user_repo: UserRepository, test_user: TblUser, field):
+        """Tests that identifiers, unseen by the identifier filter without a flush, are refused."""
+        with pytest.raises(ValueError, match=field):
+            user_repo.update_user_fields(test_user.user_id, {field: 'new'})
@@ -1,39 +1,104 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, update
 from setara_backend.models import (
     TblUser,
     UserStatusEnum
 )
 
 
+# Columns callers may change through the repository
+UPDATABLE_FIELDS = (
+    'user_phone', 'user_username', 'user_name',
+    'user_email', 'user_password', 'user_is_verified',
+    'user_is_login', 'user_approved_at',
+    'user_reject_message', 'user_status',
+    'user_approved_by',
+)
+
+# Login identifiers, which the identifier filter only learns on flush
+IDENTIFIER_FIELDS = ('user_phone', 'user_username', 'user_email')
+
+# Columns update_user_fields may change without a flush
+FIELD_UPDATE_FIELDS = tuple(
+    field for field in UPDATABLE_FIELDS if field not in IDENTIFIER_FIELDS
+)
+
+
+# Statuses of users that are not deleted, the default of lookups
+LIVE_STATUSES = (UserStatusEnum.active, UserStatusEnum.inactive)
+
+
+def status_filter(user_status):
+    """
+    The user_status condition selecting the given statuses, or None when
+    they are every status and the condition would only cost the planner.
+
+    Written as NOT IN the other statuses when that list is shorter, so
+    non-deleted lookups read user_status <> 'deleted', the predicate of
+    the partial identifier indexes.
+    """
+    if user_status is None:
+        return None
+    wanted = {UserStatusEnum(status) for status in user_status}
+    others = [status for status in UserStatusEnum if status not in wanted]
+    if not others:
+        return None
+    if len(others) == 1:
+        return TblUser.user_status != others[0]
+    if len(others) < len(wanted):
+        return TblUser.user_status.not_in(others)
+    return TblUser.user_status.in_(
+        [status for status in UserStatusEnum if status in wanted]
+    )
+
+
 class UserRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, login_state=None):
         self.session = session
+        # Write-behind user_is_login store whose unflushed state reads merge
+        self.login_state = login_state
 
     def get_user_by_identifier(
         self,
         identifier_type,
         user_identifier,
-        user_status=[
-            UserStatusEnum.active,
-            UserStatusEnum.inactive,
-            UserStatusEnum.deleted,
-        ],
+        user_status=LIVE_STATUSES,
     ) -> TblUser:
-        user = self.session.query(TblUser).filter(
-            TblUser.user_status.in_(user_status)
-        )
+        """
+        Finds a user by phone, username, email or id, among users with one
+        of ``user_status`` (any status when None). Only lookups excluding
+        deleted users are served by the identifier indexes.
+
+        Deleted users may share an identifier with a live user and with
+        each other; when they are included the live user comes first, then
+        the most recently created one.
+        """
+        user = self.session.query(TblUser)
+        condition = status_filter(user_status)
+        if condition is not None:
+            user = user.filter(condition)
+        if user_status is None or UserStatusEnum.deleted in {
+            UserStatusEnum(status) for status in user_status
+        }:
+            user = user.order_by(
+                TblUser.user_status == UserStatusEnum.deleted,
+                TblUser.user_created_at.desc(),
+                TblUser.user_id
+            )
 
         if identifier_type == 'phone':
-            user.filter(TblUser.user_phone == user_identifier)
+            user = user.filter(TblUser.user_phone == user_identifier)
         elif identifier_type == 'username':
-            user.filter(TblUser.user_username == user_identifier)
+            user = user.filter(TblUser.user_username == user_identifier)
         elif identifier_type == 'email':
-            user.filter(TblUser.user_email == user_identifier)
+            user = user.filter(TblUser.user_email == user_identifier)
         else:
-            user.filter(TblUser.user_id == user_identifier)
+            user = user.filter(TblUser.user_id == user_identifier)
 
-        return user.first()
+        user = user.first()
+        if user is not None and self.login_state is not None:
+            self.login_state.overlay([user])
+        return user
 
     def update_user(
         self,
@@ -43,16 +108,46 @@ class UserRepository:
         if not user:
             return False
 
-        update_text_field = [
-            'user_phone', 'user_username', 'user_name',
-            'user_email', 'user_password', 'user_is_verified',
-            'user_is_login', 'user_approved_at',
-            'user_reject_message', 'user_status',
-            'user_approved_by',
-        ]
-
-        for field in update_text_field:
+        for field in UPDATABLE_FIELDS:
             if field in new_data:
                 setattr(user, field, new_data.get(field))
 
         return True
+
+    def update_user_fields(
+        self,
+        user_id,
+        values: dict,
+        returning: list = None
+    ):
+        """
+        Updates columns of one user with a single UPDATE ... WHERE user_id,
+        without loading the row or flushing the session. Copies of the user
+        already loaded in the session are not refreshed. Identifiers are
+        refused: the identifier filter would not see them and would turn
+        logins with the new value away. Change them with update_user().
+
+        Returns whether a row was updated, or with ``returning`` the listed
+        columns of the updated row as a dict (None when no row matched).
+        """
+        unknown = set(values) - set(FIELD_UPDATE_FIELDS)
+        if unknown:
+            raise ValueError(
+                f"fields cannot be updated: {', '.join(sorted(unknown))}")
+        if not values:
+            return None if returning else False
+
+        statement = (
+            update(TblUser)
+            .where(TblUser.user_id == user_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if returning:
+            statement = statement.returning(
+                *[getattr(TblUser, column) for column in returning]
+            )
+            row = self.session.execute(statement).mappings().first()
+            return dict(row) if row else None
+
+        return self.session.execute(statement).rowcount > 0
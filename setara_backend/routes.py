@@ -3,3 +3,4 @@ def includeme(config):
     config.add_route('home', '/')
     config.add_route('login', '/auth/login')
     config.add_route('logout', '/auth/logout')
+    config.add_route('internal_metrics', '/internal/metrics')
@@ -20,6 +20,11 @@ class UserSchema(BaseSchema):
         )
     )
     user_notification_token = fields.Str(required=True)
+    # Identifies the device's notification token, the User-Agent when missing
+    user_device_id = fields.Str(
+        required=False,
+        validate=validate.Length(min=1, max=128)
+    )
 
     @validates_schema
     def validate_login_credentials(self, data, **kwargs):
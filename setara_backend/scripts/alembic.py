@@ -35,6 +35,46 @@ def run_command(command: list[str]):  # pragma: no cover
         sys.exit(1)
 
 
+def add_online_arguments(parser: argparse.ArgumentParser):  # pragma: no cover
+    """
+    Options for setara_backend.utils.online_migrations, passed to env.py as
+    alembic -x arguments.
+    """
+    parser.add_argument(
+        '--lock-timeout',
+        default='5s',
+        help="Give up when a lock is not granted in time, instead of queueing traffic behind it (PostgreSQL). '0' waits forever. Defaults to 5s."
+    )
+    parser.add_argument(
+        '--statement-timeout',
+        help="Abort any statement running longer than this, e.g. '15min' (PostgreSQL)."
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        help="Rows per batch for chunked backfills. Defaults to 1000."
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help="Print the SQL of the pending migrations and the rows each online operation would touch, through a read-only connection, without running them."
+    )
+
+
+def online_x_arguments(args) -> list[str]:  # pragma: no cover
+    options = {
+        'lock_timeout': args.lock_timeout,
+        'statement_timeout': args.statement_timeout,
+        'batch_size': args.batch_size,
+        'dry_run': 'true' if args.dry_run else None,
+    }
+    x_arguments = []
+    for name, value in options.items():
+        if value is not None:
+            x_arguments += ["-x", f"{name}={value}"]
+    return x_arguments
+
+
 def main():  # pragma: no cover
     """
     A command-line wrapper for Alembic to simplify database migrations.
@@ -89,6 +129,7 @@ def main():  # pragma: no cover
         default='+1',
         help="The target revision. Examples: 'head' (latest), '+1' (one step up), '<revision_id>'. Defaults to '+1'."
     )
+    add_online_arguments(parser_up)
 
     # --- Command: down ---
     # Replaces 'downgrade' and the old 'down' alias.
@@ -103,6 +144,7 @@ def main():  # pragma: no cover
         default='-1',
         help="The target revision. Examples: 'base' (first migration), '-1' (one step down), '<revision_id>'. Defaults to '-1'."
     )
+    add_online_arguments(parser_down)
 
     # --- Simple, no-argument commands ---
     subparsers.add_parser('history', help="View the full migration history.")
@@ -124,10 +166,12 @@ def main():  # pragma: no cover
         final_command = base_alembic_command + alembic_args
 
     elif args.command == 'up':
-        final_command = base_alembic_command + ["upgrade", args.revision]
+        final_command = base_alembic_command + online_x_arguments(args) + \
+            ["upgrade", args.revision]
 
     elif args.command == 'down':
-        final_command = base_alembic_command + ["downgrade", args.revision]
+        final_command = base_alembic_command + online_x_arguments(args) + \
+            ["downgrade", args.revision]
 
     elif args.command in ['history', 'current']:
         final_command = base_alembic_command + [args.command]
@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+import tempfile
+
+
+def main():  # pragma: no cover
+    """
+    Compares text uuid4, native uuid4 and native uuid7 primary keys on
+    insert throughput and index size, against the configured database or a
+    temporary SQLite file.
+    """
+    # Imported here so --help does not load SQLAlchemy
+    from sqlalchemy import create_engine
+    from setara_backend.benchmarks.keys import KEY_VARIANTS, benchmark_keys
+    from setara_backend.scripts.alembic import get_config_file
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the primary key types of tblUser.",
+        epilog="Example: benchmark_keys -e prod --rows 1000000"
+    )
+    parser.add_argument(
+        '-e', '--environment',
+        choices=['dev', 'prod'],
+        help="Use the database of this environment's .ini file. "
+        "Defaults to a temporary SQLite file."
+    )
+    parser.add_argument(
+        'variants',
+        nargs='*',
+        help=f"Key types to compare, of {', '.join(KEY_VARIANTS)}. "
+        "Defaults to all of them."
+    )
+    parser.add_argument(
+        '--rows',
+        type=int,
+        default=100_000,
+        help="Rows inserted per key type. Defaults to 100000."
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1000,
+        help="Rows per INSERT transaction. Defaults to 1000."
+    )
+    args = parser.parse_args()
+
+    variants = args.variants or list(KEY_VARIANTS)
+    unknown = sorted(set(variants) - set(KEY_VARIANTS))
+    if unknown:
+        print(
+            f"❌ Error: unknown key type(s): {', '.join(unknown)}.",
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.environment:
+            from pyramid.paster import get_appsettings
+            settings = get_appsettings(get_config_file(args.environment))
+            database_url = settings['sqlalchemy.url']
+        else:
+            database_url = f"sqlite:///{os.path.join(directory, 'keys.db')}"
+        engine = create_engine(database_url)
+
+        print(
+            f"{'key type':<12} {'rows/s':>10} {'index MiB':>10} "
+            f"{'bytes/row':>10}"
+        )
+        try:
+            for variant in variants:
+                result = benchmark_keys(
+                    engine, variant, args.rows, args.batch_size
+                )
+                size = result['index_bytes']
+                print(
+                    f"{variant:<12} {result['rows_per_second']:>10.0f} "
+                    f"{size / 2 ** 20 if size is not None else float('nan'):>10.2f} "
+                    f"{result['index_bytes_per_row'] or float('nan'):>10.1f}"
+                )
+        finally:
+            engine.dispose()
+    print("✅ Benchmark finished.")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import statistics
+import sys
+import time
+
+import bcrypt
+
+
+def measure_rounds(rounds: int, samples: int) -> float:  # pragma: no cover
+    """
+    Measures the median time (in milliseconds) of a bcrypt.checkpw call
+    for the given work factor, which is what a login pays per attempt.
+    """
+    password = b'Calibration-Password1!'
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.checkpw(password, hashed)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():  # pragma: no cover
+    """
+    Benchmarks bcrypt on this machine and recommends the work factor
+    (auth.bcrypt_rounds) that fits a target login latency.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark bcrypt and recommend auth.bcrypt_rounds.",
+        epilog="Example: calibrate_bcrypt --target-ms 250"
+    )
+    parser.add_argument(
+        '--target-ms',
+        type=float,
+        default=250.0,
+        help="Maximum time a single password check may take. Defaults to 250."
+    )
+    parser.add_argument(
+        '--min-rounds',
+        type=int,
+        default=10,
+        help="Lowest work factor to consider. Defaults to 10."
+    )
+    parser.add_argument(
+        '--max-rounds',
+        type=int,
+        default=16,
+        help="Highest work factor to consider. Defaults to 16."
+    )
+    parser.add_argument(
+        '--samples',
+        type=int,
+        default=5,
+        help="Password checks measured per work factor. Defaults to 5."
+    )
+    args = parser.parse_args()
+
+    if not 4 <= args.min_rounds <= args.max_rounds <= 31:
+        print(
+            "❌ Error: rounds must satisfy 4 <= min-rounds <= max-rounds <= 31.",
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+    print(f"Target check time: {args.target_ms:.0f} ms")
+    print(f"{'rounds':>6}  {'median ms':>10}  {'checks/s/core':>13}")
+
+    recommended = None
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        elapsed_ms = measure_rounds(rounds, args.samples)
+        print(f"{rounds:>6}  {elapsed_ms:>10.1f}  {1000 / elapsed_ms:>13.1f}")
+
+        if elapsed_ms > args.target_ms:
+            # Each extra round doubles the cost, no need to go further
+            break
+        recommended = rounds
+
+    if recommended is None:
+        print(
+            f"❌ Even {args.min_rounds} rounds exceed {args.target_ms:.0f} ms "
+            "on this machine.",
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+    print(f"✅ Recommended setting: auth.bcrypt_rounds = {recommended}")
+    print(
+        "Existing hashes with a different cost are re-hashed "
+        "on the next successful login."
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
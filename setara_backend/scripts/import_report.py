@@ -0,0 +1,121 @@
+import argparse
+import sys
+
+from setara_backend.scripts.alembic import get_config_file
+
+
+def main():  # pragma: no cover
+    """
+    Prints the import tree of a worker booting the app (or of the given
+    modules) like ``python -X importtime``, and checks it against a stored
+    baseline and the modules workers must never import.
+    """
+    from setara_backend.benchmarks.importtime import (
+        compare_imports,
+        forbidden_imports,
+        format_tree,
+        load_import_baseline,
+        measure_imports,
+        save_import_baseline,
+        summarize_imports
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Report and check the import cost of app startup.",
+        epilog="Example: import_report -e prod --baseline imports.json --save"
+    )
+    parser.add_argument(
+        '-e', '--environment',
+        choices=['dev', 'prod'],
+        default='dev',
+        help="The target environment (dev or prod). Determines the .ini file used."
+    )
+    parser.add_argument(
+        '-m', '--module',
+        action='append',
+        help="Import only this module instead of booting the app, "
+        "e.g. setara_backend.scripts.alembic. Repeatable."
+    )
+    parser.add_argument(
+        '--min-ms',
+        type=float,
+        default=5.0,
+        help="Hide imports cheaper than this. Defaults to 5."
+    )
+    parser.add_argument(
+        '--depth',
+        type=int,
+        default=3,
+        help="Levels of the tree to print. Defaults to 3."
+    )
+    parser.add_argument(
+        '--baseline',
+        default='imports.json',
+        help="JSON baseline to compare with. Defaults to imports.json."
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.25,
+        help="Allowed growth before failing, 0.25 = 25%%. Defaults to 0.25."
+    )
+    parser.add_argument(
+        '--save',
+        action='store_true',
+        help="Store this run as the new baseline."
+    )
+    args = parser.parse_args()
+
+    if args.module:
+        target = ', '.join(args.module)
+        code = '\n'.join(f"import {module}" for module in args.module)
+    else:
+        config_file = get_config_file(args.environment)
+        target = f"the app from {config_file}"
+        code = (
+            "from pyramid.paster import get_app\n"
+            f"get_app({config_file!r}, 'main')"
+        )
+
+    try:
+        roots = measure_imports(code)
+    except RuntimeError as e:
+        print(f"❌ Error: importing {target} failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    summary = summarize_imports(roots)
+    print(f"Imports of {target}: {summary['total_ms']:.1f} ms, "
+          f"{summary['modules']} modules")
+    print(f"{'cumulative':>12} {'self':>11}  module")
+    for line in format_tree(roots, args.min_ms, args.depth):
+        print(line)
+
+    failed = False
+    forbidden = forbidden_imports(roots) if not args.module else []
+    if forbidden:
+        failed = True
+        print(
+            f"❌ Workers must not import: {', '.join(forbidden)}",
+            file=sys.stderr
+        )
+
+    baseline = load_import_baseline(args.baseline)
+    regressions = compare_imports(summary, baseline, args.threshold)
+    for regression in regressions:
+        failed = True
+        print(f"❌ Regression: {regression}", file=sys.stderr)
+
+    if args.save:
+        save_import_baseline(args.baseline, summary)
+        print(f"✅ Baseline saved to {args.baseline}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline}, run with --save to store one.")
+
+    if failed:
+        sys.exit(1)
+    if baseline:
+        print(f"✅ No regression beyond {args.threshold:.0%} of the baseline.")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+
+def main():  # pragma: no cover
+    """
+    Load tests the application on a real waitress server with SQLite and
+    fakeredis standing in for Postgres and Redis, and reports per-route
+    throughput, latency percentiles, error and 429 rates.
+    """
+    # Imported here so --help does not build the application
+    from setara_backend.benchmarks import BenchmarkApp
+    from setara_backend.benchmarks.load import (
+        DEFAULT_MIX,
+        parse_mix,
+        run_load
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Drive concurrent traffic against the app on waitress.",
+        epilog="Example: load_test --clients 32 --duration 30 "
+        "--mix login=1,authenticated=4,home=4,rate_limited=1"
+    )
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=10,
+        help="Seconds of traffic. Defaults to 10."
+    )
+    parser.add_argument(
+        '--clients',
+        type=int,
+        default=16,
+        help="Client threads, each logged in as its own user. Defaults to 16."
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=8,
+        help="Waitress worker threads. Defaults to 8."
+    )
+    parser.add_argument(
+        '--mix',
+        default=','.join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+        help="Weights of the traffic kinds login, authenticated, home and "
+        "rate_limited. Defaults to %(default)s."
+    )
+    parser.add_argument(
+        '--bcrypt-rounds',
+        type=int,
+        default=4,
+        help="Work factor of the users' passwords. Defaults to 4."
+    )
+    parser.add_argument(
+        '--max-error-rate',
+        type=float,
+        default=0.01,
+        help="Fail when a route's error rate (429 excluded) is above this. "
+        "Defaults to 0.01."
+    )
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"❌ Error: {e}.", file=sys.stderr)
+        sys.exit(1)
+
+    # Waitress logs every time its task queue backs up, expected here
+    logging.getLogger('waitress.queue').setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'load.db')}"
+        print(
+            f"Running {args.clients} clients for {args.duration:.0f}s "
+            f"against {args.threads} waitress threads..."
+        )
+        with BenchmarkApp(
+            bcrypt_rounds=args.bcrypt_rounds,
+            database_url=database_url,
+            users=args.clients
+        ) as bench:
+            report = run_load(
+                bench, args.duration, args.clients, mix, threads=args.threads
+            )
+
+    print(
+        f"{'route':<22} {'requests':>8} {'req/s':>8} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'429':>7}"
+    )
+    failed = []
+    for route, stats in report.items():
+        print(
+            f"{route:<22} {stats['requests']:>8} "
+            f"{stats['requests_per_second']:>8.1f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+            f"{stats['error_rate']:>7.1%} {stats['throttled_rate']:>7.1%}"
+        )
+        if stats['error_rate'] > args.max_error_rate:
+            failed.append(route)
+
+    if failed:
+        print(
+            f"❌ Error rate above {args.max_error_rate:.1%} on: "
+            f"{', '.join(failed)}",
+            file=sys.stderr
+        )
+        sys.exit(1)
+    print("✅ Load test finished.")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import cProfile
+import io
+import pstats
+import sys
+import time
+
+from pyramid.paster import get_appsettings, setup_logging
+from setara_backend.scripts.alembic import get_config_file
+
+
+def openapi_seconds(stats: pstats.Stats) -> float:
+    """
+    Time spent in the deferred pyramid_openapi3 actions, i.e. reading and
+    validating the spec and registering the explorer.
+    """
+    total = 0.0
+    for (filename, _, function), entry in stats.stats.items():
+        if function == 'register' and \
+                filename.replace('\\', '/').endswith('pyramid_openapi3/__init__.py'):
+            # entry: (primitive calls, calls, own time, cumulative, callers)
+            total += entry[3]
+    return total
+
+
+def main():  # pragma: no cover
+    """
+    Builds the WSGI app the way a worker does and reports where startup
+    time goes: the package import, each include, the view scan, mapper
+    configuration and the deferred actions, which load the OpenAPI spec.
+    """
+    parser = argparse.ArgumentParser(
+        description="Profile application startup.",
+        epilog="Example: profile_startup -e prod --top 40 --output startup.prof"
+    )
+    parser.add_argument(
+        '-e', '--environment',
+        choices=['dev', 'prod'],
+        default='dev',
+        help="The target environment (dev or prod). Determines the .ini file used."
+    )
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=25,
+        help="Functions listed by cumulative time. Defaults to 25."
+    )
+    parser.add_argument(
+        '--output',
+        help="Also write the raw cProfile stats to this file, e.g. for snakeviz."
+    )
+    args = parser.parse_args()
+
+    config_file = get_config_file(args.environment)
+    setup_logging(config_file)
+    settings = get_appsettings(config_file)
+
+    # This process imported the package already (get_config_file), so time
+    # the import in a fresh interpreter
+    from setara_backend.benchmarks.importtime import (
+        measure_imports,
+        summarize_imports
+    )
+    import_seconds = summarize_imports(
+        measure_imports('import setara_backend')
+    )['total_ms'] / 1000
+
+    from setara_backend import main as make_app
+    from setara_backend.utils.startup import STARTUP_TIMINGS_KEY
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        app = make_app({}, **settings)
+    except Exception as e:
+        profiler.disable()
+        print(f"❌ Error: the app failed to start: {e}", file=sys.stderr)
+        sys.exit(1)
+    profiler.disable()
+    total = time.perf_counter() - started
+
+    stats = pstats.Stats(profiler)
+    timings = app.registry.get(STARTUP_TIMINGS_KEY, {})
+    phases = list(timings.items())
+    # Parts of the phases above, listed under them
+    nested = {
+        'configure_mappers': 'include.services',
+        'openapi spec': 'commit',
+    }
+    timings['openapi spec'] = openapi_seconds(stats)
+
+    print(
+        f"import setara_backend (fresh interpreter): "
+        f"{import_seconds * 1000:.1f} ms"
+    )
+    print(f"Startup of {config_file}: {total * 1000:.1f} ms")
+    for name, seconds in phases:
+        if name in nested:
+            continue
+        print(f"  {name:<28} {seconds * 1000:>9.1f} ms")
+        for part, parent in nested.items():
+            if parent == name:
+                print(f"    {part:<26} {timings[part] * 1000:>9.1f} ms")
+
+    if args.top:
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output) \
+            .sort_stats('cumulative').print_stats(args.top)
+        print(output.getvalue())
+
+    if args.output:
+        stats.dump_stats(args.output)
+        print(f"✅ Profile written to {args.output}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
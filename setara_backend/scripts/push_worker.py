@@ -0,0 +1,112 @@
+import argparse
+import logging
+import socket
+import sys
+import time
+
+import redis
+from pyramid.paster import bootstrap, setup_logging
+from setara_backend.scripts.alembic import get_config_file
+
+log = logging.getLogger(__name__)
+
+
+def main():  # pragma: no cover
+    """
+    Consumes the push:jobs stream and delivers notifications to every device
+    of the targeted users, reporting throughput and queue sizes.
+    """
+    parser = argparse.ArgumentParser(
+        description="Deliver queued push notifications.",
+        epilog="Example: push_worker -e prod --concurrency 32"
+    )
+    parser.add_argument(
+        '-e', '--environment',
+        choices=['dev', 'prod'],
+        default='dev',
+        help="The target environment (dev or prod). Determines the .ini file used."
+    )
+    parser.add_argument(
+        '--consumer',
+        default=socket.gethostname(),
+        help="Consumer name in the push-workers group. Defaults to the hostname."
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        help="Push requests in flight. Defaults to push.concurrency."
+    )
+    parser.add_argument(
+        '--report-every',
+        type=float,
+        default=10.0,
+        help="Seconds between progress reports. Defaults to 10."
+    )
+    args = parser.parse_args()
+
+    config_file = get_config_file(args.environment)
+    setup_logging(config_file)
+
+    # Imported late so --help works without the app's dependencies
+    from setara_backend.repositories import NotificationTokenRepository
+    from setara_backend.services.push import PushDispatcher
+
+    with bootstrap(config_file) as env:
+        registry = env['registry']
+        settings = registry.settings
+        push_url = settings.get('push.url')
+        if not push_url:
+            print(
+                f"❌ Error: push.url is not set in {config_file}.",
+                file=sys.stderr
+            )
+            sys.exit(1)
+
+        headers = {}
+        if settings.get('push.authorization'):
+            headers['Authorization'] = settings['push.authorization']
+
+        dispatcher = PushDispatcher(
+            registry['redis.client'],
+            NotificationTokenRepository(registry['redis.ring']),
+            push_url,
+            headers=headers,
+            batch_size=int(settings.get('push.batch_size', 500)),
+            concurrency=args.concurrency or int(
+                settings.get('push.concurrency', 16)
+            ),
+            max_attempts=int(settings.get('push.max_attempts', 5)),
+            backoff_seconds=float(settings.get('push.backoff_seconds', 2)),
+            timeout_seconds=float(settings.get('push.timeout_seconds', 10)),
+            metrics=registry.get('metrics'),
+        )
+        dispatcher.ensure_group()
+        print(f"✅ Consuming push jobs as '{args.consumer}'. Ctrl+C to stop.")
+
+        last_report = time.monotonic()
+        try:
+            while True:
+                try:
+                    if not dispatcher.run_once(args.consumer):
+                        dispatcher.claim_stale(args.consumer)
+                except redis.RedisError:
+                    # Unacknowledged jobs are picked up again once it is back
+                    log.exception("Redis unavailable, retrying in 1s")
+                    time.sleep(1)
+                if time.monotonic() - last_report >= args.report_every:
+                    stats = dispatcher.stats()
+                    print(
+                        f"sent {stats['sent']} "
+                        f"({stats['sends_per_second']:.1f}/s), "
+                        f"retry queue {stats['retry_queue']}, "
+                        f"dead letters {stats['dead_letters']}"
+                    )
+                    last_report = time.monotonic()
+        except KeyboardInterrupt:
+            print("Stopping, waiting for in-flight batches...")
+        finally:
+            dispatcher.close()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import sys
+import time
+
+from pyramid.paster import bootstrap, setup_logging
+from setara_backend.scripts.alembic import get_config_file
+
+
+def main():  # pragma: no cover
+    """
+    Rebuilds the login identifier Bloom filters in Redis from tblUser.
+    """
+    parser = argparse.ArgumentParser(
+        description="Rebuild the login identifier Bloom filters from tblUser.",
+        epilog="Example: rebuild_identifier_filter -e prod"
+    )
+    parser.add_argument(
+        '-e', '--environment',
+        choices=['dev', 'prod'],
+        default='dev',
+        help="The target environment (dev or prod). Determines the .ini file used."
+    )
+    args = parser.parse_args()
+
+    config_file = get_config_file(args.environment)
+    setup_logging(config_file)
+
+    with bootstrap(config_file) as env:
+        registry = env['registry']
+        identifier_filter = registry.get('identifier_filter')
+        if identifier_filter is None:
+            print(
+                "❌ Error: identifier_filter.enabled is not set in "
+                f"{config_file}.",
+                file=sys.stderr
+            )
+            sys.exit(1)
+
+        started = time.perf_counter()
+        request = env['request']
+        with request.tm:
+            counts = identifier_filter.rebuild(
+                registry['redis.client'], request.dbsession
+            )
+
+    bloom = next(iter(identifier_filter.filters.values()))
+    print(
+        f"Filters: {bloom.num_bits} bits ({bloom.num_bits // 8} bytes), "
+        f"{bloom.num_hashes} hashes each"
+    )
+    for identifier_type, count in counts.items():
+        print(f"  {identifier_type:<10} {count} identifiers")
+    print(
+        f"✅ Rebuilt identifier filters in "
+        f"{time.perf_counter() - started:.1f}s."
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import sys
+
+
+def main():  # pragma: no cover
+    """
+    Benchmarks the HTTP endpoints in process and compares the results with
+    a stored JSON baseline, failing when a path regressed.
+    """
+    # Imported here so --help does not build the application
+    from setara_backend.benchmarks import (
+        SCENARIOS,
+        BenchmarkApp,
+        compare_to_baseline,
+        load_baseline,
+        measure,
+        save_baseline
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark /, /auth/login and /auth/logout.",
+        epilog="Example: run_benchmarks --baseline benchmarks.json --save"
+    )
+    parser.add_argument(
+        'scenarios',
+        nargs='*',
+        help=f"Benchmarks to run, of {', '.join(sorted(SCENARIOS))}. "
+        "Defaults to all of them."
+    )
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=500,
+        help="Timed requests per benchmark. Defaults to 500."
+    )
+    parser.add_argument(
+        '--warmup',
+        type=int,
+        default=50,
+        help="Untimed requests before measuring. Defaults to 50."
+    )
+    parser.add_argument(
+        '--bcrypt-rounds',
+        type=int,
+        default=4,
+        help="Work factor of the benchmark user's password. Defaults to 4."
+    )
+    parser.add_argument(
+        '--baseline',
+        default='benchmarks.json',
+        help="JSON baseline to compare with. Defaults to benchmarks.json."
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.15,
+        help="Allowed slowdown before failing, 0.15 = 15%%. Defaults to 0.15."
+    )
+    parser.add_argument(
+        '--save',
+        action='store_true',
+        help="Store the results as the new baseline."
+    )
+    args = parser.parse_args()
+
+    names = args.scenarios or sorted(SCENARIOS)
+    unknown = sorted(set(names) - set(SCENARIOS))
+    if unknown:
+        print(
+            f"❌ Error: unknown benchmark(s): {', '.join(unknown)}.",
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+    results = {}
+    print(
+        f"{'benchmark':<10} {'ops/s':>9} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    with BenchmarkApp(bcrypt_rounds=args.bcrypt_rounds) as bench:
+        for name in names:
+            result = measure(
+                SCENARIOS[name], bench, args.iterations, args.warmup
+            )
+            results[name] = result
+            print(
+                f"{name:<10} {result['ops_per_second']:>9.1f} "
+                f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                f"{result['p99_ms']:>8.2f} {result['max_ms']:>8.2f}"
+            )
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+
+    if args.save:
+        # Keep baselines of benchmarks that were not run this time
+        save_baseline(args.baseline, dict(baseline, **results))
+        print(f"✅ Baseline saved to {args.baseline}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline}, run with --save to store one.")
+
+    if regressions:
+        for regression in regressions:
+            print(f"❌ Regression: {regression}", file=sys.stderr)
+        sys.exit(1)
+    if baseline:
+        print(f"✅ No regression beyond {args.threshold:.0%} of the baseline.")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -1,18 +1,49 @@
 from .auth import AuthService
+from .container import RequestContainer
+from .lockout import LoginLockout
+from setara_backend.utils import AttemptMemo, MetricsRegistry
 
 
 def includeme(config):
     """
     This master 'includeme' orchestrates the setup of all services.
     """
+    # In-process metrics shared by the services of this worker
+    metrics = MetricsRegistry()
+    config.registry['metrics'] = metrics
+
     # Include the database service
     config.include('.database')
 
     # Include the redis service
     config.include('.redis')
 
+    # Include the login identifier Bloom filters
+    config.include('.identifier_filter')
+
+    # Include write-behind of the user login state
+    config.include('.login_state')
+
+    # Include the buffered login event log
+    config.include('.login_events')
+
     # Include Auth Service in request
-    auth_service = AuthService(config.get_settings())
+    auth_service = AuthService(config.get_settings(), metrics)
     config.add_request_method(
         lambda r: auth_service, 'auth_service', reify=True
     )
+
+    # Include failed-login lockout in request
+    login_lockout = LoginLockout(config.get_settings(), metrics)
+    config.registry['login_lockout'] = login_lockout
+    config.add_request_method(
+        lambda r: login_lockout, 'login_lockout', reify=True
+    )
+
+    # Include the retry-attempt memo in request
+    config.add_request_method(
+        lambda r: AttemptMemo(r.environ, metrics), 'attempt_memo', reify=True
+    )
+
+    # Include the lazy per-request dependency container
+    config.add_request_method(RequestContainer, 'container', reify=True)
@@ -1,30 +1,63 @@
 import jwt
+import time
 import bcrypt
 from datetime import datetime, UTC
 from setara_backend.utils import UserMapper
 from setara_backend.models import TblUser
 
+# Same work factor bcrypt.gensalt() uses when none is given
+DEFAULT_BCRYPT_ROUNDS = 12
+
+
+def get_bcrypt_rounds(hashed_password: str):
+    """Returns the work factor encoded in a bcrypt hash ($2b$<rounds>$...)."""
+    try:
+        return int(hashed_password.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
 
 class AuthService:
     """
     A service class to handle all authentication-related business logic
     """
 
-    def __init__(self, settings):
+    def __init__(self, settings, metrics=None):
         self.secret = settings['auth.secret']
         self.algorithm = settings['auth.algorithm']
+        self.bcrypt_rounds = int(
+            settings.get('auth.bcrypt_rounds', DEFAULT_BCRYPT_ROUNDS)
+        )
+        self.metrics = metrics
 
     def hash_password(self, plain_text_password: str) -> str:
-        """Hashes a password using bcrypt."""
+        """Hashes a password using bcrypt with the configured work factor."""
         password_bytes = plain_text_password.encode('utf-8')
-        hashed_bytes = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
+        hashed_bytes = bcrypt.hashpw(
+            password_bytes, bcrypt.gensalt(rounds=self.bcrypt_rounds)
+        )
         return hashed_bytes.decode('utf-8')
 
     def check_password(self, plain_text_password: str, hashed_password: str) -> bool:
         """Checks a plain-text password against a stored bcrypt hash."""
         password_bytes = plain_text_password.encode('utf-8')
         hashed_bytes = hashed_password.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
+        started = time.perf_counter()
+        result = bcrypt.checkpw(password_bytes, hashed_bytes)
+        if self.metrics:
+            self.metrics.observe(
+                'auth.bcrypt.check', time.perf_counter() - started
+            )
+        return result
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """
+        Checks whether a stored bcrypt hash was produced with a work factor
+        other than the configured one, so it can be upgraded (or downgraded)
+        after the next successful login.
+        """
+        rounds = get_bcrypt_rounds(hashed_password)
+        return rounds is not None and rounds != self.bcrypt_rounds
 
     def generate_access_token(self, user: TblUser, payload: dict) -> str:
         """Generates a JWT access token."""
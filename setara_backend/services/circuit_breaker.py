@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    A thread-safe circuit breaker shared by every thread of a worker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately with CircuitOpenError. Once ``reset_seconds`` have
+    passed a single trial call is let through (half-open); its outcome closes
+    the circuit again or re-opens it for another period.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_seconds: float = 10,
+        failure_exceptions=(Exception,),
+        metrics=None,
+        clock=time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failure_exceptions = failure_exceptions
+        self.metrics = metrics
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return self.CLOSED
+            if self.clock() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self.OPEN
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self.clock() - self._opened_at < self.reset_seconds:
+                return False
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def _record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                log.info('Circuit %s closed', self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            was_trial = self._trial_running
+            self._trial_running = False
+            if was_trial or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    log.warning(
+                        'Circuit %s opened after %s consecutive failures',
+                        self.name, self._failures
+                    )
+                    if self.metrics:
+                        self.metrics.incr(f"{self.name}.breaker.opened")
+                self._opened_at = self.clock()
+
+    def call(self, func, *args, **kwargs):
+        if not self._acquire():
+            if self.metrics:
+                self.metrics.incr(f"{self.name}.breaker.rejected")
+            raise CircuitOpenError(f"circuit {self.name} is open")
+
+        try:
+            result = func(*args, **kwargs)
+        except self.failure_exceptions:
+            self._record_failure()
+            raise
+        except BaseException:
+            # Not a backend failure (e.g. a bad command), do not hold the trial
+            with self._lock:
+                self._trial_running = False
+            raise
+
+        self._record_success()
+        return result
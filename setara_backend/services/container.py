@@ -0,0 +1,49 @@
+from functools import cached_property
+from setara_backend.handlers.auth import AuthHandler
+from setara_backend.repositories import (
+    NotificationTokenRepository,
+    RedisRepository,
+    UserRepository
+)
+
+
+class RequestContainer:
+    """
+    Per-request repositories and handlers, each built on first use.
+
+    Reified as ``request.container``. Nothing is instantiated up front, so a
+    request that never reaches the database (rejected by the rate limiter or
+    the auth policy, cached, ...) never creates a session or joins the
+    transaction.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    @cached_property
+    def user_repository(self) -> UserRepository:
+        return UserRepository(
+            self.request.dbsession,
+            login_state=self.request.registry.get('login_state')
+        )
+
+    @cached_property
+    def redis_repository(self) -> RedisRepository:
+        """Sharded keyspaces; Redis errors read as an empty result."""
+        return RedisRepository(self.request.redis_shards)
+
+    @cached_property
+    def guarded_redis_repository(self) -> RedisRepository:
+        """Sharded keyspaces behind the circuit breaker; errors are raised."""
+        return RedisRepository(
+            self.request.redis_shards,
+            self.request.registry.get('redis.breaker')
+        )
+
+    @cached_property
+    def notification_token_repository(self) -> NotificationTokenRepository:
+        return NotificationTokenRepository(self.request.redis_shards)
+
+    @cached_property
+    def auth_handler(self) -> AuthHandler:
+        return AuthHandler(self)
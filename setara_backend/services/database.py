@@ -1,22 +1,190 @@
-from sqlalchemy import engine_from_config
-from sqlalchemy.orm import sessionmaker, configure_mappers
+import itertools
+import time
+from pyramid.events import NewRequest
+from pyramid.settings import aslist
+from pyramid_retry import IBeforeRetry
+from sqlalchemy import engine_from_config, event
+from sqlalchemy.orm import Session, sessionmaker, configure_mappers
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.elements import TextClause
 import zope.sqlalchemy
+from setara_backend.models.user import set_user_id_version
+from setara_backend.utils.startup import startup_phase
 
 
-def get_engine(settings, prefix='sqlalchemy.'):
+def instrumented_pool_class(metrics):
+    """
+    Returns a QueuePool subclass that records how long each checkout waited
+    for a connection. The metrics are bound to the class so they survive
+    pool re-creation on engine.dispose().
+    """
+    class InstrumentedQueuePool(QueuePool):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                metrics.observe(
+                    'db.pool.wait', time.perf_counter() - started
+                )
+
+    return InstrumentedQueuePool
+
+
+def get_engine(settings, prefix='sqlalchemy.', metrics=None):
     engine = settings.get('db.engine')
     if engine:
         return engine
 
-    return engine_from_config(settings, prefix)  # pragma: no cover
+    kwargs = {}
+    if metrics:  # pragma: no cover
+        kwargs['poolclass'] = instrumented_pool_class(metrics)
+    # sqlalchemy.replica.* configure the replicas, create_engine() rejects
+    # them
+    primary_settings = {
+        key: value for key, value in settings.items()
+        if not key.startswith(f"{prefix}replica.")
+    }
+    return engine_from_config(primary_settings, prefix, **kwargs)
+
 
+def get_replica_engines(settings, prefix='sqlalchemy.', metrics=None) -> list:
+    """
+    Creates one engine per URL in sqlalchemy.replica.urls. Replicas take the
+    primary's engine options, overridden by sqlalchemy.replica.<option>.
+    """
+    engines = settings.get('db.replica_engines')
+    if engines is not None:
+        return list(engines)
+
+    replica_prefix = f"{prefix}replica."
+    options = {
+        key[len(prefix):]: value
+        for key, value in settings.items()
+        if key.startswith(prefix) and not key.startswith(replica_prefix)
+    }
+    options.update({
+        key[len(replica_prefix):]: value
+        for key, value in settings.items()
+        if key.startswith(replica_prefix) and key != f"{replica_prefix}urls"
+    })
+
+    kwargs = {}
+    if metrics:
+        kwargs['poolclass'] = instrumented_pool_class(metrics)
+    return [
+        engine_from_config(dict(options, url=url), '', **kwargs)
+        for url in aslist(settings.get(f"{replica_prefix}urls", ''))
+    ]
+
+
+def instrument_engine(engine, name: str, metrics) -> None:
+    """Counts the statements each engine ran as db.queries.<name>."""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        metrics.incr(f"db.queries.{name}")
+
+
+class RoutingSession(Session):
+    """
+    A session that sends reads to a replica until the first write.
+
+    SELECTs outside a write go to the replica picked for this session, so
+    one request never mixes two replicas. A flush, DML statement, SELECT ...
+    FOR UPDATE or textual SQL goes to the primary and pins the rest of the
+    session to it, so a request always reads its own writes.
+    """
+
+    def __init__(self, bind=None, replicas=None, **kwargs):
+        super().__init__(bind=bind, **kwargs)
+        self.primary = bind
+        self.replica = next(replicas) if replicas else None
+        self.pinned = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.replica is None or self.pinned:
+            return self.primary
+        if (
+            self._flushing
+            or clause is None
+            or getattr(clause, 'is_dml', False)
+            or isinstance(clause, TextClause)
+            or getattr(clause, '_for_update_arg', None) is not None
+        ):
+            self.pinned = True
+            return self.primary
+        return self.replica
+
+
+def get_pool_stats(engine) -> dict:
+    """Reports the engine's pool occupancy, whatever the pool class."""
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    for key, name in (
+        ('size', 'size'),
+        ('checked_out', 'checkedout'),
+        ('idle', 'checkedin'),
+        ('overflow', 'overflow'),
+    ):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[key] = method()
+    if hasattr(pool, '_max_overflow'):
+        stats['max_overflow'] = pool._max_overflow
+    return stats
+
+
+def warmup_engine(engine, count: int) -> int:
+    """
+    Opens up to ``count`` pooled connections at once and returns them to the
+    pool, so the first requests after boot do not pay for connecting.
+    Returns the number of connections opened.
+    """
+    size = getattr(engine.pool, 'size', None)
+    if callable(size):
+        # Connections past the pool size are discarded on check-in
+        count = min(count, size())
+
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.raw_connection())
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+def get_session_factory(engine, replicas=None):
+    if replicas:
+        # Sessions take the replicas in turn
+        return sessionmaker(
+            class_=RoutingSession,
+            bind=engine,
+            replicas=itertools.cycle(replicas)
+        )
 
-def get_session_factory(engine):
     factory = sessionmaker()
     factory.configure(bind=engine)
     return factory
 
 
+def count_attempts(metrics):
+    """
+    Returns subscribers counting logical requests and their retries, so the
+    retry rate is retry.retries / retry.requests.
+    """
+    def on_new_request(event):
+        if not event.request.environ.get('retry.attempt'):
+            metrics.incr('retry.requests')
+
+    def on_before_retry(event):
+        metrics.incr('retry.retries')
+        metrics.incr(f"retry.retries.{type(event.exception).__name__}")
+
+    return on_new_request, on_before_retry
+
+
 def get_tm_session(session_factory, transaction_manager):
     dbsession = session_factory()
     zope.sqlalchemy.register(
@@ -39,7 +207,27 @@ def includeme(config):
     # Use pyramid_retry to retry a request when transient exceptions occur
     config.include('pyramid_retry')
 
-    session_factory = get_session_factory(get_engine(settings))
+    metrics = config.registry.get('metrics')
+    if metrics:
+        on_new_request, on_before_retry = count_attempts(metrics)
+        config.add_subscriber(on_new_request, NewRequest)
+        config.add_subscriber(on_before_retry, IBeforeRetry)
+
+    engine = get_engine(settings, metrics=metrics)
+    config.registry['db.engine'] = engine
+
+    # Read-only queries may be served by replicas
+    replicas = get_replica_engines(settings, metrics=metrics)
+    config.registry['db.replica_engines'] = replicas
+
+    if metrics:
+        instrument_engine(engine, 'primary', metrics)
+        for index, replica in enumerate(replicas):
+            instrument_engine(replica, f"replica{index}", metrics)
+
+    # Tests pass a factory bound to their own transaction
+    session_factory = settings.get('db.session_factory') or \
+        get_session_factory(engine, replicas)
     config.registry['dbsession_factory'] = session_factory
 
     # make request.dbsession available for use in Pyramid
@@ -50,4 +238,11 @@ def includeme(config):
         reify=True
     )
 
-    configure_mappers()
+    set_user_id_version(settings.get('db.user_id_version', 'uuid7'))
+
+    with startup_phase(config.registry, 'configure_mappers'):
+        configure_mappers()
+
+    warmup_connections = int(settings.get('db.warmup_connections', 0))
+    if warmup_connections:
+        warmup_engine(engine, warmup_connections)
@@ -0,0 +1,268 @@
+import hashlib
+import logging
+import math
+from datetime import timedelta
+import redis
+from pyramid.settings import asbool
+from sqlalchemy import event, func, inspect, or_, select
+from setara_backend.models import TblUser
+
+log = logging.getLogger(__name__)
+
+# Login method -> tblUser column holding that identifier
+IDENTIFIER_COLUMNS = {
+    'phone': 'user_phone',
+    'username': 'user_username',
+    'email': 'user_email',
+}
+
+
+def bloom_parameters(capacity: int, error_rate: float, max_bytes: int):
+    """
+    Returns (num_bits, num_hashes) for a Bloom filter holding ``capacity``
+    items at ``error_rate`` false positives, never exceeding ``max_bytes``.
+    When the budget is too small the filter is capped and the false positive
+    rate rises accordingly.
+    """
+    num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    if num_bits > max_bytes * 8:
+        num_bits = max_bytes * 8
+        log.warning(
+            'Identifier filter capped at %s bytes, expected false positive '
+            'rate is now %.4f', max_bytes,
+            expected_error_rate(num_bits, capacity)
+        )
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+def expected_error_rate(num_bits: int, capacity: int) -> float:
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return (1 - math.exp(-num_hashes * capacity / num_bits)) ** num_hashes
+
+
+class BloomFilter:
+    """
+    A Bloom filter stored as a Redis bitmap, shared by every worker.
+    The sizing is part of the key, so changing it simply points the app at
+    a filter that has not been built yet.
+    """
+
+    def __init__(self, name: str, num_bits: int, num_hashes: int):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.key = f"bloom:{name}:{num_bits}:{num_hashes}"
+
+    def offsets(self, value: str) -> list:
+        digest = hashlib.blake2b(
+            value.encode('utf-8'), digest_size=16
+        ).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return [
+            (first + i * second) % self.num_bits
+            for i in range(self.num_hashes)
+        ]
+
+    def might_contain(self, redis_conn, value: str):
+        """
+        Returns False when the value was definitely never added, True when it
+        might have been, and None when the filter has not been built.
+        """
+        pipeline = redis_conn.pipeline(transaction=False)
+        pipeline.exists(self.key)
+        for offset in self.offsets(value):
+            pipeline.getbit(self.key, offset)
+        exists, *bits = pipeline.execute()
+
+        if not exists:
+            return None
+        return all(bits)
+
+    def add(self, redis_conn, values, attempts: int = 5) -> bool:
+        """
+        Sets the values' bits, only if the filter is built. SETBIT on a
+        missing key would create a filter holding just these values, which
+        lookups would then trust. Returns whether the filter was updated.
+        """
+        offsets = [
+            offset for value in values for offset in self.offsets(value)
+        ]
+        with redis_conn.pipeline() as pipeline:
+            for _ in range(attempts):
+                try:
+                    # Fails the transaction if the key is dropped or swapped
+                    pipeline.watch(self.key)
+                    if not pipeline.exists(self.key):
+                        pipeline.unwatch()
+                        return False
+                    pipeline.multi()
+                    for offset in offsets:
+                        pipeline.setbit(self.key, offset, 1)
+                    pipeline.execute()
+                    return True
+                except redis.WatchError:
+                    continue
+        raise redis.WatchError(f"{self.key} kept changing")
+
+    def new_bitmap(self) -> bytearray:
+        return bytearray(math.ceil(self.num_bits / 8))
+
+    def set_bits(self, bitmap: bytearray, value: str) -> None:
+        """Sets the value's bits in-process, in Redis' big-endian bit order."""
+        for offset in self.offsets(value):
+            bitmap[offset >> 3] |= 0x80 >> (offset & 7)
+
+
+class IdentifierFilter:
+    """
+    One Bloom filter per login identifier type (phone, username, email),
+    used to answer logins for unknown identifiers without a database query.
+
+    The filters only ever produce false positives: a missing filter, a Redis
+    error or a possible match all fall through to the database.
+    """
+
+    def __init__(self, settings, metrics=None):
+        capacity = int(settings.get('identifier_filter.capacity', 1000000))
+        error_rate = float(settings.get('identifier_filter.error_rate', 0.01))
+        max_bytes = int(settings.get('identifier_filter.max_bytes', 4194304))
+        num_bits, num_hashes = bloom_parameters(
+            capacity, error_rate, max_bytes
+        )
+
+        self.filters = {
+            identifier_type: BloomFilter(
+                f"user_{identifier_type}", num_bits, num_hashes
+            )
+            for identifier_type in IDENTIFIER_COLUMNS
+        }
+        self.metrics = metrics
+
+    def might_exist(self, redis_conn, identifier_type, identifier) -> bool:
+        bloom = self.filters.get(identifier_type)
+        if bloom is None or not identifier:
+            return True
+
+        try:
+            result = bloom.might_contain(redis_conn, identifier)
+        except Exception as e:
+            return True
+
+        if result is False:
+            if self.metrics:
+                self.metrics.incr('identifier_filter.rejected')
+            return False
+        return True
+
+    def add_identifiers(self, redis_conn, identifiers: dict) -> None:
+        """Adds {identifier_type: [values]} to the filters."""
+        try:
+            for identifier_type, values in identifiers.items():
+                values = [value for value in values if value]
+                if values:
+                    self.filters[identifier_type].add(redis_conn, values)
+        except Exception as e:
+            # A filter missing a user would reject a valid login, drop the
+            # filters so lookups fall back to the database until a rebuild
+            log.error(
+                'Failed to update identifier filter, dropping it until the '
+                'next rebuild: %s', e
+            )
+            try:
+                redis_conn.delete(
+                    *[bloom.key for bloom in self.filters.values()]
+                )
+            except Exception as e:
+                pass
+
+    def rebuild(self, redis_conn, session) -> dict:
+        """
+        Rebuilds every filter from tblUser and atomically swaps it in.
+        Returns the number of identifiers loaded per type.
+        """
+        started_at = session.execute(select(func.now())).scalar()
+        columns = [
+            getattr(TblUser, column) for column in IDENTIFIER_COLUMNS.values()
+        ]
+        rows = session.execute(
+            select(*columns).execution_options(yield_per=5000)
+        )
+
+        bitmaps = {
+            identifier_type: bloom.new_bitmap()
+            for identifier_type, bloom in self.filters.items()
+        }
+        counts = dict.fromkeys(self.filters, 0)
+        for row in rows:
+            for identifier_type, value in zip(IDENTIFIER_COLUMNS, row):
+                if value:
+                    self.filters[identifier_type].set_bits(
+                        bitmaps[identifier_type], value
+                    )
+                    counts[identifier_type] += 1
+
+        for identifier_type, bloom in self.filters.items():
+            building_key = f"{bloom.key}:building"
+            redis_conn.set(building_key, bytes(bitmaps[identifier_type]))
+            redis_conn.rename(building_key, bloom.key)
+
+        # Users created, or whose identifiers changed, while the bitmaps were
+        # built went to the old keys
+        since = started_at - timedelta(minutes=5)
+        recent = session.execute(
+            select(*columns).where(or_(
+                TblUser.user_created_at >= since,
+                TblUser.user_updated_at >= since
+            ))
+        ).all()
+        self.add_identifiers(redis_conn, {
+            identifier_type: [row[index] for row in recent]
+            for index, identifier_type in enumerate(IDENTIFIER_COLUMNS)
+        })
+        return counts
+
+
+def track_identifier_changes(session_factory, identifier_filter, redis_conn):
+    """
+    Keeps the filters up to date with users created, or whose identifiers
+    changed, through sessions made by ``session_factory``.
+    """
+    @event.listens_for(session_factory, 'after_flush')
+    def add_flushed_identifiers(session, flush_context):
+        identifiers = {
+            identifier_type: [] for identifier_type in IDENTIFIER_COLUMNS
+        }
+        for user in list(session.new) + list(session.dirty):
+            if not isinstance(user, TblUser):
+                continue
+            state = inspect(user)
+            for identifier_type, column in IDENTIFIER_COLUMNS.items():
+                if user in session.new or state.attrs[column].history.added:
+                    identifiers[identifier_type].append(getattr(user, column))
+        identifier_filter.add_identifiers(redis_conn, identifiers)
+
+    return add_flushed_identifiers
+
+
+def includeme(config):
+    """
+    Sets up the login identifier Bloom filters when enabled.
+    """
+    settings = config.get_settings()
+
+    identifier_filter = None
+    if asbool(settings.get('identifier_filter.enabled', False)):
+        identifier_filter = IdentifierFilter(
+            settings, config.registry.get('metrics')
+        )
+        track_identifier_changes(
+            config.registry['dbsession_factory'],
+            identifier_filter,
+            config.registry['redis.client']
+        )
+    config.registry['identifier_filter'] = identifier_filter
+
+    config.add_request_method(
+        lambda r: identifier_filter, 'identifier_filter', reify=True
+    )
@@ -0,0 +1,133 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+from pyramid.settings import asbool
+from setara_backend.models import TblLoginEvent
+
+log = logging.getLogger(__name__)
+
+
+class LoginEventBuffer:
+    """
+    A bounded in-process buffer of login events, written to tblLoginEvent in
+    bulk by a background thread instead of one INSERT per login.
+
+    The thread flushes every ``flush_interval`` seconds, or as soon as
+    ``batch_size`` events are waiting. When the database falls behind and
+    ``max_size`` events are buffered, new events are dropped and counted
+    rather than slowing logins down.
+    """
+
+    def __init__(self, settings, engine, metrics=None):
+        self.engine = engine
+        self.metrics = metrics
+        self.max_size = int(settings.get('login_events.buffer_size', 10000))
+        self.batch_size = int(settings.get('login_events.batch_size', 500))
+        self.flush_interval = float(
+            settings.get('login_events.flush_interval_seconds', 2)
+        )
+
+        self._lock = threading.Lock()
+        self._events = []
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._events)
+
+    def enqueue(self, **event) -> bool:
+        """Buffers one row of tblLoginEvent; returns False if it was dropped."""
+        event.setdefault('login_event_created_at', datetime.now())
+        with self._lock:
+            if len(self._events) >= self.max_size:
+                dropped = True
+            else:
+                dropped = False
+                self._events.append(event)
+                size = len(self._events)
+
+        if self.metrics:
+            self.metrics.incr(
+                'login_events.dropped' if dropped else 'login_events.enqueued'
+            )
+        if dropped:
+            return False
+        if size >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def flush(self) -> int:
+        """Writes every buffered event; returns how many were written."""
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            with self.engine.begin() as connection:
+                for index in range(0, len(events), self.batch_size):
+                    # A list of parameters runs as one executemany
+                    connection.execute(
+                        TblLoginEvent.__table__.insert(),
+                        events[index:index + self.batch_size]
+                    )
+        except Exception as e:
+            log.exception('Dropped %s login events', len(events))
+            if self.metrics:
+                self.metrics.incr('login_events.failed', len(events))
+            return 0
+
+        if self.metrics:
+            self.metrics.incr('login_events.written', len(events))
+            self.metrics.observe(
+                'login_events.flush', time.perf_counter() - started
+            )
+        return len(events)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name='login-event-writer', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the writer thread and flushes what is still buffered."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+def includeme(config):
+    """
+    Sets up the login event log when login_events.enabled is on.
+    """
+    settings = config.get_settings()
+
+    login_events = None
+    if asbool(settings.get('login_events.enabled', False)):
+        login_events = LoginEventBuffer(
+            settings,
+            config.registry['db.engine'],
+            config.registry.get('metrics')
+        )
+        login_events.start()
+        # Worker shutdown
+        atexit.register(login_events.stop)
+    config.registry['login_events'] = login_events
+
+    config.add_request_method(
+        lambda r: login_events, 'login_events', reify=True
+    )
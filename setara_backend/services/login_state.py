@@ -0,0 +1,173 @@
+import atexit
+import logging
+import threading
+import time
+import redis
+from pyramid.settings import asbool
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+from setara_backend.models import TblUser
+
+log = logging.getLogger(__name__)
+
+
+class LoginStateWriter:
+    """
+    Write-behind store for tblUser.user_is_login.
+
+    Logins and logouts only record the new state in a Redis hash
+    (user_id -> '1'/'0'). A background flusher periodically renames the hash
+    aside and applies it with one multi-row UPDATE per state and batch, so
+    a shift change of thousands of logins does not contend on tblUser rows
+    inside the request transactions. user_updated_at is set at flush time.
+
+    Until a change is flushed, reads merge it through ``overlay``.
+    """
+
+    PENDING_KEY = 'login_state:pending'
+    FLUSHING_KEY = 'login_state:flushing'
+    LOCK_KEY = 'login_state:flush_lock'
+
+    def __init__(self, settings, redis_conn, metrics=None):
+        self.redis = redis_conn
+        self.metrics = metrics
+        self.interval = float(
+            settings.get('login_state.flush_interval_seconds', 1)
+        )
+        self.batch_size = int(settings.get('login_state.batch_size', 500))
+
+    def record(self, user_id, is_login: bool) -> None:
+        self.redis.hset(self.PENDING_KEY, str(user_id), int(is_login))
+
+    def pending(self, user_ids) -> dict:
+        """Returns the unflushed state of the given users, newest first."""
+        user_ids = [str(user_id) for user_id in user_ids]
+        if not user_ids:
+            return {}
+
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.hmget(self.FLUSHING_KEY, user_ids)
+        pipeline.hmget(self.PENDING_KEY, user_ids)
+        flushing, pending = pipeline.execute()
+
+        state = {}
+        for user_id, older, newer in zip(user_ids, flushing, pending):
+            value = newer if newer is not None else older
+            if value is not None:
+                state[user_id] = value in (b'1', '1')
+        return state
+
+    def overlay(self, users) -> None:
+        """Applies unflushed state to loaded users, without dirtying them."""
+        users = [user for user in users if user is not None]
+        try:
+            state = self.pending([user.user_id for user in users])
+        except redis.RedisError as e:
+            log.warning('Cannot read pending login state: %s', e)
+            return
+
+        for user in users:
+            if str(user.user_id) in state:
+                set_committed_value(
+                    user, 'user_is_login', state[str(user.user_id)]
+                )
+
+    def flush(self, session_factory) -> int:
+        """
+        Applies the pending changes to the database and returns how many
+        users were updated. A batch left behind by a failed flush is retried
+        before newer changes are taken, so the order of changes is kept.
+        """
+        token = str(time.time())
+        if not self.redis.set(self.LOCK_KEY, token, nx=True, ex=60):
+            # Another worker is flushing
+            return 0
+
+        try:
+            if not self.redis.exists(self.FLUSHING_KEY):
+                try:
+                    self.redis.rename(self.PENDING_KEY, self.FLUSHING_KEY)
+                except redis.ResponseError:
+                    # Nothing pending
+                    return 0
+
+            changes = self.redis.hgetall(self.FLUSHING_KEY)
+            by_state = {True: [], False: []}
+            for user_id, value in changes.items():
+                by_state[value == b'1'].append(user_id.decode('utf-8'))
+
+            started = time.perf_counter()
+            with session_factory() as session, session.begin():
+                for is_login, user_ids in by_state.items():
+                    for index in range(0, len(user_ids), self.batch_size):
+                        session.execute(
+                            update(TblUser)
+                            .where(TblUser.user_id.in_(
+                                user_ids[index:index + self.batch_size]
+                            ))
+                            .values(user_is_login=is_login)
+                            .execution_options(synchronize_session=False)
+                        )
+            self.redis.delete(self.FLUSHING_KEY)
+
+            if self.metrics:
+                self.metrics.incr('login_state.flushed', len(changes))
+                self.metrics.observe(
+                    'login_state.flush', time.perf_counter() - started
+                )
+            return len(changes)
+        finally:
+            if self.redis.get(self.LOCK_KEY) == token.encode('utf-8'):
+                self.redis.delete(self.LOCK_KEY)
+
+
+class LoginStateFlusher(threading.Thread):
+    """Daemon thread flushing a LoginStateWriter every interval."""
+
+    def __init__(self, writer: LoginStateWriter, session_factory):
+        super().__init__(name='login-state-flusher', daemon=True)
+        self.writer = writer
+        self.session_factory = session_factory
+        self.stopped = threading.Event()
+
+    def flush(self) -> None:
+        try:
+            self.writer.flush(self.session_factory)
+        except Exception as e:
+            log.exception('Login state flush failed')
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.writer.interval):
+            self.flush()
+
+    def stop(self) -> None:
+        """Stops the thread and flushes what is still pending."""
+        self.stopped.set()
+        self.flush()
+
+
+def includeme(config):
+    """
+    Sets up write-behind of user_is_login when login_state.write_behind is on.
+    """
+    settings = config.get_settings()
+
+    writer = None
+    if asbool(settings.get('login_state.write_behind', False)):
+        writer = LoginStateWriter(
+            settings,
+            config.registry['redis.client'],
+            config.registry.get('metrics')
+        )
+        if asbool(settings.get('login_state.start_flusher', True)):
+            flusher = LoginStateFlusher(
+                writer, sessionmaker(bind=config.registry['db.engine'])
+            )
+            flusher.start()
+            atexit.register(flusher.stop)
+    config.registry['login_state'] = writer
+
+    config.add_request_method(
+        lambda r: writer, 'login_state', reify=True
+    )
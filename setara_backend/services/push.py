@@ -0,0 +1,337 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import redis
+import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+JOBS_STREAM = 'push:jobs'
+CONSUMER_GROUP = 'push-workers'
+RETRY_QUEUE = 'push:retry'
+DEAD_LETTER_STREAM = 'push:dead'
+
+
+def enqueue_notification(redis_conn, user_ids, title: str, body: str, data: dict = None) -> str:
+    """
+    Queues a notification for every device of the given users and returns
+    the job id. Delivery is done by the push_worker console script.
+    """
+    return redis_conn.xadd(JOBS_STREAM, {
+        'user_ids': json.dumps([str(user_id) for user_id in user_ids]),
+        'notification': json.dumps({'title': title, 'body': body}),
+        'data': json.dumps(data or {}),
+    }).decode('utf-8')
+
+
+def create_http_session(concurrency: int) -> requests.Session:
+    """A session keeping one pooled keep-alive connection per worker thread."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=concurrency, max_retries=0
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class PushDispatcher:
+    """
+    Fans notification jobs out to a batch push endpoint.
+
+    Jobs are read from the push:jobs stream with a consumer group, so several
+    workers share the load and a crashed worker's jobs are claimed again. Each
+    job's tokens are streamed from the notification_token hashes and POSTed
+    ``batch_size`` at a time, at most ``concurrency`` requests in flight.
+
+    The endpoint receives {"tokens": [...], "notification": {...},
+    "data": {...}} and answers {"failed": [{"token": ..., "retryable":
+    bool}]}. Retryable failures (and 429/5xx or network errors for the whole
+    batch) wait in the push:retry sorted set with exponential backoff; after
+    ``max_attempts`` they go to the push:dead stream. So does a job that
+    fails ``max_attempts`` deliveries, e.g. one that cannot be parsed.
+    """
+
+    def __init__(
+        self,
+        redis_conn,
+        token_repository,
+        push_url: str,
+        http_session=None,
+        headers: dict = None,
+        batch_size: int = 500,
+        concurrency: int = 16,
+        max_attempts: int = 5,
+        backoff_seconds: float = 2,
+        timeout_seconds: float = 10,
+        metrics=None,
+        clock=time.time,
+    ):
+        self.redis = redis_conn
+        self.token_repository = token_repository
+        self.push_url = push_url
+        self.http = http_session or create_http_session(concurrency)
+        self.headers = headers or {}
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.metrics = metrics
+        self.clock = clock
+        self.executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='push'
+        )
+        self.started_at = clock()
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def ensure_group(self) -> None:
+        try:
+            self.redis.xgroup_create(
+                JOBS_STREAM, CONSUMER_GROUP, id='0', mkstream=True
+            )
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def _incr(self, name: str, value: int = 1) -> None:
+        if self.metrics:
+            self.metrics.incr(f"push.{name}", value)
+
+    def send_batch(self, tokens: list, message: dict, attempt: int = 1) -> int:
+        """Sends one batch; returns how many tokens were delivered."""
+        started = time.perf_counter()
+        retry, dead = [], []
+        try:
+            response = self.http.post(
+                self.push_url,
+                json=dict(message, tokens=tokens),
+                headers=self.headers,
+                timeout=self.timeout_seconds,
+            )
+            if response.status_code == 429 or response.status_code >= 500:
+                retry = list(tokens)
+            elif response.status_code >= 400:
+                log.error(
+                    'Push endpoint rejected a batch: %s %s',
+                    response.status_code, response.text[:200]
+                )
+                dead = list(tokens)
+            else:
+                for failure in response.json().get('failed', []):
+                    if failure.get('retryable'):
+                        retry.append(failure['token'])
+                    else:
+                        dead.append(failure['token'])
+        except requests.RequestException as e:
+            log.warning('Push batch failed: %s', e)
+            retry = list(tokens)
+        finally:
+            if self.metrics:
+                self.metrics.observe(
+                    'push.request', time.perf_counter() - started
+                )
+
+        if retry and attempt >= self.max_attempts:
+            dead, retry = dead + retry, []
+        if retry:
+            self.schedule_retry(retry, message, attempt + 1)
+        if dead:
+            self.dead_letter(dead, message, attempt)
+
+        delivered = len(tokens) - len(retry) - len(dead)
+        with self._lock:
+            self.sent += delivered
+        self._incr('sent', delivered)
+        return delivered
+
+    def schedule_retry(self, tokens: list, message: dict, attempt: int) -> None:
+        due = self.clock() + self.backoff_seconds * 2 ** (attempt - 2)
+        self.redis.zadd(RETRY_QUEUE, {
+            json.dumps({
+                'tokens': tokens, 'message': message, 'attempt': attempt,
+            }): due
+        })
+        self._incr('retried', len(tokens))
+
+    def dead_letter(self, tokens: list, message: dict, attempt: int) -> None:
+        self.redis.xadd(DEAD_LETTER_STREAM, {
+            'tokens': json.dumps(tokens),
+            'message': json.dumps(message),
+            'attempts': attempt,
+        })
+        self._incr('dead', len(tokens))
+
+    def _batches(self, user_ids):
+        batch = []
+        for _, tokens in self.token_repository.iter_tokens(
+            user_ids, batch_size=self.batch_size
+        ):
+            batch.extend(tokens.values())
+            while len(batch) >= self.batch_size:
+                yield batch[:self.batch_size]
+                batch = batch[self.batch_size:]
+        if batch:
+            yield batch
+
+    def _wait(self, futures) -> None:
+        for future in futures:
+            future.result()
+
+    def dispatch(self, fields: dict) -> None:
+        """Sends one job to every device of its users."""
+        message = {
+            'notification': json.loads(fields[b'notification']),
+            'data': json.loads(fields.get(b'data') or '{}'),
+        }
+        futures = []
+        for batch in self._batches(json.loads(fields[b'user_ids'])):
+            futures.append(
+                self.executor.submit(self.send_batch, batch, message)
+            )
+            # Bound the batches held in memory to what is in flight
+            if len(futures) >= self.concurrency * 2:
+                self._wait(futures)
+                futures = []
+        self._wait(futures)
+
+    def requeue_due(self) -> int:
+        """Resends retry batches whose backoff has passed."""
+        futures = []
+        for member in self.redis.zrangebyscore(
+            RETRY_QUEUE, '-inf', self.clock(), start=0, num=self.concurrency * 2
+        ):
+            # Only the worker that removes the entry sends it
+            if not self.redis.zrem(RETRY_QUEUE, member):
+                continue
+            entry = json.loads(member)
+            futures.append(self.executor.submit(
+                self.send_batch,
+                entry['tokens'], entry['message'], entry['attempt']
+            ))
+        self._wait(futures)
+        return len(futures)
+
+    def _own_pending(self, consumer: str, count: int) -> list:
+        """
+        Jobs this consumer read earlier but never acknowledged, as
+        (id, fields, deliveries) with this delivery counted.
+        """
+        pending = self.redis.xpending_range(
+            JOBS_STREAM, CONSUMER_GROUP, min='-', max='+', count=count,
+            consumername=consumer
+        )
+        if not pending:
+            return []
+        # XCLAIM counts one more delivery
+        deliveries = {
+            entry['message_id']: entry.get('times_delivered', 0) + 1
+            for entry in pending
+        }
+        return [
+            (entry_id, fields, deliveries.get(entry_id, 1))
+            for entry_id, fields in self.redis.xclaim(
+                JOBS_STREAM, CONSUMER_GROUP, consumer, min_idle_time=0,
+                message_ids=list(deliveries)
+            )
+        ]
+
+    def dead_letter_job(self, entry_id, fields: dict, deliveries: int,
+                        error: str) -> None:
+        """Moves a job that keeps failing to push:dead and acknowledges it."""
+        log.error(
+            'Push job %s failed %s times, moved to %s: %s',
+            entry_id, deliveries, DEAD_LETTER_STREAM, error
+        )
+        self.redis.xadd(DEAD_LETTER_STREAM, dict(
+            fields or {}, job_id=entry_id, attempts=deliveries, error=error[:500]
+        ))
+        self.redis.xack(JOBS_STREAM, CONSUMER_GROUP, entry_id)
+        self._incr('dead_jobs')
+
+    def handle(self, entry_id, fields: dict, deliveries: int = 1) -> None:
+        """
+        Dispatches one job and acknowledges it. A job that fails stays
+        pending and is retried on the next run, until its ``max_attempts``th
+        delivery fails and it is dead-lettered. Its errors are logged, not
+        raised, so one bad job cannot stop the jobs behind it.
+        """
+        if deliveries > self.max_attempts:
+            # The worker died while sending it, as many times as allowed
+            self.dead_letter_job(
+                entry_id, fields, deliveries - 1, 'worker stopped while sending'
+            )
+            return
+        try:
+            self.dispatch(fields)
+        except Exception as e:
+            if deliveries >= self.max_attempts:
+                self.dead_letter_job(entry_id, fields, deliveries, repr(e))
+            else:
+                log.exception(
+                    'Push job %s failed, attempt %s of %s',
+                    entry_id, deliveries, self.max_attempts
+                )
+                self._incr('job_errors')
+            return
+        self.redis.xack(JOBS_STREAM, CONSUMER_GROUP, entry_id)
+
+    def run_once(
+        self, consumer: str, count: int = 10, block_ms: int = 1000
+    ) -> int:
+        """
+        Handles due retries, then up to ``count`` jobs: first those this
+        consumer left unacknowledged, otherwise new ones. Returns the number
+        of jobs handled, failed ones included.
+        """
+        self.requeue_due()
+
+        entries = self._own_pending(consumer, count)
+        if not entries:
+            response = self.redis.xreadgroup(
+                CONSUMER_GROUP, consumer, {JOBS_STREAM: '>'},
+                count=count, block=block_ms
+            )
+            entries = [
+                (entry_id, fields, 1)
+                for _, stream_entries in response or []
+                for entry_id, fields in stream_entries
+            ]
+
+        for entry_id, fields, deliveries in entries:
+            self.handle(entry_id, fields, deliveries)
+        self._incr('jobs', len(entries))
+        return len(entries)
+
+    def claim_stale(self, consumer: str, min_idle_seconds: float = 300, count: int = 100) -> int:
+        """Takes over jobs another worker read but never acknowledged."""
+        min_idle_ms = int(min_idle_seconds * 1000)
+        pending = self.redis.xpending_range(
+            JOBS_STREAM, CONSUMER_GROUP, min='-', max='+', count=count,
+            idle=min_idle_ms or None
+        )
+        if not pending:
+            return 0
+        claimed = self.redis.xclaim(
+            JOBS_STREAM, CONSUMER_GROUP, consumer, min_idle_time=min_idle_ms,
+            message_ids=[entry['message_id'] for entry in pending],
+            justid=True
+        )
+        return len(claimed)
+
+    def stats(self) -> dict:
+        elapsed = max(self.clock() - self.started_at, 1e-9)
+        return {
+            'sent': self.sent,
+            'sends_per_second': self.sent / elapsed,
+            'retry_queue': self.redis.zcard(RETRY_QUEUE),
+            'dead_letters': self.redis.xlen(DEAD_LETTER_STREAM),
+        }
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.http.close()
@@ -1,5 +1,278 @@
+import logging
+import time
 import redis
-import fakeredis
+from pyramid.settings import asbool, aslist
+from redis.sentinel import Sentinel, SentinelConnectionPool
+from setara_backend.repositories.redis import HashRing
+from .circuit_breaker import CircuitBreaker
+
+log = logging.getLogger(__name__)
+
+# Errors meaning Redis is unreachable or stalled, as opposed to a bad command
+REDIS_FAILURES = (redis.ConnectionError, redis.TimeoutError)
+
+
+def instrumented_pool_class(metrics, base=redis.ConnectionPool):
+    """
+    Returns a subclass of the given Redis pool class that records how long
+    each connection checkout took.
+    """
+    class InstrumentedConnectionPool(base):
+        def get_connection(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return super().get_connection(*args, **kwargs)
+            finally:
+                metrics.observe(
+                    'redis.pool.wait', time.perf_counter() - started
+                )
+
+    return InstrumentedConnectionPool
+
+
+class BlockingSentinelConnectionPool(
+    SentinelConnectionPool, redis.BlockingConnectionPool
+):
+    """
+    A Sentinel-discovered pool bounded like create_client's: at most
+    ``max_connections``, a checkout waits up to ``timeout`` seconds for a
+    free one instead of opening more.
+    """
+
+    def disconnect(self, inuse_connections: bool = True) -> None:
+        # On failover Sentinel closes the idle connections only, so they
+        # reconnect to the new primary; BlockingConnectionPool closes all
+        if inuse_connections:
+            super().disconnect()
+            return
+        self._checkpid()
+        with self.pool.mutex:
+            idle = [
+                connection for connection in self.pool.queue
+                if connection is not None
+            ]
+        for connection in idle:
+            connection.disconnect()
+
+
+def get_pool_stats(pool) -> dict:
+    """Reports the Redis pool occupancy."""
+    stats = {
+        'pool': type(pool).__name__,
+        'max_connections': getattr(pool, 'max_connections', None),
+    }
+    if isinstance(pool, redis.BlockingConnectionPool):
+        # Free slots are kept in the queue as None until first used
+        idle = sum(
+            connection is not None for connection in list(pool.pool.queue)
+        )
+        stats['created'] = len(pool._connections)
+        stats['idle'] = idle
+        stats['checked_out'] = len(pool._connections) - idle
+    elif hasattr(pool, '_available_connections'):
+        stats['created'] = pool._created_connections
+        stats['idle'] = len(pool._available_connections)
+        stats['checked_out'] = len(pool._in_use_connections)
+    return stats
+
+
+def warmup_pool(pool, count: int) -> int:
+    """
+    Opens ``count`` connections at once and releases them to the pool, so the
+    first requests after boot do not pay for connecting.
+    Returns the number of connections opened.
+    """
+    connections = []
+    try:
+        for _ in range(count):
+            connection = pool.get_connection()
+            connection.connect()
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            pool.release(connection)
+    return len(connections)
+
+
+def fails_open(settings, caller: str, default: bool) -> bool:
+    """
+    Reads the per-caller Redis failure policy ('open' lets the request
+    through without Redis, 'closed' rejects it) from redis.breaker.<caller>.
+    """
+    policy = settings.get(f"redis.breaker.{caller}")
+    if policy is None:
+        return default
+    return str(policy).strip().lower() == 'open'
+
+
+class ReplicaRouter:
+    """
+    Routes read-mostly Redis operations to a replica while it is fresh
+    enough, and to the primary otherwise.
+
+    Freshness is measured with a heartbeat key: at most every
+    ``check_interval`` seconds the router reads the newest heartbeat visible
+    on the replica, then writes the current time to the primary. The age of
+    that heartbeat bounds the replication lag, and the replica is only used
+    while it stays within ``max_staleness`` seconds. A replica that cannot be
+    reached is treated as stale.
+    """
+
+    HEARTBEAT_KEY = 'redis_replica_heartbeat'
+
+    def __init__(
+        self,
+        primary,
+        replica,
+        max_staleness: float = 2,
+        check_interval: float = 0.5,
+        metrics=None,
+        clock=time.time,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_staleness = max_staleness
+        self.check_interval = check_interval
+        self.metrics = metrics
+        self.clock = clock
+        self.staleness = None
+        self._checked_at = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.staleness is not None and self.staleness <= self.max_staleness
+
+    def check(self) -> None:
+        now = self.clock()
+        self._checked_at = now
+        try:
+            heartbeat = self.replica.get(self.HEARTBEAT_KEY)
+            self.staleness = now - float(heartbeat) if heartbeat else None
+        except Exception as e:
+            self.staleness = None
+
+        try:
+            self.primary.set(self.HEARTBEAT_KEY, repr(now), ex=60)
+        except Exception as e:
+            pass
+
+    def read_client(self):
+        """Returns the client read-mostly operations should use right now."""
+        if (
+            self._checked_at is None
+            or self.clock() - self._checked_at >= self.check_interval
+        ):
+            # Benign race: concurrent threads may both run a check
+            self.check()
+
+        if self.healthy:
+            if self.metrics:
+                self.metrics.incr('redis.reads.replica')
+            return self.replica
+        if self.metrics:
+            self.metrics.incr('redis.reads.primary')
+        return self.primary
+
+
+def create_clients(settings, metrics):
+    """
+    Builds the primary and (optional) replica clients from the redis.*
+    settings. With redis.sentinels set, both are discovered through Sentinel,
+    which also follows failovers; otherwise redis.host/redis.port is the
+    primary and redis.replica.host/redis.replica.port the replica.
+    """
+    connection_kwargs = {
+        'db': int(settings.get('redis.db', 0)),
+        'socket_timeout': float(settings.get('redis.socket_timeout', 0.5)),
+        'socket_connect_timeout': float(
+            settings.get('redis.socket_connect_timeout', 0.5)
+        ),
+    }
+    sentinels = [
+        (address.rsplit(':', 1)[0], int(address.rsplit(':', 1)[1]))
+        for address in aslist(settings.get('redis.sentinels', ''))
+    ]
+
+    if sentinels:
+        sentinel = Sentinel(
+            sentinels,
+            sentinel_kwargs={
+                'socket_timeout': connection_kwargs['socket_timeout'],
+                'socket_connect_timeout': connection_kwargs[
+                    'socket_connect_timeout'
+                ],
+            },
+        )
+        service_name = settings.get('redis.sentinel.service_name', 'mymaster')
+        pool_class = instrumented_pool_class(
+            metrics, base=BlockingSentinelConnectionPool
+        )
+        pool_kwargs = dict(
+            connection_kwargs,
+            max_connections=int(settings.get('redis.max_connections', 50)),
+            timeout=float(settings.get('redis.pool_timeout', 1)),
+        )
+        primary = sentinel.master_for(
+            service_name,
+            connection_pool_class=pool_class,
+            **pool_kwargs
+        )
+        replica = None
+        if asbool(settings.get('redis.sentinel.read_from_replicas', True)):
+            # Rotates over the known replicas, falling back to the primary
+            replica = sentinel.slave_for(
+                service_name,
+                connection_pool_class=pool_class,
+                **pool_kwargs
+            )
+        return primary, replica
+
+    primary = create_client(
+        settings, metrics,
+        settings.get('redis.host'), settings.get('redis.port')
+    )
+    replica = None
+    if settings.get('redis.replica.host'):
+        replica = create_client(
+            settings, metrics,
+            settings.get('redis.replica.host'),
+            settings.get('redis.replica.port', 6379)
+        )
+    return primary, replica
+
+
+def create_client(settings, metrics, host, port):
+    """Builds a client with its own bounded, instrumented pool."""
+    pool_class = instrumented_pool_class(
+        metrics, base=redis.BlockingConnectionPool
+    )
+    return redis.Redis(connection_pool=pool_class(
+        host=host,
+        port=int(port),
+        db=int(settings.get('redis.db', 0)),
+        socket_timeout=float(settings.get('redis.socket_timeout', 0.5)),
+        socket_connect_timeout=float(
+            settings.get('redis.socket_connect_timeout', 0.5)
+        ),
+        max_connections=int(settings.get('redis.max_connections', 50)),
+        # Bounded wait for a free connection instead of growing forever
+        timeout=float(settings.get('redis.pool_timeout', 1)),
+    ))
+
+
+def create_ring(settings, metrics, client) -> HashRing:
+    """
+    Builds the hash ring the sharded keyspaces (rate_limit, auth_token,
+    notification_token) are spread over. Nodes are listed in redis.nodes as
+    host:port; without it the ring only holds the primary client.
+    """
+    nodes = aslist(settings.get('redis.nodes', ''))
+    if not nodes:
+        return HashRing({'primary': client})
+    return HashRing({
+        address: create_client(settings, metrics, *address.rsplit(':', 1))
+        for address in nodes
+    })
 
 
 def includeme(config):
@@ -10,23 +283,68 @@ def includeme(config):
     settings = config.get_settings()
     is_testing = settings.get('testing', False)
     redis_instance = settings.get('redis.instance', None)
+    metrics = config.registry['metrics']
 
     if is_testing and redis_instance:
-        config.add_request_method(
-            lambda r: redis_instance, 'redis_conn', reify=True
-        )
+        client = redis_instance
+        replica = settings.get('redis.replica.instance', None)
+        ring = HashRing({'primary': client})
     else:  # pragma: no cover
-        host = settings.get('redis.host')
-        port = int(settings.get('redis.port'))
-        db = int(settings.get('redis.db'))
-        pool = redis.ConnectionPool(
-            host=host,
-            port=port,
-            db=db,
+        client, replica = create_clients(settings, metrics)
+        ring = create_ring(settings, metrics, client)
+        config.registry['redis.pool'] = client.connection_pool
+        if replica is not None and 'primary' not in ring.nodes:
+            # The replica mirrors the primary, not the shards
+            log.warning('redis.nodes is set, ignoring the read replica')
+            replica = None
+
+    # One thread-safe client per worker, shared by every request
+    config.registry['redis.client'] = client
+    config.add_request_method(
+        lambda r: r.registry['redis.client'], 'redis_conn', reify=True
+    )
+
+    # Sharded keyspaces go through the ring, everything else to the client
+    config.registry['redis.ring'] = ring
+    config.add_request_method(
+        lambda r: r.registry['redis.ring'], 'redis_shards', reify=True
+    )
+
+    # Read-mostly operations may be served by a replica
+    router = None
+    if replica is not None:
+        router = ReplicaRouter(
+            client,
+            replica,
+            max_staleness=float(
+                settings.get('redis.replica.max_staleness_seconds', 2)
+            ),
+            check_interval=float(
+                settings.get('redis.replica.check_interval_seconds', 0.5)
+            ),
+            metrics=metrics,
         )
-        config.registry['redis.pool'] = pool
+    config.registry['redis.replica_router'] = router
+
+    def get_redis_read_conn(request):
+        if router is None:
+            return request.redis_conn
+        return router.read_client()
+
+    config.add_request_method(
+        get_redis_read_conn, 'redis_read_conn', reify=True
+    )
 
-        def get_redis_conn(request):
-            return redis.Redis(connection_pool=request.registry['redis.pool'])
+    config.registry['redis.breaker'] = CircuitBreaker(
+        'redis',
+        failure_threshold=int(
+            settings.get('redis.breaker.failure_threshold', 5)
+        ),
+        reset_seconds=float(settings.get('redis.breaker.reset_seconds', 10)),
+        failure_exceptions=REDIS_FAILURES,
+        metrics=metrics,
+    )
 
-        config.add_request_method(get_redis_conn, 'redis_conn', reify=True)
+    warmup_connections = int(settings.get('redis.warmup_connections', 0))
+    if warmup_connections:
+        warmup_pool(client.connection_pool, warmup_connections)
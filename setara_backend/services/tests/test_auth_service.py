@@ -1,5 +1,6 @@
 import pytest
 import jwt
+import bcrypt
 from datetime import datetime, timedelta, UTC
 from unittest.mock import MagicMock
 from setara_backend.services import AuthService
@@ -61,6 +62,42 @@ class TestAuthService:
         assert auth_service.check_password(
             wrong_password, hashed_password) is False
 
+    def test_hash_password_uses_configured_rounds(self, settings):
+        """
+        Tests that hash_password encodes the configured work factor.
+        """
+        # Setup
+        settings['auth.bcrypt_rounds'] = '5'
+        auth_service = AuthService(settings)
+
+        # Action
+        hashed_password = auth_service.hash_password('my_password')
+
+        # Assert
+        assert hashed_password.startswith('$2b$05$')
+        assert auth_service.needs_rehash(hashed_password) is False
+
+    def test_needs_rehash_detects_different_cost(self, settings):
+        """
+        Tests that hashes made with a lower or higher cost are flagged.
+        """
+        # Setup
+        settings['auth.bcrypt_rounds'] = '5'
+        auth_service = AuthService(settings)
+
+        # Action & Assert
+        assert auth_service.needs_rehash(
+            bcrypt.hashpw(b'my_password', bcrypt.gensalt(4)).decode()) is True
+        assert auth_service.needs_rehash(
+            '$2a$10$3D3/fv1EyrS5y7VQYEGL8u3CbTKm1swb4gWzJEQWqgkN3j55pB2gy') is True
+
+    def test_needs_rehash_ignores_malformed_hash(self, auth_service):
+        """
+        Tests that a value that is not a bcrypt hash is never flagged.
+        """
+        assert auth_service.needs_rehash('not-a-bcrypt-hash') is False
+        assert auth_service.needs_rehash(None) is False
+
     # REFACTORED to use the 'mocker' fixture
     def test_generate_access_token(self, mocker, auth_service, mock_user, settings):
         """
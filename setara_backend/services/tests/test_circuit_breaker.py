@@ -0,0 +1,110 @@
+import pytest
+from setara_backend.services.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError
+)
+from setara_backend.utils import MetricsRegistry
+
+
+class FakeClock:
+    """A manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    """Provides a breaker that opens after 2 ConnectionErrors for 10 seconds."""
+    return CircuitBreaker(
+        'test',
+        failure_threshold=2,
+        reset_seconds=10,
+        failure_exceptions=(ConnectionError,),
+        metrics=MetricsRegistry(),
+        clock=clock
+    )
+
+
+def fail():
+    raise ConnectionError("Connection failed")
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self, breaker):
+        """Tests that the circuit opens at the threshold and then fails fast."""
+        # Action
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+
+        # Assert
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: 'never called')
+        assert breaker.metrics.get('test.breaker.opened') == 1
+        assert breaker.metrics.get('test.breaker.rejected') == 1
+
+    def test_success_resets_failure_count(self, breaker):
+        """Tests that failures must be consecutive to open the circuit."""
+        # Action
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+        assert breaker.call(lambda: 'ok') == 'ok'
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+        # Assert
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_trial_success_closes(self, breaker, clock):
+        """Tests that a successful trial call after the reset period closes the circuit."""
+        # Setup
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+
+        # Action
+        clock.now = 10
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        result = breaker.call(lambda: 'ok')
+
+        # Assert
+        assert result == 'ok'
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_trial_failure_reopens(self, breaker, clock):
+        """Tests that a failed trial call opens the circuit for another period."""
+        # Setup
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+
+        # Action
+        clock.now = 10
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+        # Assert
+        assert breaker.state == CircuitBreaker.OPEN
+        clock.now = 15
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: 'ok')
+
+    def test_other_errors_do_not_trip(self, breaker):
+        """Tests that errors outside failure_exceptions are not backend failures."""
+        # Action
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                breaker.call(int, 'not-a-number')
+
+        # Assert
+        assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock
+from setara_backend.services.container import RequestContainer
+
+
+class DummyRequest:
+    """A request that records whether its dbsession was created."""
+
+    def __init__(self):
+        self.registry = {'redis.breaker': MagicMock()}
+        self.redis_shards = MagicMock()
+        self.session_created = False
+
+    @property
+    def dbsession(self):
+        self.session_created = True
+        return MagicMock()
+
+
+class TestRequestContainer:
+    def test_nothing_is_built_up_front(self):
+        """Tests that creating the container and handler opens no session."""
+        # Setup
+        request = DummyRequest()
+
+        # Action
+        container = RequestContainer(request)
+        container.auth_handler
+        container.guarded_redis_repository
+
+        # Assert
+        assert request.session_created is False
+
+    def test_dependencies_are_built_once(self):
+        """Tests that each dependency is created on first use and then reused."""
+        # Setup
+        request = DummyRequest()
+        container = RequestContainer(request)
+
+        # Action
+        repository = container.user_repository
+
+        # Assert
+        assert request.session_created is True
+        assert container.user_repository is repository
+        assert container.auth_handler.user_repository is repository
+        assert container.guarded_redis_repository.breaker is \
+            request.registry['redis.breaker']
+        assert container.redis_repository.breaker is None
@@ -0,0 +1,234 @@
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, select, text, update
+from setara_backend.models import TblUser, UserStatusEnum
+from setara_backend.models.meta import Base
+from setara_backend.services.database import (
+    RoutingSession,
+    count_attempts,
+    get_engine,
+    get_pool_stats,
+    get_replica_engines,
+    get_session_factory,
+    instrument_engine,
+    instrumented_pool_class,
+    warmup_engine
+)
+from setara_backend.utils import MetricsRegistry
+
+USER_ID = '0192a3b4-c5d6-7e8f-9a0b-1c2d3e4f5a6b'
+
+
+@pytest.fixture
+def metrics():
+    """Provides a fresh metrics registry."""
+    return MetricsRegistry()
+
+
+@pytest.fixture
+def pooled_engine(tmp_path, metrics):
+    """Provides a file-backed SQLite engine on an instrumented QueuePool."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool_class(metrics),
+        pool_size=3,
+        max_overflow=2
+    )
+    yield engine
+    engine.dispose()
+
+
+class TestDatabasePool:
+    def test_pool_stats_report_occupancy(self, pooled_engine):
+        """Tests that checked-out, idle and overflow counts are reported."""
+        # Setup
+        connection = pooled_engine.connect()
+
+        # Action
+        stats = get_pool_stats(pooled_engine)
+
+        # Assert
+        assert stats['pool'] == 'InstrumentedQueuePool'
+        assert stats['size'] == 3
+        assert stats['checked_out'] == 1
+        assert stats['max_overflow'] == 2
+        connection.close()
+        assert get_pool_stats(pooled_engine)['idle'] == 1
+
+    def test_checkout_wait_is_recorded(self, pooled_engine, metrics):
+        """Tests that every checkout records its wait time."""
+        # Action
+        with pooled_engine.connect():
+            pass
+        with pooled_engine.connect():
+            pass
+
+        # Assert
+        assert metrics.snapshot()['timings']['db.pool.wait']['count'] == 2
+
+    def test_warmup_opens_connections_up_to_pool_size(self, pooled_engine):
+        """Tests that warmup pre-opens connections, capped at the pool size."""
+        # Action
+        opened = warmup_engine(pooled_engine, 10)
+
+        # Assert
+        assert opened == 3
+        stats = get_pool_stats(pooled_engine)
+        assert stats['idle'] == 3
+        assert stats['checked_out'] == 0
+
+
+@pytest.fixture
+def primary_and_replica(tmp_path, metrics):
+    """
+    Provides two SQLite files standing in for a primary and its replica,
+    each holding a different copy of the same user.
+    """
+    engines = []
+    for name in ('primary', 'replica0'):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(TblUser.__table__.insert().values(
+                user_id=USER_ID,
+                user_phone='+6281211114444',
+                user_username=name,
+                user_password='hashed_password_123',
+                user_role='admin_super',
+                user_approved_at=datetime.now(),
+                user_status=UserStatusEnum.active.name,
+            ))
+        instrument_engine(engine, name, metrics)
+        engines.append(engine)
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+def get_username(session):
+    return session.execute(
+        select(TblUser.user_username).where(TblUser.user_id == USER_ID)
+    ).scalar_one()
+
+
+class TestRoutingSession:
+    def test_without_replicas_uses_plain_sessions(self, primary_and_replica):
+        """Tests that no routing is set up when no replica is configured."""
+        primary, _ = primary_and_replica
+        session = get_session_factory(primary)()
+
+        assert not isinstance(session, RoutingSession)
+        assert get_username(session) == 'primary'
+
+    def test_reads_go_to_replica(self, primary_and_replica, metrics):
+        """Tests that SELECTs outside a write are served by the replica."""
+        # Setup
+        primary, replica = primary_and_replica
+        session = get_session_factory(primary, [replica])()
+
+        # Action
+        username = get_username(session)
+        user = session.get(TblUser, USER_ID)
+
+        # Assert
+        assert username == 'replica0'
+        assert user.user_username == 'replica0'
+        assert metrics.get('db.queries.replica0') == 2
+        assert metrics.get('db.queries.primary') == 0
+        session.close()
+
+    def test_first_write_pins_to_primary(self, primary_and_replica, metrics):
+        """Tests that reads after a write see the primary, for the rest of the session."""
+        # Setup
+        primary, replica = primary_and_replica
+        session = get_session_factory(primary, [replica])()
+        assert get_username(session) == 'replica0'
+
+        # Action
+        session.execute(
+            update(TblUser).where(TblUser.user_id == USER_ID)
+            .values(user_is_login=True)
+        )
+
+        # Assert
+        assert session.pinned is True
+        assert get_username(session) == 'primary'
+        assert metrics.get('db.queries.primary') == 2
+        session.rollback()
+
+    def test_flush_pins_to_primary(self, primary_and_replica):
+        """Tests that ORM flushes are written to the primary."""
+        # Setup
+        primary, replica = primary_and_replica
+        session = get_session_factory(primary, [replica])()
+        user = session.get(TblUser, USER_ID)
+
+        # Action
+        user.user_is_login = True
+        session.flush()
+
+        # Assert
+        assert session.pinned is True
+        assert get_username(session) == 'primary'
+        session.rollback()
+
+    @pytest.mark.parametrize("statement", [
+        select(TblUser).where(TblUser.user_id == USER_ID).with_for_update(),
+        text("SELECT 1"),
+    ])
+    def test_locking_and_textual_sql_use_primary(self, primary_and_replica, statement):
+        """Tests that statements that may write or lock never reach the replica."""
+        primary, replica = primary_and_replica
+        session = get_session_factory(primary, [replica])()
+
+        session.execute(statement)
+
+        assert session.pinned is True
+        session.close()
+
+    def test_replica_engines_from_settings(self, tmp_path):
+        """Tests that replicas inherit the primary options and their overrides."""
+        engines = get_replica_engines({
+            'sqlalchemy.url': 'sqlite://',
+            'sqlalchemy.echo': 'false',
+            'sqlalchemy.replica.urls': (
+                f"sqlite:///{tmp_path / 'a.db'} sqlite:///{tmp_path / 'b.db'}"
+            ),
+            'sqlalchemy.replica.echo': 'true',
+        })
+
+        assert [engine.url.database for engine in engines] == [
+            str(tmp_path / 'a.db'), str(tmp_path / 'b.db')]
+        assert all(engine.echo is True for engine in engines)
+
+    def test_primary_engine_ignores_replica_settings(self, tmp_path):
+        """Tests that sqlalchemy.replica.* keys never reach create_engine()."""
+        engine = get_engine({
+            'sqlalchemy.url': f"sqlite:///{tmp_path / 'primary.db'}",
+            'sqlalchemy.replica.urls': '',
+            'sqlalchemy.replica.pool_size': '20',
+        })
+
+        assert engine.url.database == str(tmp_path / 'primary.db')
+        engine.dispose()
+
+
+class TestRetryCounters:
+    def test_requests_and_retries_are_counted(self, metrics):
+        """Tests that retried attempts count once as a request and once per retry."""
+        # Setup
+        on_new_request, on_before_retry = count_attempts(metrics)
+        environ = {}
+        event = MagicMock(request=MagicMock(environ=environ))
+
+        # Action
+        on_new_request(event)
+        on_before_retry(MagicMock(exception=TimeoutError()))
+        environ['retry.attempt'] = 1
+        on_new_request(event)
+
+        # Assert
+        assert metrics.get('retry.requests') == 1
+        assert metrics.get('retry.retries') == 1
+        assert metrics.get('retry.retries.TimeoutError') == 1
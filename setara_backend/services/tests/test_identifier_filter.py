@@ -0,0 +1,204 @@
+import pytest
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta
+from setara_backend.models import TblUser, UserStatusEnum
+from setara_backend.services.identifier_filter import (
+    BloomFilter,
+    IdentifierFilter,
+    bloom_parameters,
+    expected_error_rate,
+    track_identifier_changes
+)
+from setara_backend.utils import MetricsRegistry
+
+
+@pytest.fixture
+def identifier_filter():
+    """Provides a small IdentifierFilter with metrics."""
+    return IdentifierFilter(
+        {
+            'identifier_filter.capacity': '1000',
+            'identifier_filter.error_rate': '0.01',
+        },
+        MetricsRegistry()
+    )
+
+
+def make_user(phone, username, email):
+    return TblUser(
+        user_phone=phone,
+        user_username=username,
+        user_email=email,
+        user_password='hashed_password_123',
+        user_role='admin_super',
+        user_approved_at=datetime.now(),
+        user_status=UserStatusEnum.active
+    )
+
+
+class TestBloomParameters:
+    def test_parameters_meet_error_rate(self):
+        """Tests that the computed sizing meets the requested false positive rate."""
+        num_bits, num_hashes = bloom_parameters(1000000, 0.01, 4194304)
+
+        assert num_hashes == 7
+        assert expected_error_rate(num_bits, 1000000) <= 0.0101
+
+    def test_parameters_respect_memory_budget(self):
+        """Tests that the filter never exceeds the memory budget."""
+        num_bits, _ = bloom_parameters(1000000, 0.001, 1024)
+
+        assert num_bits == 1024 * 8
+
+
+class TestBloomFilter:
+    def test_added_values_are_found(self, redis_client):
+        """Tests that values added to the filter are always reported present."""
+        bloom = BloomFilter('test', *bloom_parameters(100, 0.01, 1024))
+        redis_client.set(bloom.key, bytes(bloom.new_bitmap()))
+        values = [f"+62812000000{i:02d}" for i in range(50)]
+
+        assert bloom.add(redis_client, values) is True
+
+        assert all(bloom.might_contain(redis_client, v) for v in values)
+        assert bloom.might_contain(redis_client, '+6289999999999') is False
+
+    def test_add_never_creates_the_filter(self, redis_client):
+        """Tests that adding to a filter that is not built leaves it unbuilt."""
+        bloom = BloomFilter('test', 1024, 3)
+
+        assert bloom.add(redis_client, ['+62999']) is False
+
+        assert redis_client.exists(bloom.key) == 0
+        assert bloom.might_contain(redis_client, '+6281211114444') is None
+
+    def test_missing_filter_is_unknown(self, redis_client):
+        """Tests that a filter that was never built reports None."""
+        bloom = BloomFilter('test', 1024, 3)
+
+        assert bloom.might_contain(redis_client, 'anything') is None
+
+    def test_in_process_bitmap_matches_redis(self, redis_client):
+        """Tests that bitmaps built in-process use Redis' bit order."""
+        bloom = BloomFilter('test', 1024, 3)
+        bitmap = bloom.new_bitmap()
+        bloom.set_bits(bitmap, 'john')
+
+        redis_client.set(bloom.key, bytes(bitmap))
+
+        assert bloom.might_contain(redis_client, 'john') is True
+        assert bloom.might_contain(redis_client, 'jane') is False
+
+
+class TestIdentifierFilter:
+    def test_unbuilt_filter_falls_through(self, identifier_filter, redis_client):
+        """Tests that lookups go to the database while no filter is built."""
+        assert identifier_filter.might_exist(
+            redis_client, 'phone', '+6281211114444') is True
+
+    def test_rejects_unknown_identifier(self, identifier_filter, redis_client, dbsession):
+        """Tests that identifiers missing from a built filter are rejected."""
+        identifier_filter.rebuild(redis_client, dbsession)
+        identifier_filter.add_identifiers(
+            redis_client, {'email': ['john@example.com']})
+
+        assert identifier_filter.might_exist(
+            redis_client, 'email', 'john@example.com') is True
+        assert identifier_filter.might_exist(
+            redis_client, 'email', 'jane@example.com') is False
+        assert identifier_filter.metrics.get('identifier_filter.rejected') == 1
+
+    def test_updates_before_a_build_are_ignored(self, identifier_filter, redis_client, dbsession):
+        """Tests that an update to an unbuilt filter keeps lookups on the database."""
+        # Setup
+        dbsession.add(make_user('+6281211114444', 'john', None))
+        dbsession.flush()
+
+        # Action
+        identifier_filter.add_identifiers(redis_client, {'phone': ['+62999']})
+
+        # Assert
+        assert identifier_filter.might_exist(
+            redis_client, 'phone', '+6281211114444') is True
+
+    def test_redis_failure_falls_through(self, identifier_filter):
+        """Tests that a Redis error never rejects a login."""
+        broken_redis = MagicMock()
+        broken_redis.pipeline.side_effect = Exception("Connection failed")
+
+        assert identifier_filter.might_exist(
+            broken_redis, 'phone', '+6281211114444') is True
+
+    def test_failed_update_drops_filters(self, identifier_filter):
+        """Tests that the filters are dropped when an update cannot be applied."""
+        broken_redis = MagicMock()
+        broken_redis.pipeline.side_effect = Exception("Connection failed")
+
+        identifier_filter.add_identifiers(
+            broken_redis, {'phone': ['+6281211114444']})
+
+        broken_redis.delete.assert_called_once_with(
+            *[bloom.key for bloom in identifier_filter.filters.values()])
+
+    def test_rebuild_from_database(self, identifier_filter, redis_client, dbsession):
+        """Tests that a rebuild loads every identifier type from tblUser."""
+        # Setup
+        dbsession.add(make_user('+6281211114444', 'john', 'john@example.com'))
+        dbsession.add(make_user('+6281211115555', 'jane', None))
+        dbsession.flush()
+
+        # Action
+        counts = identifier_filter.rebuild(redis_client, dbsession)
+
+        # Assert
+        assert counts == {'phone': 2, 'username': 2, 'email': 1}
+        assert identifier_filter.might_exist(
+            redis_client, 'username', 'jane') is True
+        assert identifier_filter.might_exist(
+            redis_client, 'username', 'bob') is False
+
+    def test_flushed_users_are_tracked(self, identifier_filter, redis_client, session_factory, dbsession):
+        """Tests that created users and changed identifiers reach the filters."""
+        # Setup
+        track_identifier_changes(
+            session_factory, identifier_filter, redis_client)
+        identifier_filter.rebuild(redis_client, dbsession)
+        session = session_factory()
+
+        # Action
+        user = make_user('+6281211114444', 'john', 'john@example.com')
+        session.add(user)
+        session.flush()
+        user.user_username = 'johnny'
+        session.flush()
+        session.rollback()
+
+        # Assert
+        assert identifier_filter.might_exist(
+            redis_client, 'phone', '+6281211114444') is True
+        assert identifier_filter.might_exist(
+            redis_client, 'username', 'john') is True
+        assert identifier_filter.might_exist(
+            redis_client, 'username', 'johnny') is True
+
+    def test_rebuild_catches_up_on_changed_identifiers(self, identifier_filter, redis_client, dbsession, monkeypatch):
+        """Tests that an old user's identifier changed during a rebuild is kept."""
+        # Setup
+        user = make_user('+6281211114444', 'johnny', None)
+        user.user_created_at = datetime.now() - timedelta(days=30)
+        user.user_updated_at = datetime.now()
+        dbsession.add(user)
+        dbsession.flush()
+        set_bits = BloomFilter.set_bits
+
+        def read_before_the_change(self, bitmap, value):
+            # The build read the row before the username was changed
+            set_bits(self, bitmap, 'john' if value == 'johnny' else value)
+        monkeypatch.setattr(BloomFilter, 'set_bits', read_before_the_change)
+
+        # Action
+        identifier_filter.rebuild(redis_client, dbsession)
+
+        # Assert
+        assert identifier_filter.might_exist(
+            redis_client, 'username', 'johnny') is True
@@ -0,0 +1,117 @@
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from setara_backend.models import LoginOutcomeEnum, TblLoginEvent
+from setara_backend.models.meta import Base
+from setara_backend.services.login_events import LoginEventBuffer
+from setara_backend.utils import MetricsRegistry
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Provides a file-backed SQLite database, shared between threads."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def make_buffer(engine, **settings):
+    return LoginEventBuffer(
+        {f"login_events.{key}": value for key, value in settings.items()},
+        engine,
+        MetricsRegistry()
+    )
+
+
+def enqueue(buffer, outcome=LoginOutcomeEnum.success):
+    return buffer.enqueue(
+        login_event_method='phone',
+        login_event_identifier='+6281211114444',
+        login_event_outcome=outcome,
+        login_event_device='Test Agent/1.0',
+    )
+
+
+def count_events(engine):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(func.count()).select_from(TblLoginEvent)
+        ).scalar_one()
+
+
+class TestLoginEventBuffer:
+    def test_flush_writes_in_bulk(self, engine):
+        """Tests that buffered events are written in batches of executemany."""
+        # Setup
+        buffer = make_buffer(engine, batch_size='4')
+        for _ in range(10):
+            enqueue(buffer)
+        inserts = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT'):
+                inserts.append(executemany)
+
+        event.listen(engine, 'before_cursor_execute', record)
+
+        # Action
+        written = buffer.flush()
+
+        # Assert
+        assert written == 10
+        assert count_events(engine) == 10
+        assert inserts == [True, True, True]
+        assert len(buffer) == 0
+        assert buffer.metrics.get('login_events.written') == 10
+
+    def test_full_buffer_drops_events(self, engine):
+        """Tests the backpressure: events past buffer_size are dropped and counted."""
+        # Setup
+        buffer = make_buffer(engine, buffer_size='2')
+
+        # Action
+        results = [enqueue(buffer) for _ in range(3)]
+
+        # Assert
+        assert results == [True, True, False]
+        assert buffer.metrics.get('login_events.dropped') == 1
+
+    def test_failed_flush_is_counted(self, engine):
+        """Tests that a failing database never raises into the caller."""
+        # Setup
+        buffer = make_buffer(engine)
+        enqueue(buffer)
+        Base.metadata.drop_all(engine)
+
+        # Action & Assert
+        assert buffer.flush() == 0
+        assert buffer.metrics.get('login_events.failed') == 1
+
+    def test_stop_flushes_remaining_events(self, engine):
+        """Tests that stopping the writer thread flushes what is buffered."""
+        # Setup
+        buffer = make_buffer(engine, flush_interval_seconds='60')
+        buffer.start()
+        enqueue(buffer, LoginOutcomeEnum.wrong_password)
+
+        # Action
+        buffer.stop()
+
+        # Assert
+        assert count_events(engine) == 1
+
+    def test_batch_size_wakes_the_writer(self, engine):
+        """Tests that a full batch is written without waiting for the interval."""
+        # Setup
+        buffer = make_buffer(
+            engine, batch_size='2', flush_interval_seconds='60')
+        buffer.start()
+
+        # Action
+        enqueue(buffer)
+        enqueue(buffer)
+        buffer._stopped.set()
+        buffer._thread.join(timeout=5)
+
+        # Assert
+        assert count_events(engine) == 2
@@ -0,0 +1,104 @@
+import pytest
+from unittest.mock import MagicMock
+from setara_backend.services.lockout import LoginLockout
+from setara_backend.utils import MetricsRegistry
+
+
+@pytest.fixture
+def metrics():
+    """Provides a fresh metrics registry."""
+    return MetricsRegistry()
+
+
+@pytest.fixture
+def lockout(metrics):
+    """Provides a LoginLockout that locks after 3 failures."""
+    return LoginLockout(
+        {
+            'auth.lockout.max_attempts': '3',
+            'auth.lockout.base_seconds': '10',
+            'auth.lockout.max_seconds': '25',
+        },
+        metrics
+    )
+
+
+class TestLoginLockout:
+    """Test suite for the LoginLockout service."""
+
+    def test_unknown_identifier_is_not_locked(self, lockout, redis_client):
+        """Tests that an identifier without failures is not locked."""
+        assert lockout.get_lock_seconds(
+            redis_client, 'email', 'a@example.com') == 0
+
+    def test_locks_after_max_attempts(self, lockout, redis_client):
+        """Tests that the lock only starts once max_attempts is reached."""
+        # Action
+        results = [
+            lockout.register_failure(redis_client, 'email', 'a@example.com')
+            for _ in range(3)
+        ]
+
+        # Assert
+        assert results == [0, 0, 10]
+        assert 0 < lockout.get_lock_seconds(
+            redis_client, 'email', 'a@example.com') <= 10
+        assert lockout.get_lock_seconds(
+            redis_client, 'phone', 'a@example.com') == 0
+
+    def test_lock_grows_exponentially_up_to_max(self, lockout, redis_client):
+        """Tests that every failure past the threshold doubles the lock, capped at max_seconds."""
+        # Action
+        results = [
+            lockout.register_failure(redis_client, 'username', 'john')
+            for _ in range(5)
+        ]
+
+        # Assert
+        assert results == [0, 0, 10, 20, 25]
+        assert redis_client.ttl('login_lockout:username:john') <= 25
+
+    def test_reset_clears_failures(self, lockout, redis_client):
+        """Tests that a successful login resets the failure counter."""
+        # Setup
+        for _ in range(3):
+            lockout.register_failure(redis_client, 'email', 'a@example.com')
+
+        # Action
+        lockout.reset(redis_client, 'email', 'a@example.com')
+
+        # Assert
+        assert lockout.get_lock_seconds(
+            redis_client, 'email', 'a@example.com') == 0
+        assert lockout.register_failure(
+            redis_client, 'email', 'a@example.com') == 0
+
+    def test_stats_report_avoided_hashing(self, lockout, metrics, redis_client):
+        """Tests that rejected attempts are reported as avoided bcrypt work."""
+        # Setup
+        metrics.observe('auth.bcrypt.check', 0.25)
+        for _ in range(3):
+            lockout.register_failure(redis_client, 'email', 'a@example.com')
+
+        # Action
+        lockout.get_lock_seconds(redis_client, 'email', 'a@example.com')
+        lockout.get_lock_seconds(redis_client, 'email', 'a@example.com')
+        stats = lockout.stats()
+
+        # Assert
+        assert stats['locks'] == 1
+        assert stats['password_checks_avoided'] == 2
+        assert stats['bcrypt_seconds_avoided'] == pytest.approx(0.5)
+
+    def test_redis_failure_does_not_lock(self, lockout):
+        """Tests that a Redis outage never locks users out."""
+        # Setup
+        broken_redis = MagicMock()
+        broken_redis.ttl.side_effect = Exception("Connection failed")
+        broken_redis.pipeline.side_effect = Exception("Connection failed")
+
+        # Action & Assert
+        assert lockout.get_lock_seconds(
+            broken_redis, 'email', 'a@example.com') == 0
+        assert lockout.register_failure(
+            broken_redis, 'email', 'a@example.com') == 0
@@ -0,0 +1,99 @@
+import pytest
+from datetime import datetime
+from setara_backend.models import TblUser, UserStatusEnum
+from setara_backend.repositories import UserRepository
+from setara_backend.services.login_state import LoginStateWriter
+from setara_backend.utils import MetricsRegistry
+
+
+@pytest.fixture
+def writer(redis_client):
+    """Provides a write-behind login state store with small batches."""
+    return LoginStateWriter(
+        {'login_state.batch_size': '2'}, redis_client, MetricsRegistry())
+
+
+@pytest.fixture
+def users(dbsession):
+    """Creates three logged-out users."""
+    users = [
+        TblUser(
+            user_phone=f'+62812111100{i}',
+            user_username=f'user{i}',
+            user_password='hashed_password_123',
+            user_role='admin_super',
+            user_approved_at=datetime.now(),
+            user_status=UserStatusEnum.active
+        )
+        for i in range(3)
+    ]
+    dbsession.add_all(users)
+    dbsession.commit()
+    return users
+
+
+def login_states(session_factory):
+    with session_factory() as session:
+        return {
+            user.user_username: user.user_is_login
+            for user in session.query(TblUser)
+        }
+
+
+class TestLoginStateWriter:
+    def test_flush_applies_latest_state(self, writer, users, session_factory):
+        """Tests that pending changes are written in batches, last change wins."""
+        # Setup
+        for user in users:
+            writer.record(user.user_id, True)
+        writer.record(users[2].user_id, False)
+
+        # Action
+        flushed = writer.flush(session_factory)
+
+        # Assert
+        assert flushed == 3
+        assert login_states(session_factory) == {
+            'user0': True, 'user1': True, 'user2': False}
+        assert writer.pending([user.user_id for user in users]) == {}
+        assert writer.metrics.get('login_state.flushed') == 3
+
+    def test_nothing_pending(self, writer, session_factory):
+        """Tests that a flush with no changes does nothing."""
+        assert writer.flush(session_factory) == 0
+
+    def test_failed_flush_is_retried_in_order(self, writer, users, session_factory):
+        """Tests that a batch left by a failed flush is applied before newer changes."""
+        # Setup
+        user_id = users[0].user_id
+        writer.record(user_id, True)
+
+        def broken_session():
+            raise RuntimeError("database down")
+
+        with pytest.raises(RuntimeError):
+            writer.flush(broken_session)
+        writer.record(user_id, False)
+
+        # Action
+        first = writer.flush(session_factory)
+        state_after_first = login_states(session_factory)['user0']
+        second = writer.flush(session_factory)
+
+        # Assert
+        assert (first, second) == (1, 1)
+        assert state_after_first is True
+        assert login_states(session_factory)['user0'] is False
+
+    def test_reads_merge_pending_state(self, writer, users, dbsession):
+        """Tests that loaded users show unflushed changes without becoming dirty."""
+        # Setup
+        repository = UserRepository(dbsession, login_state=writer)
+        writer.record(users[1].user_id, True)
+
+        # Action
+        user = repository.get_user_by_identifier('username', 'user1')
+
+        # Assert
+        assert user.user_is_login is True
+        assert user not in dbsession.dirty
@@ -0,0 +1,244 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from setara_backend.repositories import NotificationTokenRepository
+from setara_backend.services.push import (
+    DEAD_LETTER_STREAM,
+    JOBS_STREAM,
+    RETRY_QUEUE,
+    PushDispatcher,
+    enqueue_notification
+)
+from setara_backend.utils import MetricsRegistry
+
+
+class StubPushServer(ThreadingHTTPServer):
+    """A local push endpoint recording batches and failing on demand."""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubPushHandler)
+        self.batches = []
+        # Status codes to answer with before succeeding
+        self.fail_with = []
+        # Tokens reported as failed, and whether they may be retried
+        self.failed_tokens = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/send"
+
+
+class StubPushHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        payload = json.loads(self.rfile.read(length))
+        with self.server.lock:
+            fail_with = self.server.fail_with
+            status = fail_with.pop(0) if fail_with else 200
+            if status == 200:
+                self.server.batches.append(payload)
+
+        failed = [
+            {'token': token, 'retryable': self.server.failed_tokens[token]}
+            for token in payload['tokens'] if token in self.server.failed_tokens
+        ]
+        body = json.dumps({'failed': failed}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def push_server():
+    server = StubPushServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def dispatcher(redis_client, push_server, clock):
+    """A dispatcher with 2-token batches against the stub server."""
+    token_repo = NotificationTokenRepository(redis_client)
+    for user in range(5):
+        token_repo.set_token(f'user{user}', 'phone', f'token-{user}')
+    token_repo.set_token('user0', 'tablet', 'token-0b')
+
+    dispatcher = PushDispatcher(
+        redis_client,
+        token_repo,
+        push_server.url,
+        batch_size=2,
+        concurrency=4,
+        max_attempts=2,
+        metrics=MetricsRegistry(),
+        clock=clock,
+    )
+    dispatcher.ensure_group()
+    yield dispatcher
+    dispatcher.close()
+
+
+def pending_jobs(redis_client):
+    return redis_client.xpending(JOBS_STREAM, 'push-workers')['pending']
+
+
+def sent_tokens(push_server):
+    return sorted(token for batch in push_server.batches for token in batch['tokens'])
+
+
+class TestPushDispatcher:
+    def test_job_reaches_every_device(self, dispatcher, push_server, redis_client):
+        """Tests that a job is sent in batches to every device of its users."""
+        # Setup
+        enqueue_notification(
+            redis_client, ['user0', 'user1', 'user2', 'nobody'],
+            'Shift', 'Shift starts at 07:00', {'shift_id': 7})
+
+        # Action
+        handled = dispatcher.run_once('worker-1', block_ms=10)
+
+        # Assert
+        assert handled == 1
+        assert sent_tokens(push_server) == [
+            'token-0', 'token-0b', 'token-1', 'token-2']
+        assert all(len(batch['tokens']) <= 2 for batch in push_server.batches)
+        assert push_server.batches[0]['notification'] == {
+            'title': 'Shift', 'body': 'Shift starts at 07:00'}
+        assert push_server.batches[0]['data'] == {'shift_id': 7}
+        assert pending_jobs(redis_client) == 0
+        assert dispatcher.stats()['sent'] == 4
+
+    def test_server_errors_are_retried_with_backoff(self, dispatcher, push_server, redis_client, clock):
+        """Tests that a failed batch waits in the retry queue until its backoff passed."""
+        # Setup
+        push_server.fail_with = [503]
+        enqueue_notification(redis_client, ['user3'], 'Hi', 'there')
+
+        # Action
+        dispatcher.run_once('worker-1', block_ms=10)
+
+        # Assert
+        assert dispatcher.stats()['retry_queue'] == 1
+        assert dispatcher.requeue_due() == 0
+        clock.now += 2
+        assert dispatcher.requeue_due() == 1
+        assert sent_tokens(push_server) == ['token-3']
+        assert dispatcher.stats()['retry_queue'] == 0
+
+    def test_failed_tokens_go_to_dead_letters(self, dispatcher, push_server, redis_client, clock):
+        """Tests per-token failures: permanent ones and exhausted retries are dead-lettered."""
+        # Setup
+        push_server.failed_tokens = {'token-1': False, 'token-2': True}
+        enqueue_notification(redis_client, ['user1', 'user2'], 'Hi', 'there')
+
+        # Action
+        dispatcher.run_once('worker-1', block_ms=10)
+        clock.now += 2
+        dispatcher.requeue_due()
+
+        # Assert
+        stats = dispatcher.stats()
+        assert stats['sent'] == 0
+        assert stats['retry_queue'] == 0
+        assert stats['dead_letters'] == 2
+        assert redis_client.zcard(RETRY_QUEUE) == 0
+        dead = redis_client.xrange(DEAD_LETTER_STREAM)
+        assert json.loads(dead[1][1][b'tokens']) == ['token-2']
+        assert dispatcher.metrics.get('push.dead') == 2
+
+    def test_unacknowledged_jobs_are_redelivered(self, dispatcher, push_server, redis_client, mocker):
+        """Tests that a job that failed before its ack is handled on the next run."""
+        # Setup
+        enqueue_notification(redis_client, ['user4'], 'Hi', 'there')
+        mocker.patch.object(
+            dispatcher, 'dispatch', side_effect=RuntimeError("worker crashed"))
+        dispatcher.run_once('worker-1', block_ms=10)
+        mocker.stopall()
+
+        # Action
+        handled = dispatcher.run_once('worker-1', block_ms=10)
+
+        # Assert
+        assert handled == 1
+        assert sent_tokens(push_server) == ['token-4']
+        assert pending_jobs(redis_client) == 0
+
+    def test_malformed_job_does_not_block_later_jobs(self, dispatcher, push_server, redis_client):
+        """Tests that a job that cannot be parsed is skipped, not raised."""
+        # Setup
+        redis_client.xadd(JOBS_STREAM, {'user_ids': 'not json'})
+        enqueue_notification(redis_client, ['user4'], 'Hi', 'there')
+
+        # Action
+        handled = dispatcher.run_once('worker-1', block_ms=10)
+
+        # Assert
+        assert handled == 2
+        assert sent_tokens(push_server) == ['token-4']
+        assert pending_jobs(redis_client) == 1
+        assert dispatcher.metrics.get('push.job_errors') == 1
+
+    def test_failing_job_is_dead_lettered(self, dispatcher, push_server, redis_client, mocker):
+        """Tests that a job failing on its last delivery moves to push:dead."""
+        # Setup
+        job_id = redis_client.xadd(JOBS_STREAM, {'user_ids': 'not json'})
+        dispatcher.run_once('worker-1', block_ms=10)
+        # fakeredis does not count deliveries; Redis reports the first one
+        pending = redis_client.xpending_range
+        mocker.patch.object(
+            redis_client, 'xpending_range',
+            side_effect=lambda *args, **kwargs: [
+                dict(entry, times_delivered=1)
+                for entry in pending(*args, **kwargs)
+            ])
+
+        # Action
+        handled = dispatcher.run_once('worker-1', block_ms=10)
+
+        # Assert
+        assert handled == 1
+        assert pending_jobs(redis_client) == 0
+        [(_, dead)] = redis_client.xrange(DEAD_LETTER_STREAM)
+        assert dead[b'job_id'] == job_id
+        assert dead[b'user_ids'] == b'not json'
+        assert dead[b'attempts'] == b'2'
+        assert dead[b'error'] == b"KeyError(b'notification')"
+        assert dispatcher.metrics.get('push.dead_jobs') == 1
+
+    def test_stale_jobs_of_other_workers_are_claimed(self, dispatcher, push_server, redis_client):
+        """Tests that jobs read by a worker that died are taken over."""
+        # Setup
+        enqueue_notification(redis_client, ['user4'], 'Hi', 'there')
+        redis_client.xreadgroup(
+            'push-workers', 'dead-worker', {JOBS_STREAM: '>'}, count=1)
+
+        # Action
+        claimed = dispatcher.claim_stale('worker-1', min_idle_seconds=0)
+        handled = dispatcher.run_once('worker-1', block_ms=10)
+
+        # Assert
+        assert (claimed, handled) == (1, 1)
+        assert sent_tokens(push_server) == ['token-4']
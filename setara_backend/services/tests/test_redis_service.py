@@ -0,0 +1,292 @@
+import shutil
+import socket
+import subprocess
+import time
+import fakeredis
+from unittest.mock import MagicMock
+import pytest
+import redis
+from setara_backend.services.redis import (
+    ReplicaRouter,
+    create_clients,
+    fails_open,
+    get_pool_stats,
+    instrumented_pool_class,
+    warmup_pool
+)
+from setara_backend.utils import MetricsRegistry
+
+
+@pytest.fixture
+def metrics():
+    """Provides a fresh metrics registry."""
+    return MetricsRegistry()
+
+
+@pytest.fixture
+def redis_pool(metrics):
+    """Provides an instrumented pool of fakeredis connections."""
+    pool_class = instrumented_pool_class(metrics)
+    return pool_class(
+        connection_class=fakeredis.FakeConnection,
+        server=fakeredis.FakeServer()
+    )
+
+
+class TestRedisPool:
+    def test_warmup_opens_connections(self, redis_pool):
+        """Tests that warmup leaves the requested connections idle in the pool."""
+        # Action
+        opened = warmup_pool(redis_pool, 4)
+
+        # Assert
+        assert opened == 4
+        stats = get_pool_stats(redis_pool)
+        assert stats['created'] == 4
+        assert stats['idle'] == 4
+        assert stats['checked_out'] == 0
+
+    def test_checkout_wait_is_recorded(self, redis_pool, metrics):
+        """Tests that connection checkouts record their wait time."""
+        # Action
+        warmup_pool(redis_pool, 2)
+
+        # Assert
+        assert metrics.snapshot()['timings']['redis.pool.wait']['count'] == 2
+
+    def test_blocking_pool_stats(self, metrics):
+        """Tests occupancy reporting for the bounded BlockingConnectionPool."""
+        # Setup
+        pool_class = instrumented_pool_class(
+            metrics, base=redis.BlockingConnectionPool)
+        pool = pool_class(
+            max_connections=5,
+            timeout=0.1,
+            connection_class=fakeredis.FakeConnection,
+            server=fakeredis.FakeServer()
+        )
+        warmup_pool(pool, 3)
+
+        # Action
+        connection = pool.get_connection()
+        stats = get_pool_stats(pool)
+
+        # Assert
+        assert stats['max_connections'] == 5
+        assert stats['created'] == 3
+        assert stats['idle'] == 2
+        assert stats['checked_out'] == 1
+        pool.release(connection)
+
+
+class TestSentinelPools:
+    @pytest.fixture
+    def clients(self, metrics):
+        """Sentinel clients whose pools connect to fakeredis."""
+        primary, replica = create_clients({
+            'redis.sentinels': '127.0.0.1:26379',
+            'redis.max_connections': '2',
+            'redis.pool_timeout': '0.05',
+        }, metrics)
+        server = fakeredis.FakeServer()
+        for client in (primary, replica):
+            client.connection_pool.connection_class = fakeredis.FakeConnection
+            client.connection_pool.connection_kwargs = {'server': server}
+        return primary, replica
+
+    def test_pools_respect_the_limit(self, clients):
+        """Tests that Sentinel pools wait for a free connection, then give up."""
+        for client in clients:
+            # Setup
+            pool = client.connection_pool
+            checked_out = [pool.get_connection() for _ in range(2)]
+
+            # Action / Assert
+            assert get_pool_stats(pool)['max_connections'] == 2
+            started = time.perf_counter()
+            with pytest.raises(redis.ConnectionError):
+                pool.get_connection()
+            assert time.perf_counter() - started >= 0.05
+            for connection in checked_out:
+                pool.release(connection)
+
+    def test_failover_closes_idle_connections_only(self, clients, mocker):
+        """Tests that a new primary only drops the connections not in use."""
+        # Setup
+        pool = clients[1].connection_pool
+        busy, idle = pool.get_connection(), pool.get_connection()
+        pool.release(idle)
+        busy_disconnect = mocker.spy(busy, 'disconnect')
+        idle_disconnect = mocker.spy(idle, 'disconnect')
+
+        # Action
+        pool.disconnect(inuse_connections=False)
+
+        # Assert
+        assert idle_disconnect.call_count == 1
+        assert busy_disconnect.call_count == 0
+        pool.release(busy)
+
+
+class TestFailurePolicy:
+    def test_policy_defaults_per_caller(self):
+        """Tests that the caller's default applies when nothing is configured."""
+        assert fails_open({}, 'rate_limiter', default=True) is True
+        assert fails_open({}, 'auth', default=False) is False
+
+    def test_policy_from_settings(self):
+        """Tests that redis.breaker.<caller> overrides the default."""
+        settings = {
+            'redis.breaker.rate_limiter': 'closed',
+            'redis.breaker.auth': 'open',
+        }
+        assert fails_open(settings, 'rate_limiter', default=True) is False
+        assert fails_open(settings, 'auth', default=False) is True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def replicate(primary, replica):
+    """Copies the heartbeat, standing in for Redis replication."""
+    replica.set(
+        ReplicaRouter.HEARTBEAT_KEY, primary.get(ReplicaRouter.HEARTBEAT_KEY))
+
+
+class TestReplicaRouter:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def router(self, clock, metrics):
+        return ReplicaRouter(
+            fakeredis.FakeStrictRedis(server=fakeredis.FakeServer()),
+            fakeredis.FakeStrictRedis(server=fakeredis.FakeServer()),
+            max_staleness=2,
+            check_interval=0.5,
+            metrics=metrics,
+            clock=clock,
+        )
+
+    def test_unreplicated_replica_is_not_used(self, router):
+        """Tests that reads stay on the primary until the replica shows a heartbeat."""
+        assert router.read_client() is router.primary
+        assert router.metrics.get('redis.reads.primary') == 1
+
+    def test_fresh_replica_serves_reads(self, router, clock):
+        """Tests that reads move to the replica once it is within the lag budget."""
+        # Setup
+        router.read_client()
+        replicate(router.primary, router.replica)
+        clock.now += 1
+
+        # Action
+        client = router.read_client()
+
+        # Assert
+        assert client is router.replica
+        assert router.staleness == 1
+        assert router.metrics.get('redis.reads.replica') == 1
+
+    def test_lagging_replica_falls_back_to_primary(self, router, clock):
+        """Tests that a replica past max_staleness stops serving reads."""
+        # Setup
+        router.read_client()
+        replicate(router.primary, router.replica)
+        clock.now += 1
+        assert router.read_client() is router.replica
+
+        # Action: replication stops while the primary keeps moving
+        clock.now += 5
+
+        # Assert
+        assert router.read_client() is router.primary
+        assert router.staleness == 6
+
+    def test_checks_are_rate_limited(self, router, clock):
+        """Tests that the heartbeat is not checked more often than check_interval."""
+        # Setup
+        router.replica = MagicMock(wraps=router.replica)
+        router.read_client()
+
+        # Action
+        router.read_client()
+        router.read_client()
+
+        # Assert
+        assert router.replica.get.call_count == 1
+
+    def test_unreachable_replica_is_stale(self, router):
+        """Tests that replica errors route reads to the primary."""
+        router.replica = MagicMock()
+        router.replica.get.side_effect = redis.ConnectionError("down")
+
+        assert router.read_client() is router.primary
+        assert router.healthy is False
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def spawn_redis_server(*args):
+    port = free_port()
+    process = subprocess.Popen(
+        ['redis-server', '--port', str(port), '--save', '',
+         '--appendonly', 'no', *args],
+        stdout=subprocess.DEVNULL,
+    )
+    client = redis.Redis(port=port)
+    for _ in range(50):
+        try:
+            client.ping()
+            return process, port
+        except redis.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    pytest.fail("redis-server did not start")
+
+
+@pytest.mark.skipif(
+    shutil.which('redis-server') is None, reason="redis-server not installed")
+class TestSpawnedReplica:
+    @pytest.fixture
+    def servers(self):
+        primary, primary_port = spawn_redis_server()
+        replica, replica_port = spawn_redis_server(
+            '--replicaof', '127.0.0.1', str(primary_port))
+        yield primary_port, replica_port
+        replica.kill()
+        primary.kill()
+        replica.wait()
+        primary.wait()
+
+    def test_reads_move_to_replica_once_synced(self, servers, metrics):
+        """Tests routing against a real primary/replica pair."""
+        # Setup
+        primary_port, replica_port = servers
+        primary, replica = create_clients({
+            'redis.host': '127.0.0.1',
+            'redis.port': str(primary_port),
+            'redis.replica.host': '127.0.0.1',
+            'redis.replica.port': str(replica_port),
+        }, metrics)
+        router = ReplicaRouter(primary, replica, check_interval=0)
+        primary.set('auth_token:1', 'token')
+
+        # Action
+        deadline = time.time() + 10
+        while router.read_client() is not replica and time.time() < deadline:
+            time.sleep(0.1)
+
+        # Assert
+        assert router.healthy
+        assert replica.get('auth_token:1') == b'token'
@@ -0,0 +1,41 @@
+from datetime import datetime
+from sqlalchemy import func, select
+from setara_backend.models import TblUser, UserStatusEnum
+
+
+def make_user() -> TblUser:
+    return TblUser(
+        user_phone='+6281299990000',
+        user_username='isolated',
+        user_password='hashed_password_123',
+        user_role='admin_super',
+        user_approved_at=datetime.now(),
+        user_status=UserStatusEnum.active
+    )
+
+
+class TestTransactionIsolation:
+    def test_commit_stays_inside_the_test(self, dbsession, TestSessionFactory, db_connection, test_db_engine):
+        """
+        Tests that a committed row is visible to other sessions of the test,
+        but only inside the test's transaction, and gone once it rolls back.
+        """
+        # Setup
+        dbsession.add(make_user())
+
+        # Action
+        dbsession.commit()
+
+        # Assert
+        with TestSessionFactory() as session:
+            assert session.query(TblUser).count() == 1
+        # The commit only released a SAVEPOINT, SQLite's BEGIN is still open
+        assert db_connection.in_transaction()
+        assert db_connection.connection.dbapi_connection.in_transaction
+
+        dbsession.close()
+        db_connection.get_transaction().rollback()
+        with test_db_engine.connect() as connection:
+            assert connection.scalar(
+                select(func.count()).select_from(TblUser)
+            ) == 0
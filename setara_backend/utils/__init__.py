@@ -8,3 +8,12 @@ from .regex import (
 
 # Network helper
 from .network import get_location_from_ip
+
+# Metrics
+from .metrics import MetricsRegistry
+
+# Retry-attempt memo
+from .memo import AttemptMemo
+
+# Startup timing
+from .startup import is_test_module, startup_phase
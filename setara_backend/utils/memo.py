@@ -0,0 +1,51 @@
+import hashlib
+import time
+
+# Survives pyramid_retry attempts, which share the WSGI environ
+MEMO_ENVIRON_KEY = 'setara_backend.attempt_memo'
+
+
+def _memo_key(name: str, parts) -> tuple:
+    # Digest the parts so secrets (passwords) are not kept in the environ
+    digest = hashlib.blake2b(
+        repr(tuple(parts)).encode('utf-8'), digest_size=16
+    ).hexdigest()
+    return (name, digest)
+
+
+class AttemptMemo:
+    """
+    Memoizes expensive, side-effect free steps for one logical request.
+
+    Values live in the WSGI environ, so when pyramid_retry replays a request
+    after a transient error the next attempt reuses them instead of paying
+    for the work again. Only memoize steps whose result stays valid for the
+    whole request, e.g. a password check or a signed token.
+    """
+
+    def __init__(self, environ: dict, metrics=None):
+        self.values = environ.setdefault(MEMO_ENVIRON_KEY, {})
+        self.metrics = metrics
+
+    def call(self, name: str, func, *args, key=None, **kwargs):
+        """
+        Returns func(*args, **kwargs), computed once per logical request.
+        The memo key is the name and ``key``, or the arguments when not given.
+        """
+        memo_key = _memo_key(name, args if key is None else key)
+        if memo_key in self.values:
+            value, seconds = self.values[memo_key]
+            if self.metrics:
+                self.metrics.incr(f"memo.{name}.hits")
+                self.metrics.observe(f"memo.{name}.saved", seconds)
+            return value
+
+        started = time.perf_counter()
+        value = func(*args, **kwargs)
+        self.values[memo_key] = (value, time.perf_counter() - started)
+        return value
+
+    def peek(self, name: str, *key):
+        """Returns a value memoized by an earlier attempt, or None."""
+        entry = self.values.get(_memo_key(name, key))
+        return entry[0] if entry else None
@@ -0,0 +1,65 @@
+import threading
+
+
+class MetricsRegistry:
+    """
+    A thread-safe, in-process store of counters and timings.
+    One registry lives on the Pyramid registry per worker process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings.setdefault(
+                name, {'count': 0, 'total': 0.0, 'max': 0.0}
+            )
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def mean(self, name: str) -> float:
+        """Returns the average of an observed timing, 0.0 when unseen."""
+        with self._lock:
+            timing = self._timings.get(name)
+            if not timing or not timing['count']:
+                return 0.0
+            return timing['total'] / timing['count']
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'timings': {
+                    name: {
+                        'count': timing['count'],
+                        'total_seconds': timing['total'],
+                        'mean_seconds': timing['total'] / timing['count'],
+                        'max_seconds': timing['max'],
+                    }
+                    for name, timing in self._timings.items()
+                    if timing['count']
+                },
+            }
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(
+        len(sorted_values) - 1,
+        max(0, round(fraction * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
@@ -1,8 +1,10 @@
 import json
-import requests
 
 
 def get_location_from_ip(ip_address):
+    # Only logins need requests, CLIs importing setara_backend.utils do not
+    import requests
+
     try:
         response = requests.get(f"https://ipinfo.io/{ip_address}/json")
         response.raise_for_status()
@@ -0,0 +1,259 @@
+"""
+Migration operations that do not block traffic on large tables.
+
+Use them inside a migration's upgrade()/downgrade(); they read the options
+the migrate CLI passes as ``alembic -x`` arguments:
+
+- ``dry_run=true``: env.py renders the SQL of the pending migrations
+  instead of running it, and these operations report the rows they would
+  touch, read through a read-only connection
+- ``lock_timeout`` / ``statement_timeout``: applied by env.py on PostgreSQL
+- ``batch_size``: rows per backfill batch, unless the migration sets one
+"""
+import re
+import time
+from contextlib import nullcontext
+from alembic import context, op
+from pyramid.settings import asbool
+from sqlalchemy import MetaData, Table, bindparam, text
+
+# Migration context option holding the connection dry run estimates use
+DRY_RUN_CONNECTION = 'dry_run_connection'
+
+_TIMEOUT = re.compile(r'^\d+\s*(ms|s|min|h)?$')
+
+
+def migration_options() -> dict:
+    """The ``-x`` arguments of the running alembic command."""
+    try:
+        return context.get_x_argument(as_dictionary=True)
+    except NameError:
+        # Outside of an alembic run, e.g. in tests
+        return {}
+
+
+def is_dry_run() -> bool:
+    return asbool(migration_options().get('dry_run', False))
+
+
+def apply_timeouts(connection, options: dict) -> None:
+    """
+    Sets lock_timeout and statement_timeout for the migration session, so a
+    migration waiting behind a long transaction fails instead of queueing
+    every request behind its lock. PostgreSQL only.
+    """
+    if connection.dialect.name != 'postgresql':
+        return
+    for name in ('lock_timeout', 'statement_timeout'):
+        value = options.get(name)
+        if not value:
+            continue
+        if not _TIMEOUT.match(value):
+            raise ValueError(f"invalid {name}: {value!r}")
+        connection.exec_driver_sql(f"SET {name} = '{value}'")
+
+
+def make_read_only(connection) -> None:
+    """
+    Makes the connection refuse writes, so a dry run can only read. Until
+    the current transaction ends on PostgreSQL, for the connection's life
+    on SQLite.
+    """
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql('SET TRANSACTION READ ONLY')
+    elif connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('PRAGMA query_only = ON')
+    else:
+        raise RuntimeError(
+            f"dry runs are not supported on {connection.dialect.name}"
+        )
+
+
+def _dry_run_connection():
+    return op.get_context().opts.get(DRY_RUN_CONNECTION)
+
+
+def query_connection():
+    """
+    The connection a migration reads data through: the read-only one in
+    a dry run, the migration's own otherwise, None when only rendering SQL.
+    """
+    connection = _dry_run_connection()
+    if connection is None and not op.get_context().as_sql:
+        connection = op.get_bind()
+    return connection
+
+
+def _dialect() -> str:
+    # Known offline too, where there is no connection
+    return op.get_context().dialect.name
+
+
+def _quote(name: str) -> str:
+    return op.get_context().dialect.identifier_preparer.quote(name)
+
+
+def _own_transaction():
+    """
+    Commits what ran so far and runs the block outside the migration
+    transaction. Elsewhere than PostgreSQL the block joins that transaction.
+    """
+    if _dialect() != 'postgresql':
+        return nullcontext()
+    return op.get_context().autocommit_block()
+
+
+def estimate_rows(table: str, where: str = None) -> int:
+    """
+    Rows an operation on ``table`` touches. Without a condition PostgreSQL
+    answers from its statistics instead of scanning the table.
+    """
+    bind = query_connection()
+    if where is None and bind.dialect.name == 'postgresql':
+        estimate = bind.execute(
+            text(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE relname = :table'
+            ),
+            {'table': table}
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return estimate
+
+    condition = f" WHERE {where}" if where else ''
+    return bind.execute(
+        text(f"SELECT count(*) FROM {_quote(table)}{condition}")
+    ).scalar()
+
+
+def report_rows(operation: str, table: str, where: str = None) -> None:
+    """
+    In a dry run, prints the rows ``operation`` would touch, next to the
+    SQL being rendered. Does nothing otherwise. For plain op.* calls on
+    large tables; the operations below report themselves.
+    """
+    if _dry_run_connection() is None:
+        return
+    rows = estimate_rows(table, where)
+    print(f"-- [dry run] {operation}: ~{rows} rows")
+
+
+def live_table(name: str):
+    """
+    The table as the database has it, for batch_alter_table(copy_from=...)
+    when a dry run renders a SQLite table copy, which alembic cannot
+    reflect offline. None otherwise, batch mode reflects it itself.
+    """
+    connection = _dry_run_connection()
+    if connection is None:
+        return None
+    return Table(name, MetaData(), autoload_with=connection)
+
+
+def create_index_concurrently(
+    name: str,
+    table: str,
+    columns: list,
+    unique: bool = False,
+    where: str = None
+) -> None:
+    """
+    Creates an index without blocking writes: CREATE INDEX CONCURRENTLY on
+    PostgreSQL, run outside the migration transaction as it requires.
+    ``where`` makes it a partial index.
+    """
+    report_rows(f"create index {name} on {table}", table, where)
+
+    kwargs = {}
+    if where:
+        kwargs['postgresql_where'] = text(where)
+        kwargs['sqlite_where'] = text(where)
+    if _dialect() != 'postgresql':
+        op.create_index(name, table, columns, unique=unique, **kwargs)
+        return
+
+    with op.get_context().autocommit_block():
+        # A failed concurrent build leaves an INVALID index behind
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(name)}")
+        op.create_index(
+            name, table, columns, unique=unique,
+            postgresql_concurrently=True, **kwargs
+        )
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    """Drops an index without blocking reads and writes on PostgreSQL."""
+    report_rows(f"drop index {name} on {table}", table)
+
+    if _dialect() != 'postgresql':
+        op.drop_index(name, table_name=table)
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(name)}")
+
+
+def backfill(
+    table: str,
+    set_sql: str,
+    where: str = None,
+    key: str = 'id',
+    batch_size: int = None,
+    pause_seconds: float = 0.05,
+    clock=time.sleep
+) -> int:
+    """
+    Runs ``UPDATE table SET <set_sql> [WHERE <where>]`` in batches of
+    ``batch_size`` rows in ``key`` order, each committed on its own, so
+    row locks are held briefly and replicas keep up. Sleeps
+    ``pause_seconds`` between batches and prints progress. Returns the
+    number of rows updated.
+    """
+    batch_size = batch_size or int(migration_options().get('batch_size', 1000))
+    quoted_table, quoted_key = _quote(table), _quote(key)
+    condition = f"({where})" if where else '1 = 1'
+
+    if op.get_context().as_sql:
+        # Offline there are no keys to page through, render the whole update
+        report_rows(f"backfill {table} SET {set_sql}", table, where)
+        op.execute(
+            f"/* in batches of {batch_size} by {key} */ "
+            f"UPDATE {quoted_table} SET {set_sql} WHERE {condition}"
+        )
+        return 0
+
+    total = estimate_rows(table, where)
+    select_first = text(
+        f"SELECT {quoted_key} FROM {quoted_table} WHERE {condition} "
+        f"ORDER BY {quoted_key} LIMIT :limit"
+    )
+    select_next = text(
+        f"SELECT {quoted_key} FROM {quoted_table} WHERE {condition} "
+        f"AND {quoted_key} > :last ORDER BY {quoted_key} LIMIT :limit"
+    )
+    update = text(
+        f"UPDATE {quoted_table} SET {set_sql} WHERE {quoted_key} IN :keys"
+    ).bindparams(bindparam('keys', expanding=True))
+
+    bind = op.get_bind()
+    done, last = 0, None
+    while True:
+        with _own_transaction():
+            if last is None:
+                keys = bind.execute(
+                    select_first, {'limit': batch_size}
+                ).scalars().all()
+            else:
+                keys = bind.execute(
+                    select_next, {'last': last, 'limit': batch_size}
+                ).scalars().all()
+            if not keys:
+                break
+            bind.execute(update, {'keys': keys})
+
+        done += len(keys)
+        last = keys[-1]
+        print(f"  backfill {table}: {done}/{total} rows")
+        if pause_seconds:
+            clock(pause_seconds)
+    return done
@@ -0,0 +1,153 @@
+import cProfile
+import io
+import pstats
+import time
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from .metrics import percentile
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN of a statement, keeping its bound parameters."""
+    inherit_cache = False
+    # Read by the compiler when the explained statement is DML
+    _inline = False
+
+    def __init__(self, statement, analyze: bool = True):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, 'postgresql')
+def _explain_postgresql(element, compiler, **kw):
+    prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if element.analyze else 'EXPLAIN '
+    return prefix + compiler.process(element.statement, **kw)
+
+
+@compiles(Explain)
+def _explain_default(element, compiler, **kw):
+    # SQLite and the others only describe the plan
+    return 'EXPLAIN QUERY PLAN ' + compiler.process(element.statement, **kw)
+
+
+def explain(session, query, analyze: bool = True) -> None:
+    """
+    Prints the plan of a Query, select() or DML statement as the database
+    runs it. ANALYZE executes the statement, inside a SAVEPOINT that is
+    rolled back so writes are not kept.
+    """
+    statement = getattr(query, 'statement', query)
+    savepoint = session.begin_nested()
+    try:
+        rows = session.execute(Explain(statement, analyze)).all()
+    finally:
+        savepoint.rollback()
+
+    for row in rows:
+        # One text column on PostgreSQL, (id, parent, notused, detail) on SQLite
+        print(row[-1])
+
+
+def pool_stats(registry) -> dict:
+    """Occupancy of every database and Redis pool of this process."""
+    from setara_backend.services import database, redis
+
+    ring = registry.get('redis.ring')
+    return {
+        'db': database.get_pool_stats(registry['db.engine']),
+        'db_replicas': [
+            database.get_pool_stats(engine)
+            for engine in registry.get('db.replica_engines', [])
+        ],
+        'redis': redis.get_pool_stats(registry['redis.client'].connection_pool),
+        'redis_shards': {
+            name: redis.get_pool_stats(client.connection_pool)
+            for name, client in (ring.nodes.items() if ring else ())
+        },
+    }
+
+
+def timeit(func, *args, n: int = 100, warmup: int = 1, **kwargs) -> dict:
+    """Times func(*args, **kwargs) over n calls, after warmup calls."""
+    for _ in range(warmup):
+        func(*args, **kwargs)
+
+    timings = []
+    for _ in range(n):
+        started = time.perf_counter()
+        func(*args, **kwargs)
+        timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    return {
+        'calls': n,
+        'mean_ms': sum(timings) / n * 1000 if n else 0.0,
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'max_ms': timings[-1] * 1000 if timings else 0.0,
+    }
+
+
+def sample_keys(ring, prefix: str = '', limit: int = 1000, scan_count: int = 500) -> dict:
+    """
+    SCANs up to ``limit`` keys starting with ``prefix`` on every node of a
+    HashRing (or a single client) and groups them by their first
+    ':'-separated part, with memory use and keys lacking a TTL. SCAN does
+    not block Redis, but keep ``limit`` small in production.
+    """
+    clients = getattr(ring, 'nodes', {'primary': ring})
+    groups = {}
+    for client in clients.values():
+        keys = []
+        for key in client.scan_iter(match=f"{prefix}*", count=scan_count):
+            keys.append(key)
+            if len(keys) >= limit:
+                break
+
+        pipeline = client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.ttl(key)
+            pipeline.memory_usage(key)
+        results = pipeline.execute(raise_on_error=False)
+
+        for index, key in enumerate(keys):
+            ttl, size = results[2 * index], results[2 * index + 1]
+            name = key.decode('utf-8', 'replace').split(':', 1)[0]
+            group = groups.setdefault(
+                name, {'keys': 0, 'bytes': 0, 'no_ttl': 0}
+            )
+            group['keys'] += 1
+            if isinstance(size, int):
+                group['bytes'] += size
+            if ttl == -1:
+                group['no_ttl'] += 1
+
+    return dict(sorted(groups.items(), key=lambda item: -item[1]['keys']))
+
+
+def profile_request(app, path: str, method: str = 'GET', top: int = 25, **kwargs):
+    """
+    Sends a request through the app (the Pyramid router), tweens included,
+    under cProfile and prints the status, wall time and the ``top``
+    functions by cumulative time. kwargs (headers, POST, body, ...) go to
+    Request.blank.
+    """
+    from pyramid.request import Request
+
+    subrequest = Request.blank(path, method=method, **kwargs)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        response = app.invoke_subrequest(subrequest, use_tweens=True)
+    finally:
+        profiler.disable()
+    elapsed = time.perf_counter() - started
+
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output) \
+        .sort_stats('cumulative').print_stats(top)
+    print(f"{method} {path}: {response.status} in {elapsed * 1000:.1f} ms")
+    print(output.getvalue())
+    return response
@@ -0,0 +1,25 @@
+import contextlib
+import time
+
+STARTUP_TIMINGS_KEY = 'startup.timings'
+
+
+@contextlib.contextmanager
+def startup_phase(registry, name: str):
+    """
+    Adds the wall-clock time of a startup phase to
+    registry['startup.timings'], reported by the profile_startup command.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = registry.setdefault(STARTUP_TIMINGS_KEY, {})
+        timings[name] = timings.get(name, 0.0) + \
+            time.perf_counter() - started
+
+
+def is_test_module(name: str) -> bool:
+    """Tells config.scan to skip tests packages and test_* modules."""
+    parts = name.split('.')
+    return 'tests' in parts or parts[-1].startswith('test_')
@@ -0,0 +1,50 @@
+from unittest.mock import MagicMock
+from setara_backend.utils import AttemptMemo, MetricsRegistry
+from setara_backend.utils.memo import MEMO_ENVIRON_KEY
+
+
+class TestAttemptMemo:
+    """Test suite for the AttemptMemo class."""
+
+    def test_value_is_reused_across_attempts(self):
+        """Tests that a later attempt on the same environ reuses the value."""
+        # Setup
+        environ = {}
+        metrics = MetricsRegistry()
+        func = MagicMock(return_value=True)
+
+        # Action
+        first = AttemptMemo(environ, metrics).call('check', func, 'a', 'b')
+        second = AttemptMemo(environ, metrics).call('check', func, 'a', 'b')
+
+        # Assert
+        assert first is second is True
+        func.assert_called_once_with('a', 'b')
+        assert metrics.get('memo.check.hits') == 1
+        assert metrics.snapshot()['timings']['memo.check.saved']['count'] == 1
+
+    def test_different_arguments_are_computed(self):
+        """Tests that the arguments are part of the memo key."""
+        memo = AttemptMemo({})
+        func = MagicMock(side_effect=lambda value: value * 2)
+
+        assert memo.call('double', func, 1) == 2
+        assert memo.call('double', func, 2) == 4
+        assert func.call_count == 2
+
+    def test_explicit_key_and_peek(self):
+        """Tests memoizing on an explicit key and peeking at it later."""
+        memo = AttemptMemo({})
+
+        memo.call('token', lambda user, extra: 'jwt', object(), {}, key=(7,))
+
+        assert memo.peek('token', 7) == 'jwt'
+        assert memo.peek('token', 8) is None
+
+    def test_arguments_are_not_stored_in_clear(self):
+        """Tests that secrets used as arguments do not end up in the environ."""
+        environ = {}
+
+        AttemptMemo(environ).call('check', lambda password: True, 'S3cret!')
+
+        assert 'S3cret!' not in repr(environ[MEMO_ENVIRON_KEY])
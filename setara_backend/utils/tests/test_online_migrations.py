@@ -0,0 +1,390 @@
+import io
+import re
+from pathlib import Path
+from unittest.mock import MagicMock
+import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+from setara_backend.utils.online_migrations import (
+    DRY_RUN_CONNECTION,
+    apply_timeouts,
+    backfill,
+    create_index_concurrently,
+    drop_index_concurrently,
+    estimate_rows,
+    make_read_only
+)
+
+DEVELOPMENT_INI = Path(__file__).parents[3] / 'development.ini'
+
+
+@pytest.fixture
+def migration(tmp_path):
+    """
+    An alembic operations context on its own SQLite file, outside of the
+    SAVEPOINT-isolated test connection.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    with engine.connect() as connection:
+        connection.execute(text(
+            'CREATE TABLE "tblUser" (id INTEGER PRIMARY KEY, '
+            'user_status TEXT, user_phone TEXT, user_is_login BOOLEAN)'
+        ))
+        connection.execute(
+            text('INSERT INTO "tblUser" (id, user_status, user_phone) '
+                 'VALUES (:id, :status, :phone)'),
+            [
+                {'id': i, 'status': 'deleted' if i % 5 == 0 else 'active',
+                 'phone': f"+62{i}"}
+                for i in range(1, 26)
+            ]
+        )
+        connection.commit()
+
+        context = MigrationContext.configure(connection)
+        with Operations.context(context):
+            yield connection
+    engine.dispose()
+
+
+def render(dialect_name: str, connection=None) -> tuple:
+    """
+    An offline alembic context writing SQL to a buffer, as a dry run
+    configures it when given the read-only ``connection``.
+    """
+    output = io.StringIO()
+    opts = {'as_sql': True, 'output_buffer': output, 'literal_binds': True}
+    if connection is not None:
+        opts[DRY_RUN_CONNECTION] = connection
+    context = MigrationContext.configure(dialect_name=dialect_name, opts=opts)
+    return context, output
+
+
+@pytest.fixture
+def dry_run(migration):
+    """Renders SQLite SQL, with estimates read through ``migration``."""
+    make_read_only(migration)
+    context, output = render('sqlite', migration)
+    with Operations.context(context):
+        yield output
+
+
+@pytest.fixture
+def postgresql():
+    """Renders PostgreSQL SQL inside a migration transaction."""
+    context, output = render('postgresql')
+    with Operations.context(context):
+        with context.begin_transaction(_per_migration=True):
+            yield output
+
+
+@pytest.fixture
+def alembic_config(tmp_path):
+    """The project's alembic setup on its own SQLite file."""
+    ini = DEVELOPMENT_INI.read_text()
+    ini = re.sub(
+        r'^sqlalchemy\.url =.*$',
+        f"sqlalchemy.url = sqlite:///{tmp_path / 'app.db'}",
+        ini, flags=re.M
+    )
+    script_location = DEVELOPMENT_INI.parent / 'setara_backend' / 'alembic'
+    ini = re.sub(
+        r'^script_location =.*$', f"script_location = {script_location}",
+        ini, flags=re.M
+    )
+    path = tmp_path / 'app.ini'
+    path.write_text(ini)
+    return Config(str(path))
+
+
+def database_url(config: Config) -> str:
+    return config.get_section('app:main')['sqlalchemy.url']
+
+
+def current_revision(connection) -> str:
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+class TestEstimateRows:
+    def test_counts_matching_rows(self, migration):
+        """Tests that the estimate honours the condition."""
+        # Action
+        total = estimate_rows('tblUser')
+        deleted = estimate_rows('tblUser', "user_status = 'deleted'")
+
+        # Assert
+        assert total == 25
+        assert deleted == 5
+
+
+class TestBackfill:
+    def test_updates_in_batches(self, migration, capsys):
+        """Tests that every matching row is updated, batch_size at a time."""
+        # Setup
+        pauses = []
+
+        # Action
+        updated = backfill(
+            'tblUser', 'user_is_login = 0', where="user_status <> 'deleted'",
+            batch_size=7, pause_seconds=0.5, clock=pauses.append
+        )
+
+        # Assert
+        assert updated == 20
+        assert len(pauses) == 3
+        assert migration.execute(text(
+            'SELECT count(*) FROM "tblUser" WHERE user_is_login = 0'
+        )).scalar() == 20
+        assert '20/20 rows' in capsys.readouterr().out
+
+    def test_dry_run_changes_nothing(self, migration, dry_run, capsys):
+        """Tests that a dry run reports the estimate and renders the update."""
+        # Action
+        updated = backfill('tblUser', 'user_is_login = 1', batch_size=10)
+
+        # Assert
+        assert updated == 0
+        assert '~25 rows' in capsys.readouterr().out
+        assert 'UPDATE "tblUser" SET user_is_login = 1' in dry_run.getvalue()
+        assert migration.execute(text(
+            'SELECT count(*) FROM "tblUser" WHERE user_is_login IS NULL'
+        )).scalar() == 25
+
+    def test_renders_one_update_on_postgresql(self, postgresql):
+        """Tests that offline SQL holds the whole update, not batches."""
+        # Action
+        backfill(
+            'tblUser', 'user_is_login = false', where="user_status = 'active'",
+            key='user_id', batch_size=500
+        )
+
+        # Assert
+        assert '/* in batches of 500 by user_id */ UPDATE "tblUser" SET ' \
+            "user_is_login = false WHERE (user_status = 'active')" in \
+            postgresql.getvalue()
+
+
+class TestIndexes:
+    def test_create_and_drop_partial_index(self, migration):
+        """Tests that a partial index is created and dropped."""
+        # Action
+        create_index_concurrently(
+            'ix_user_phone_live', 'tblUser', ['user_phone'], unique=True,
+            where="user_status <> 'deleted'"
+        )
+        created = [
+            index['name']
+            for index in inspect(migration).get_indexes('tblUser')
+        ]
+        drop_index_concurrently('ix_user_phone_live', 'tblUser')
+
+        # Assert
+        assert 'ix_user_phone_live' in created
+        assert inspect(migration).get_indexes('tblUser') == []
+
+    def test_dry_run_reports_rows(self, migration, dry_run, capsys):
+        """Tests that a dry run reports the rows to index and renders it."""
+        # Action
+        create_index_concurrently('ix_user_phone', 'tblUser', ['user_phone'])
+
+        # Assert
+        assert 'create index ix_user_phone on tblUser: ~25 rows' in \
+            capsys.readouterr().out
+        assert 'CREATE INDEX ix_user_phone' in dry_run.getvalue()
+        assert inspect(migration).get_indexes('tblUser') == []
+
+    def test_concurrently_outside_transaction_on_postgresql(self, postgresql):
+        """Tests that PostgreSQL builds outside the migration transaction."""
+        # Action
+        create_index_concurrently(
+            'ix_user_phone_live', 'tblUser', ['user_phone'], unique=True,
+            where="user_status <> 'deleted'"
+        )
+
+        # Assert
+        statements = [
+            statement.strip()
+            for statement in postgresql.getvalue().split(';')
+            if statement.strip()
+        ]
+        assert statements == [
+            'COMMIT',
+            'DROP INDEX CONCURRENTLY IF EXISTS ix_user_phone_live',
+            'CREATE UNIQUE INDEX CONCURRENTLY ix_user_phone_live ON "tblUser" '
+            "(user_phone) WHERE user_status <> 'deleted'",
+            'BEGIN',
+        ]
+
+    def test_drop_concurrently_on_postgresql(self, postgresql):
+        """Tests that PostgreSQL drops the index outside the transaction."""
+        # Action
+        drop_index_concurrently('ix_user_phone_live', 'tblUser')
+
+        # Assert
+        assert 'COMMIT;' in postgresql.getvalue()
+        assert 'DROP INDEX CONCURRENTLY IF EXISTS ix_user_phone_live;' in \
+            postgresql.getvalue()
+
+
+class TestApplyTimeouts:
+    def test_skipped_outside_postgresql(self, migration):
+        """Tests that timeouts are a no-op on other databases."""
+        # Action / Assert
+        apply_timeouts(migration, {'lock_timeout': 'not a duration'})
+
+    def test_rejects_invalid_values(self, migration, monkeypatch):
+        """Tests that a malformed timeout is refused before reaching SQL."""
+        # Setup
+        monkeypatch.setattr(migration.dialect, 'name', 'postgresql')
+
+        # Action / Assert
+        with pytest.raises(ValueError):
+            apply_timeouts(migration, {'lock_timeout': "1s'; DROP TABLE x"})
+
+    def test_sets_timeouts_on_postgresql(self):
+        """Tests that given timeouts are set on the migration session."""
+        # Setup
+        connection = MagicMock()
+        connection.dialect.name = 'postgresql'
+
+        # Action
+        apply_timeouts(connection, {'lock_timeout': '5s', 'batch_size': '10'})
+
+        # Assert
+        connection.exec_driver_sql.assert_called_once_with(
+            "SET lock_timeout = '5s'"
+        )
+
+
+class TestMakeReadOnly:
+    def test_sqlite_refuses_writes(self, migration):
+        """Tests that a read-only SQLite connection can read but not write."""
+        # Action
+        make_read_only(migration)
+
+        # Assert
+        assert estimate_rows('tblUser') == 25
+        with pytest.raises(OperationalError):
+            migration.execute(text('DELETE FROM "tblUser"'))
+
+    def test_postgresql_read_only_transaction(self):
+        """Tests that PostgreSQL marks the transaction read-only."""
+        # Setup
+        connection = MagicMock()
+        connection.dialect.name = 'postgresql'
+
+        # Action
+        make_read_only(connection)
+
+        # Assert
+        connection.exec_driver_sql.assert_called_once_with(
+            'SET TRANSACTION READ ONLY'
+        )
+
+
+class TestDryRun:
+    def test_renders_pending_migrations_only(self, alembic_config, capsys):
+        """Tests that a dry run prints the SQL and changes nothing."""
+        # Setup
+        command.upgrade(alembic_config, '8c4e2a7f1d36')
+        capsys.readouterr()
+        alembic_config.cmd_opts = MagicMock(x=['dry_run=true'])
+
+        # Action
+        command.upgrade(alembic_config, 'head')
+
+        # Assert
+        output = capsys.readouterr().out
+        assert 'Running upgrade 5b1f0c7d2a91' not in output
+        assert 'CREATE UNIQUE INDEX "ix_tblUser_user_email_not_deleted"' \
+            in output
+        assert '-- [dry run] create index ix_tblUser_user_email_not_deleted' \
+            in output
+        engine = create_engine(database_url(alembic_config))
+        with engine.connect() as connection:
+            revision = current_revision(connection)
+            indexes = inspect(connection).get_indexes('tblUser')
+        engine.dispose()
+        assert revision == '8c4e2a7f1d36'
+        assert not [i for i in indexes if i['name'].endswith('_not_deleted')]
+
+    def test_postgresql_migrations_render(self, alembic_config, capsys):
+        """Tests that the PostgreSQL SQL of the migrations renders offline."""
+        # Setup
+        ini = Path(alembic_config.config_file_name)
+        ini.write_text(re.sub(
+            r'^sqlalchemy\.url =.*$',
+            'sqlalchemy.url = postgresql://localhost/setara',
+            ini.read_text(), flags=re.M
+        ))
+
+        # Action
+        command.upgrade(alembic_config, '5b1f0c7d2a91:head', sql=True)
+
+        # Assert
+        output = capsys.readouterr().out
+        assert 'ALTER COLUMN user_id TYPE UUID USING "user_id"::uuid' in output
+        assert 'CREATE UNIQUE INDEX CONCURRENTLY ' \
+            '"ix_tblUser_user_phone_not_deleted"' in output
+        assert 'ALTER TABLE "tblUser" DROP CONSTRAINT ' \
+            '"uq_tblUser_user_phone"' in output
+
+
+class TestPartialIdentifierIndexes:
+    @pytest.fixture
+    def shared_email(self, alembic_config):
+        """The database before the migration, two live users share an email."""
+        command.upgrade(alembic_config, '8c4e2a7f1d36')
+        engine = create_engine(database_url(alembic_config))
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    'INSERT INTO "tblUser" (user_id, user_email, user_role, '
+                    'user_status, user_is_verified, user_is_login) '
+                    "VALUES (:id, :email, 'user', :status, 1, 0)"
+                ),
+                [
+                    {'id': '1' * 32, 'email': 'a@x.id', 'status': 'active'},
+                    {'id': '2' * 32, 'email': 'a@x.id', 'status': 'inactive'},
+                    {'id': '3' * 32, 'email': 'b@x.id', 'status': 'active'},
+                    {'id': '4' * 32, 'email': 'b@x.id', 'status': 'deleted'},
+                ]
+            )
+        yield engine
+        engine.dispose()
+
+    def test_stops_before_building_indexes(self, alembic_config, shared_email):
+        """Tests that duplicate live emails abort the upgrade untouched."""
+        # Action
+        with pytest.raises(RuntimeError) as error:
+            command.upgrade(alembic_config, 'head')
+
+        # Assert
+        assert 'a@x.id (2 users)' in str(error.value)
+        assert 'b@x.id' not in str(error.value)
+        with shared_email.connect() as connection:
+            revision = current_revision(connection)
+            indexes = inspect(connection).get_indexes('tblUser')
+            constraints = inspect(connection).get_unique_constraints('tblUser')
+        assert revision == '8c4e2a7f1d36'
+        assert not [i for i in indexes if i['name'].endswith('_not_deleted')]
+        assert len(constraints) == 2
+
+    def test_dry_run_lists_duplicates(
+        self, alembic_config, shared_email, capsys
+    ):
+        """Tests that a dry run reports the duplicate emails."""
+        # Setup
+        capsys.readouterr()
+        alembic_config.cmd_opts = MagicMock(x=['dry_run=true'])
+
+        # Action
+        command.upgrade(alembic_config, 'head')
+
+        # Assert
+        assert '-- [dry run] duplicate user_email, the upgrade will stop: ' \
+            'a@x.id (2 users)' in capsys.readouterr().out
@@ -0,0 +1,90 @@
+from sqlalchemy import update
+from setara_backend.models import TblUser
+from setara_backend.utils.shell import (
+    explain,
+    pool_stats,
+    profile_request,
+    sample_keys,
+    timeit
+)
+
+
+class TestExplain:
+    def test_query_plan(self, dbsession, capsys):
+        """Tests that the plan of an ORM query is printed."""
+        # Setup
+        query = dbsession.query(TblUser).filter(TblUser.user_phone == '+62812')
+
+        # Action
+        explain(dbsession, query)
+
+        # Assert
+        assert 'tblUser' in capsys.readouterr().out
+
+    def test_dml_is_rolled_back(self, dbsession, capsys):
+        """Tests that explaining an UPDATE leaves the data untouched."""
+        # Setup
+        statement = update(TblUser).values(user_is_login=True)
+
+        # Action
+        explain(dbsession, statement)
+
+        # Assert
+        assert 'tblUser' in capsys.readouterr().out
+        assert dbsession.query(TblUser).filter(
+            TblUser.user_is_login.is_(True)).count() == 0
+
+
+class TestTimeit:
+    def test_calls_and_percentiles(self):
+        """Tests that the callable runs warmup + n times."""
+        # Setup
+        calls = []
+
+        # Action
+        stats = timeit(calls.append, 1, n=10, warmup=2)
+
+        # Assert
+        assert len(calls) == 12
+        assert stats['calls'] == 10
+        assert stats['p50_ms'] <= stats['p99_ms'] <= stats['max_ms']
+
+
+class TestSampleKeys:
+    def test_groups_by_prefix(self, redis_client):
+        """Tests that keys are grouped by keyspace, counting keys without TTL."""
+        # Setup
+        redis_client.set('auth_token:1', 'a', ex=60)
+        redis_client.set('auth_token:2', 'b')
+        redis_client.set('rate_limit:10.0.0.1', 1, ex=1)
+
+        # Action
+        groups = sample_keys(redis_client)
+
+        # Assert
+        assert groups['auth_token']['keys'] == 2
+        assert groups['auth_token']['no_ttl'] == 1
+        assert groups['rate_limit']['keys'] == 1
+        assert list(sample_keys(redis_client, prefix='rate')) == ['rate_limit']
+
+
+class TestAppHelpers:
+    def test_pool_stats(self, testapp):
+        """Tests that every pool of the app is reported."""
+        # Action
+        stats = pool_stats(testapp.app.registry)
+
+        # Assert
+        assert set(stats) == {'db', 'db_replicas', 'redis', 'redis_shards'}
+        assert 'primary' in stats['redis_shards']
+
+    def test_profile_request(self, testapp, redis_client, capsys):
+        """Tests that a request is profiled through the tweens."""
+        # Action
+        response = profile_request(testapp.app, '/', top=5)
+
+        # Assert
+        assert response.status_code == 200
+        output = capsys.readouterr().out
+        assert output.startswith('GET /: 200 OK in ')
+        assert 'cumulative' in output
@@ -0,0 +1,47 @@
+import pytest
+from setara_backend.utils import is_test_module, startup_phase
+from setara_backend.utils.startup import STARTUP_TIMINGS_KEY
+
+
+class TestStartupPhase:
+    """Test suite for the startup phase timer."""
+
+    def test_phases_accumulate(self):
+        """Tests that a phase entered twice adds up, even when it raises."""
+        # Setup
+        registry = {}
+
+        # Action
+        with startup_phase(registry, 'scan'):
+            pass
+        with pytest.raises(RuntimeError):
+            with startup_phase(registry, 'scan'):
+                raise RuntimeError('boom')
+
+        # Assert
+        assert list(registry[STARTUP_TIMINGS_KEY]) == ['scan']
+        assert registry[STARTUP_TIMINGS_KEY]['scan'] > 0
+
+    def test_app_records_its_phases(self, testapp):
+        """Tests that main() reports the includes, scan and commit."""
+        # Action
+        timings = testapp.app.registry[STARTUP_TIMINGS_KEY]
+
+        # Assert
+        assert {
+            'include.middleware', 'include.services', 'configure_mappers',
+            'scan', 'commit'
+        } <= set(timings)
+
+
+class TestIsTestModule:
+    @pytest.mark.parametrize('name, expected', [
+        ('setara_backend.views.auth', False),
+        ('setara_backend.views.tests', True),
+        ('setara_backend.views.tests.test_auth_view', True),
+        ('setara_backend.test_server', True),
+        ('setara_backend.views.testimonials', False),
+    ])
+    def test_names(self, name, expected):
+        """Tests which modules config.scan skips."""
+        assert is_test_module(name) is expected
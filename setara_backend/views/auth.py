@@ -1,6 +1,5 @@
 from pyramid.view import view_defaults, view_config
 from setara_backend.schemas import UserSchema
-from setara_backend.handlers.auth import AuthHandler
 from . import (
     secure_view,
     validate_form_schema
@@ -11,8 +10,10 @@ from . import (
 class AuthView:
     def __init__(self, request):
         self.request = request
-        self.session = self.request.dbsession
-        self.auth_handler = AuthHandler(self.session)
+
+    @property
+    def auth_handler(self):
+        return self.request.container.auth_handler
 
     @view_config(route_name='login', renderer='json', request_method='POST')
     @validate_form_schema(UserSchema)
@@ -0,0 +1,33 @@
+from pyramid.view import view_config
+from setara_backend.services import database, redis
+from . import secure_view
+
+
+@view_config(route_name='internal_metrics', renderer='json', request_method='GET')
+@secure_view(type='internal')
+def metrics_view(request):
+    registry = request.registry
+
+    return {
+        "error": False,
+        "pools": {
+            "db": database.get_pool_stats(registry['db.engine']),
+            "db_replicas": [
+                database.get_pool_stats(engine)
+                for engine in registry.get('db.replica_engines', [])
+            ],
+            "redis": redis.get_pool_stats(
+                registry['redis.client'].connection_pool
+            ),
+        },
+        "redis_breaker": registry['redis.breaker'].state,
+        "redis_replica": _replica_status(registry.get('redis.replica_router')),
+        "login_lockout": registry['login_lockout'].stats(),
+        "metrics": registry['metrics'].snapshot(),
+    }
+
+
+def _replica_status(router):
+    if router is None:
+        return None
+    return {"healthy": router.healthy, "staleness_seconds": router.staleness}
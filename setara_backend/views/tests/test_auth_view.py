@@ -89,6 +89,29 @@ class TestAuthView:
                 redis_client.get(
                     f'auth_token:{test_user.user_id}').decode('utf-8')
 
+        def test_login_rehashes_password(self, testapp, dbsession, redis_client, test_user: TblUser):
+            # Setup
+            payload = MultipartEncoder(
+                fields={
+                    'login_method': 'phone',
+                    'user_identifier': '+6212345674567',
+                    'user_password': 'Test12345!',
+                    'user_notification_token': 'notification_token'
+                }
+            )
+
+            # Action
+            testapp.post(
+                '/auth/login',
+                params=payload.to_string(),
+                headers={'Content-Type': payload.content_type},
+                status=201
+            )
+
+            # Assert
+            dbsession.expire(test_user)
+            assert test_user.user_password.startswith('$2b$04$')
+
         def test_login_fail_user_not_found(self, testapp, dbsession, redis_client):
             # Setup
             payload = MultipartEncoder(
@@ -112,6 +135,31 @@ class TestAuthView:
             assert response.json['error'] == True
             assert response.json['message'] == 'akun pengguna tidak ditemukan'
 
+        def test_login_fail_locked_identifier(self, testapp, dbsession, redis_client, test_user: TblUser):
+            # Setup
+            redis_client.set('login_lockout:phone:+6212345674567', 5, ex=30)
+            payload = MultipartEncoder(
+                fields={
+                    'login_method': 'phone',
+                    'user_identifier': '+6212345674567',
+                    'user_password': 'Test12345!',
+                    'user_notification_token': 'notification_token'
+                }
+            )
+
+            # Action
+            response = testapp.post(
+                '/auth/login',
+                params=payload.to_string(),
+                headers={'Content-Type': payload.content_type},
+                status=429
+            )
+
+            # Assert
+            assert response.json['error'] == True
+            assert int(response.headers['Retry-After']) <= 30
+            assert redis_client.get(f'auth_token:{test_user.user_id}') is None
+
         def test_login_fail_bad_payload(self, testapp, dbsession, redis_client):
             # Setup
             payload = MultipartEncoder(
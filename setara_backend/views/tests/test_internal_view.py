@@ -0,0 +1,44 @@
+INTERNAL_HEADERS = {'X-Internal-Token': 'internal-secret'}
+
+
+def test_metrics_endpoint_reports_pools(testapp):
+    # Action
+    response = testapp.get(
+        '/internal/metrics',
+        headers=INTERNAL_HEADERS,
+        extra_environ={'REMOTE_ADDR': '203.0.113.7'},
+        status=200
+    )
+
+    # Assert
+    assert response.json['error'] == False
+    assert 'pool' in response.json['pools']['db']
+    assert 'idle' in response.json['pools']['redis']
+    assert 'counters' in response.json['metrics']
+
+
+def test_metrics_endpoint_forbidden_without_token(testapp):
+    # Action
+    response = testapp.get(
+        '/internal/metrics',
+        headers={'X-Internal-Token': 'guess'},
+        extra_environ={'REMOTE_ADDR': '203.0.113.7'},
+        status=403
+    )
+
+    # Assert
+    assert response.json['error'] == True
+
+
+def test_metrics_endpoint_forbidden_through_local_proxy(testapp):
+    """An outside request forwarded by a proxy on localhost stays closed."""
+    # Action
+    response = testapp.get(
+        '/internal/metrics',
+        headers={'X-Forwarded-For': '203.0.113.7'},
+        extra_environ={'REMOTE_ADDR': '127.0.0.1'},
+        status=403
+    )
+
+    # Assert
+    assert response.json['error'] == True
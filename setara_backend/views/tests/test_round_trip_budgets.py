@@ -0,0 +1,109 @@
+import pytest
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from setara_backend.models import (
+    TblUser,
+    UserStatusEnum
+)
+from datetime import datetime
+
+
+@pytest.fixture
+def test_user(dbsession) -> TblUser:
+    user = TblUser(
+        user_phone='+6212345674567',
+        user_username='john',
+        user_email='john@example.com',
+        user_name='John Doe',
+        user_password='$2b$04$iiPF1uW02XNkARrtc5tiLOdlLy/xDS5jv6iabd0ylcbjkFCT.kcs2',
+        user_is_verified=True,
+        user_is_login=False,
+        user_role='admin_super',
+        user_approved_at=datetime.now(),
+        user_status=UserStatusEnum.active
+    )
+    dbsession.add(user)
+    dbsession.flush()
+    return user
+
+
+def login_payload(password='Test12345!') -> MultipartEncoder:
+    return MultipartEncoder(
+        fields={
+            'login_method': 'phone',
+            'user_identifier': '+6212345674567',
+            'user_password': password,
+            'user_notification_token': 'notification_token'
+        }
+    )
+
+
+def login(testapp, password='Test12345!', status=201):
+    payload = login_payload(password)
+    return testapp.post(
+        '/auth/login',
+        params=payload.to_string(),
+        headers={'Content-Type': payload.content_type},
+        status=status
+    )
+
+
+class TestRoundTripBudgets:
+    """
+    Round trips are the main share of request latency. Raise a budget only
+    together with the change that needs the extra round trip.
+    """
+
+    def test_landing(self, testapp, redis_client, round_trips):
+        """Redis: rate limit."""
+        # Action & Assert
+        with round_trips.budget(sql=0, redis=1):
+            testapp.get('/', status=200)
+
+    def test_login_success(self, testapp, dbsession, redis_client, test_user, round_trips):
+        """
+        SQL: user lookup, login state update.
+        Redis: rate limit, lockout check and reset, single device check,
+        notification token (HSET, EXPIRE), access token.
+        """
+        # Action & Assert
+        with round_trips.budget(sql=2, redis=7):
+            login(testapp)
+
+    def test_login_wrong_password(self, testapp, dbsession, redis_client, test_user, round_trips):
+        """SQL: user lookup. Redis: rate limit, lockout check and failure."""
+        # Action & Assert
+        with round_trips.budget(sql=1, redis=3):
+            login(testapp, password='Wrong12345!', status=401)
+
+    def test_login_unknown_user(self, testapp, dbsession, redis_client, round_trips):
+        """SQL: user lookup. Redis: rate limit, lockout check."""
+        # Action & Assert
+        with round_trips.budget(sql=1, redis=2):
+            login(testapp, status=404)
+
+    def test_logout(self, testapp, dbsession, redis_client, test_user, round_trips):
+        """
+        SQL: login state update.
+        Redis: token check and refresh, rate limit, access and notification
+        token removal.
+        """
+        # Setup
+        access_token = login(testapp).json['access_token']
+
+        # Action & Assert
+        with round_trips.budget(sql=1, redis=5):
+            testapp.get(
+                '/auth/logout',
+                headers={'Authorization': f'Bearer {access_token}'},
+                status=200
+            )
+
+    def test_logout_invalid_token(self, testapp, redis_client, round_trips):
+        """Redis: rate limit, a bad signature never reaches Redis."""
+        # Action & Assert
+        with round_trips.budget(sql=0, redis=1):
+            testapp.get(
+                '/auth/logout',
+                headers={'Authorization': 'Bearer invalid'},
+                status=401
+            )
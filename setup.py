@@ -28,6 +28,7 @@ tests_require = [
     'WebTest >= 1.3.1',  # py3 compat
     'pytest>=3.7.4',
     'pytest-cov',
+    'pytest-xdist',
 ]
 
 setup(
@@ -59,6 +60,14 @@ setup(
         'console_scripts': [
             'run_linter=setara_backend.scripts.run_linter:main',
             'migrate=setara_backend.scripts.alembic:main',
+            'calibrate_bcrypt=setara_backend.scripts.calibrate_bcrypt:main',
+            'rebuild_identifier_filter=setara_backend.scripts.rebuild_identifier_filter:main',
+            'push_worker=setara_backend.scripts.push_worker:main',
+            'run_benchmarks=setara_backend.scripts.run_benchmarks:main',
+            'load_test=setara_backend.scripts.load_test:main',
+            'profile_startup=setara_backend.scripts.profile_startup:main',
+            'import_report=setara_backend.scripts.import_report:main',
+            'benchmark_keys=setara_backend.scripts.benchmark_keys:main',
         ],
     },
 )